@@ -1,12 +1,16 @@
+import argparse
 import cv2
 import cvzone
 import math
 import os
+import sys
 import time
-import requests
-from ultralytics import YOLO
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import (EventClipRecorder, FrameDisplay, PhotoAlertDispatcher, add_backend_arguments,
+                           add_display_arguments, add_recording_arguments, load_model)
+
 # Load environment variables
 load_dotenv()
 
@@ -15,60 +19,17 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")  # Correct access method
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TELEGRAM_API_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
 
-# Validate token exists
-if not TELEGRAM_BOT_TOKEN:
-    raise ValueError("❌ TELEGRAM_BOT_TOKEN not found in .env file")
-
-# Initialize YOLO model
-model = YOLO(r'Models\yolo12m.pt')
-
-# Video setup
-cap = cv2.VideoCapture(r'Test Videos\fall test 1.mp4')
-fps = int(cap.get(cv2.CAP_PROP_FPS))
-out = cv2.VideoWriter(r'Output Videos\Fall Output 1.mp4', 
-                    cv2.VideoWriter_fourcc(*'mp4v'), fps, (980, 740))
-
-# Load class names
-with open('coco.txt', 'r') as f:
-    classnames = f.read().splitlines()
-
-# Fall frames directory
-fall_frames_dir = 'fall_frames'
-os.makedirs(fall_frames_dir, exist_ok=True)
-
-def send_telegram_alert(image_path):
-    """Send image with alert to your Telegram"""
-    try:
-        with open(image_path, 'rb') as photo:
-            response = requests.post(
-                TELEGRAM_API_URL,
-                data={
-                    'chat_id': TELEGRAM_CHAT_ID,
-                    'caption': '🚨 FALL DETECTED! (Test Alert)'
-                },
-                files={'photo': photo}
-            )
-        if response.status_code == 200:
-            print("✅ Telegram alert sent to your account!")
-        else:
-            print(f"❌ Telegram failed: {response.text}")
-    except Exception as e:
-        print(f"⚠️ Telegram error: {str(e)}")
+# Default model and video paths
+DEFAULT_MODEL_PATH = r'Models\yolo12m.pt'
+DEFAULT_VIDEO_PATH = r'Test Videos\fall test 1.mp4'
+DEFAULT_OUTPUT_PATH = r'Output Videos\Fall Output 1.mp4'
 
 # Alert control
-last_alert_time = 0
 alert_cooldown = 10  # seconds between alerts
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-    
-    frame = cv2.resize(frame, (980, 740))
-    current_time = time.time()
+def detect_falls(model, classnames, frame):
+    """Run the detector on a frame, draw fallen persons and return True if any"""
     fall_detected = False
-
-    # Detect falls
     results = model(frame)
     for info in results:
         for box in info.boxes:
@@ -81,23 +42,93 @@ while True:
                 if height - width < 0:  # Fall condition
                     fall_detected = True
                     cvzone.cornerRect(frame, [x1, y1, width, height], l=30, rt=6)
-                    cvzone.putTextRect(frame, 'Person Fell', [x1+8, y1-12], 
+                    cvzone.putTextRect(frame, 'Person Fell', [x1+8, y1-12],
                                      thickness=2, scale=2, colorR=(0,0,255))
+    return fall_detected
+
+def main():
+    parser = argparse.ArgumentParser(description="Fall Detection")
+    parser.add_argument('--input', type=str, default=DEFAULT_VIDEO_PATH,
+                        help='Path to input video file')
+    parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT_PATH,
+                        help='Path of the annotated output video (with --record-stream)')
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL_PATH,
+                        help='YOLO weights')
+    add_recording_arguments(parser, clips_dir='fall_clips')
+    add_backend_arguments(parser)
+    add_display_arguments(parser)
+    args = parser.parse_args()
+
+    # Validate token exists
+    if not TELEGRAM_BOT_TOKEN:
+        raise ValueError("❌ TELEGRAM_BOT_TOKEN not found in .env file")
+
+    # Initialize YOLO model
+    model = load_model(args.model, args.backend, int8=args.int8, calibration_data=args.calibration_data)
+
+    # Video setup
+    cap = cv2.VideoCapture(args.input)
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    # Continuous encoding of the whole stream is opt-in, falls get short clips instead
+    out = cv2.VideoWriter(args.output,
+                        cv2.VideoWriter_fourcc(*'mp4v'), fps, (980, 740)) if args.record_stream else None
+    clips = EventClipRecorder(args.clips_dir, fps, args.pre_event, args.post_event, name='fall-clips')
+    # Alerts are uploaded from a background thread so a slow Telegram never stalls the video.
+    # Rate-limited and server errors are retried, undelivered photos wait in fall_alert_frames
+    alerts = PhotoAlertDispatcher(
+        TELEGRAM_API_URL,
+        TELEGRAM_CHAT_ID,
+        spool_dir='fall_alert_frames',
+        cooldown=alert_cooldown,
+        label='fall',
+        caption='🚨 FALL DETECTED! (Test Alert)'
+    )
+
+    # Load class names
+    with open('coco.txt', 'r') as f:
+        classnames = f.read().splitlines()
+
+    # waitKey(25) only applies to the GUI mode, headless runs at inference speed
+    display = FrameDisplay(
+        'Fall Detection',
+        headless=args.headless,
+        preview_path=args.preview,
+        preview_interval=args.preview_interval,
+        wait_ms=25
+    )
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame = cv2.resize(frame, (980, 740))
+        current_time = time.time()
+
+        # Detect falls
+        fall_detected = detect_falls(model, classnames, frame)
+
+        # Keep the frame for event clips (and the full recording if enabled)
+        clips.push(frame)
+        if out is not None:
+            out.write(frame)
+
+        # Handle alerts
+        if fall_detected:
+            clips.trigger('fall')
+            if alerts.alert(frame, now=current_time):
+                print("📸 Fall alert queued")
+
+        # Display
+        if not display.show(frame):
+            break
+
+    cap.release()
+    if out is not None:
+        out.release()
+    clips.close()
+    alerts.close()
+    display.close()
 
-    # Handle alerts
-    if fall_detected and (current_time - last_alert_time >= alert_cooldown):
-        frame_path = os.path.join(fall_frames_dir, f"fall_{int(time.time())}.jpg")
-        if cv2.imwrite(frame_path, frame):
-            print(f"📸 Saved: {frame_path}")
-            send_telegram_alert(frame_path)
-            last_alert_time = current_time
-
-    # Display
-    out.write(frame)
-    cv2.imshow('Fall Detection', frame)
-    if cv2.waitKey(25) & 0xFF == ord('q'):
-        break
-
-cap.release()
-out.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,181 @@
+import argparse
 import cv2
+import json
 import numpy as np
 import os
+import sys
 import time
-import requests
 from dotenv import load_dotenv
-from ultralytics import YOLO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import (EventClipRecorder, FrameDisplay, add_backend_arguments, add_display_arguments,
+                           add_recording_arguments, load_model)
+from fire_alerts import FireAlertDispatcher
+from fire_gating import MotionGate, TemporalConfirmation
 
 class FireSmokeDetector:
-    def __init__(self):
+
+    DEFAULT_MODEL_PATH = r"Models\best.pt"
+    DEFAULT_VIDEO_PATH = r"Test Videos\vid.mp4"
+    DEFAULT_OUTPUT_PATH = r"Output Videos\Detection_output.mp4"
+
+    # Mask/box color and label per detection kind
+    STYLES = {
+        'fire': ((0, 0, 255), "FIRE"),      # Red for fire
+        'smoke': ((255, 0, 0), "SMOKE"),    # Blue for smoke
+    }
+
+    def __init__(self, headless=False, preview_path=None, preview_interval=5.0,
+                 model_path=DEFAULT_MODEL_PATH, video_path=DEFAULT_VIDEO_PATH,
+                 output_path=DEFAULT_OUTPUT_PATH, backend='auto', int8=False, calibration_data=None,
+                 alert_url=None, render=True, motion_gate=True, confirm_frames=3, confirm_window=5,
+                 record_stream=False, clips_dir='fire_clips', pre_event=5.0, post_event=5.0):
         # Load configuration
         load_dotenv()
-        self.TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-        self.TELEGRAM_API_URL = f"https://api.telegram.org/bot{self.TELEGRAM_BOT_TOKEN}/sendPhoto"
         
         # Initialize model
-        self.model = YOLO(r"Models\best.pt")
-        self.class_names = self.model.model.names
+        self.model = load_model(model_path, backend, int8=int8, calibration_data=calibration_data)
+        self.class_names = self.model.names
+        # 'fire', 'smoke' or None per class ID, so detection needs no string matching per box
+        self.class_kinds = {
+            class_id: 'fire' if 'fire' in name.lower() else 'smoke' if 'smoke' in name.lower() else None
+            for class_id, name in self.class_names.items()
+        }
+
+        # Without rendering frames are never annotated, copied or blended
+        self.render = render
+        self.overlay = None   # reused blending buffer
         
         # Video setup
-        self.cap = cv2.VideoCapture(r'Test Videos\vid.mp4')
+        self.cap = cv2.VideoCapture(video_path)
         self.frame_size = (1020, 500)
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        # Continuous encoding of the whole stream is opt-in, alerts get short clips instead
         self.writer = cv2.VideoWriter(
-            r'Output Videos\Detection_output.mp4',
+            output_path,
             cv2.VideoWriter_fourcc(*'mp4v'),
-            self.cap.get(cv2.CAP_PROP_FPS),
+            fps,
             self.frame_size
+        ) if record_stream else None
+        self.clips = EventClipRecorder(clips_dir, fps, pre_event, post_event, name='fire-clips')
+        self.display = FrameDisplay(
+            "Fire & Smoke Detection",
+            headless=headless,
+            preview_path=preview_path,
+            preview_interval=preview_interval
         )
         
-        # Alert system (fire only)
-        self.last_alert_time = 0
-        self.alert_cooldown = 10  # seconds
+        # Alert system (fire only), delivered from a background thread
         self.frames_dir = 'alert_frames'
-        os.makedirs(self.frames_dir, exist_ok=True)
+        self.alerts = FireAlertDispatcher.from_env(
+            alert_url,
+            spool_dir=self.frames_dir,
+            cooldown=10  # seconds
+        )
 
-    def draw_detections_with_masks(self, frame, results):
-        """Draw bounding boxes with mask overlays"""
-        fire_detected = False
-        smoke_detected = False
-        
-        if results[0].boxes is not None and results[0].masks is not None:
-            boxes = results[0].boxes.xyxy.cpu().numpy()
-            class_ids = results[0].boxes.cls.cpu().numpy().astype(int)
-            masks = results[0].masks.xy
-            
-            overlay = frame.copy()
-            
-            for box, class_id, mask in zip(boxes, class_ids, masks):
-                x1, y1, x2, y2 = map(int, box)
-                class_name = self.class_names[class_id].lower()
-                
-                if 'fire' in class_name:
-                    color = (0, 0, 255)  # Red for fire
-                    label = "FIRE"
-                    fire_detected = True
-                elif 'smoke' in class_name:
-                    color = (255, 0, 0)  # Blue for smoke
-                    label = "SMOKE"
-                    smoke_detected = True
-                else:
-                    continue
-                
+        # The model only runs when the scene changes, alerts need fire in N of the last M frames
+        self.gate = MotionGate() if motion_gate else None
+        self.confirmation = TemporalConfirmation(confirm_frames, confirm_window, fps)
+        self.frames_processed = 0
+        self.model_invocations = 0
+        self.inference_seconds = 0.0
+
+    def detect(self, results):
+        """
+        Fire/smoke decision from the class IDs alone.
+
+        Returns:
+            tuple: (kind of each detection or None, fire_detected, smoke_detected)
+        """
+        if results[0].boxes is None or results[0].masks is None:
+            return [], False, False
+        class_ids = results[0].boxes.cls.cpu().numpy().astype(int)
+        kinds = [self.class_kinds.get(class_id) for class_id in class_ids]
+        return kinds, 'fire' in kinds, 'smoke' in kinds
+
+    def draw_detections_with_masks(self, frame, results, kinds):
+        """Draw bounding boxes with mask overlays, blending only the area the masks cover"""
+        if not any(kinds):
+            return frame
+        boxes = results[0].boxes.xyxy.cpu().numpy()
+        masks = results[0].masks.xy
+
+        polygons = [
+            (np.asarray(mask, dtype=np.int32).reshape((-1, 1, 2)), kind)
+            for mask, kind in zip(masks, kinds) if kind is not None and len(mask)
+        ]
+        if polygons:
+            height, width = frame.shape[:2]
+            points = np.concatenate([polygon for polygon, _ in polygons]).reshape(-1, 2)
+            x1, y1 = np.clip(points.min(axis=0), 0, [width, height])
+            x2, y2 = np.clip(points.max(axis=0) + 1, 0, [width, height])
+            if x2 > x1 and y2 > y1:
+                if self.overlay is None or self.overlay.shape != frame.shape:
+                    self.overlay = np.empty_like(frame)
+                roi = frame[y1:y2, x1:x2]
+                overlay = self.overlay[y1:y2, x1:x2]
+                overlay[...] = roi
                 # Draw mask (blue for smoke, red for fire)
-                mask_points = np.array(mask, dtype=np.int32).reshape((-1, 1, 2))
-                cv2.fillPoly(overlay, [mask_points], color)
-                
-                # Draw bounding box and label
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(frame, label, (x1, y1 - 10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
-            
-            # Apply overlay with transparency
-            frame = cv2.addWeighted(overlay, 0.4, frame, 0.6, 0)
-        
-        return frame, fire_detected, smoke_detected
+                for polygon, kind in polygons:
+                    cv2.fillPoly(overlay, [polygon], self.STYLES[kind][0], offset=(-int(x1), -int(y1)))
+                # Apply overlay with transparency
+                frame[y1:y2, x1:x2] = cv2.addWeighted(overlay, 0.4, roi, 0.6, 0)
+
+        # Draw bounding box and label
+        for box, kind in zip(boxes, kinds):
+            if kind is None:
+                continue
+            color, label = self.STYLES[kind]
+            x1, y1, x2, y2 = map(int, box)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, label, (x1, y1 - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+        return frame
 
     def send_fire_alert(self, frame):
-        """Send alert ONLY for fire detections"""
-        current_time = time.time()
-        if current_time - self.last_alert_time >= self.alert_cooldown:
-            frame_path = os.path.join(self.frames_dir, f"fire_{int(current_time)}.jpg")
-            cv2.imwrite(frame_path, frame)
-            
-            try:
-                with open(frame_path, 'rb') as photo:
-                    requests.post(
-                        self.TELEGRAM_API_URL,
-                        files={'photo': photo},
-                        data={
-                            'chat_id': self.TELEGRAM_CHAT_ID,
-                            'caption': '🔥 FIRE DETECTED!',
-                            'parse_mode': 'Markdown'
-                        },
-                        timeout=10
-                    )
-                print("✅ Fire alert sent to Telegram")
-                self.last_alert_time = current_time
-            except Exception as e:
-                print(f"⚠️ Failed to send alert: {str(e)}")
+        """Queue an alert ONLY for fire detections, the upload happens in the background"""
+        if self.alerts is not None:
+            self.alerts.alert(frame)
 
     def process_frame(self, frame):
         """Process each frame for detections"""
         frame = cv2.resize(frame, self.frame_size)
+        self.frames_processed += 1
+        if self.gate is not None and not self.gate.check(frame)[0]:
+            # Static scene and nothing seen lately, the model is skipped
+            return frame, False, False
+
+        start = time.perf_counter()
         results = self.model.track(frame, persist=True)
-        return self.draw_detections_with_masks(frame, results)
+        self.inference_seconds += time.perf_counter() - start
+        self.model_invocations += 1
+        kinds, fire_detected, smoke_detected = self.detect(results)
+        if self.gate is not None:
+            self.gate.observe(fire_detected or smoke_detected)
+        if self.render:
+            frame = self.draw_detections_with_masks(frame, results, kinds)
+        return frame, fire_detected, smoke_detected
+
+    def output(self, frame):
+        """Keep the frame for event clips, and in the full recording if enabled"""
+        self.clips.push(frame)
+        if self.writer is not None:
+            self.writer.write(frame)
+
+    def report(self):
+        """Model invocation rate and alert confirmation statistics"""
+        frames = self.frames_processed
+        return {
+            'frames': frames,
+            'model_invocations': self.model_invocations,
+            'invocation_rate': round(self.model_invocations / frames, 4) if frames else None,
+            'model_ms_per_invocation': round(self.inference_seconds / self.model_invocations * 1000, 2)
+                                       if self.model_invocations else None,
+            'gate': self.gate.report() if self.gate is not None else None,
+            'confirmation': self.confirmation.report(),
+            'clips': list(self.clips.clips),
+            'clip_frames_dropped': self.clips.frames_dropped,
+        }
 
     def run(self):
         """Main detection loop"""
@@ -115,22 +187,68 @@ class FireSmokeDetector:
                 
                 processed_frame, fire, smoke = self.process_frame(frame)
                 
-                # Send alert ONLY for fire (not smoke)
-                if fire:
-                    self.send_fire_alert(processed_frame)
-                
                 # Output video (contains both fire and smoke detections)
-                self.writer.write(processed_frame)
-                cv2.imshow("Fire & Smoke Detection", processed_frame)
+                self.output(processed_frame)
+
+                # Send alert ONLY for fire (not smoke), once it is confirmed over several frames
+                if self.confirmation.update(fire):
+                    self.send_fire_alert(processed_frame)
+                    self.clips.trigger('fire')
                 
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if not self.display.show(processed_frame):
                     break
                     
         finally:
             self.cap.release()
-            self.writer.release()
-            cv2.destroyAllWindows()
+            if self.writer is not None:
+                self.writer.release()
+            self.clips.close()
+            self.display.close()
+            if self.alerts is not None:
+                self.alerts.close()
+            print(f"📊 {json.dumps(self.report(), indent=4)}")
 
 if __name__ == "__main__":
-    detector = FireSmokeDetector()
+    parser = argparse.ArgumentParser(description="Fire & Smoke Detection System")
+    parser.add_argument('--input', type=str, default=FireSmokeDetector.DEFAULT_VIDEO_PATH,
+                        help='Path to input video file')
+    parser.add_argument('--output', type=str, default=FireSmokeDetector.DEFAULT_OUTPUT_PATH,
+                        help='Path of the annotated output video (with --record-stream)')
+    parser.add_argument('--model', type=str, default=FireSmokeDetector.DEFAULT_MODEL_PATH,
+                        help='Fire/smoke segmentation weights')
+    parser.add_argument('--alert-url', type=str, default=None,
+                        help='Send alerts to this sendPhoto URL instead of Telegram (e.g. fire_alerts.py stub)')
+    parser.add_argument('--no-render', action='store_true',
+                        help='Detect only, frames are written and alerted without mask overlays')
+    parser.add_argument('--no-gate', action='store_true',
+                        help='Run the model on every frame instead of only when the scene changes')
+    parser.add_argument('--confirm-frames', type=int, default=3,
+                        help='Fire must be detected in this many of the last --confirm-window frames to alert')
+    parser.add_argument('--confirm-window', type=int, default=5,
+                        help='Frames in the alert confirmation window')
+    add_recording_arguments(parser, clips_dir='fire_clips')
+    add_backend_arguments(parser)
+    add_display_arguments(parser)
+    args = parser.parse_args()
+
+    detector = FireSmokeDetector(
+        headless=args.headless,
+        preview_path=args.preview,
+        preview_interval=args.preview_interval,
+        model_path=args.model,
+        video_path=args.input,
+        output_path=args.output,
+        backend=args.backend,
+        int8=args.int8,
+        calibration_data=args.calibration_data,
+        alert_url=args.alert_url,
+        render=not args.no_render,
+        motion_gate=not args.no_gate,
+        confirm_frames=args.confirm_frames,
+        confirm_window=args.confirm_window,
+        record_stream=args.record_stream,
+        clips_dir=args.clips_dir,
+        pre_event=args.pre_event,
+        post_event=args.post_event
+    )
     detector.run()
\ No newline at end of file
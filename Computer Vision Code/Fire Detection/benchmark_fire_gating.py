@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from fire_gating import MotionGate, TemporalConfirmation
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import add_backend_arguments, load_model
+
+FRAME_SIZE = (1020, 500)
+
+
+def fire_in(results, fire_classes):
+    boxes = results[0].boxes
+    if boxes is None or not len(boxes):
+        return False, False
+    class_ids = set(boxes.cls.cpu().numpy().astype(int).tolist())
+    return bool(class_ids & fire_classes), bool(class_ids)
+
+
+def onset_latencies(edges, onsets):
+    """Frames from the latest fire onset to each confirmation"""
+    latencies = []
+    for edge in edges:
+        previous = [onset for onset in onsets if onset <= edge]
+        if previous:
+            latencies.append(edge - previous[-1])
+    return latencies
+
+
+def summarize(latencies, fps):
+    if not latencies:
+        return {'episodes': 0, 'mean_latency_frames': None, 'max_latency_frames': None, 'mean_latency_ms': None}
+    return {
+        'episodes': len(latencies),
+        'mean_latency_frames': round(float(np.mean(latencies)), 2),
+        'max_latency_frames': int(max(latencies)),
+        'mean_latency_ms': round(float(np.mean(latencies)) / fps * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Model invocation rate and detection latency of the motion gate and N-of-M confirmation",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--input', type=str, required=True,
+                        help='Recorded camera video')
+    parser.add_argument('--model', type=str, default=r"Models\best.pt",
+                        help='Fire/smoke segmentation weights')
+    parser.add_argument('--frames', type=int, default=0,
+                        help='Stop after this many frames, 0 for the whole video')
+    parser.add_argument('--confirm-frames', type=int, default=3,
+                        help='N of the N-of-M confirmation')
+    parser.add_argument('--confirm-window', type=int, default=5,
+                        help='M of the N-of-M confirmation')
+    parser.add_argument('--output', type=str, default='fire_gating_benchmark.json',
+                        help='Where to write the report')
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    model = load_model(args.model, args.backend, int8=args.int8, calibration_data=args.calibration_data)
+    fire_classes = {class_id for class_id, name in model.names.items() if 'fire' in name.lower()}
+    cap = cv2.VideoCapture(args.input)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video file: {args.input}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    # The model runs on every frame (the ungated reference); the gated pipeline
+    # only gets the result of the frames its gate lets through
+    gate = MotionGate()
+    ungated = TemporalConfirmation(args.confirm_frames, args.confirm_window, fps)
+    gated = TemporalConfirmation(args.confirm_frames, args.confirm_window, fps)
+    onsets, ungated_edges, gated_edges = [], [], []
+    last_fire = -args.confirm_window - 1
+    missed_positive_frames = positive_frames = 0
+    inference_seconds = 0.0
+
+    index = 0
+    while not args.frames or index < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame = cv2.resize(frame, FRAME_SIZE)
+        start = time.perf_counter()
+        results = model.predict(frame, verbose=False)
+        inference_seconds += time.perf_counter() - start
+        fire, anything = fire_in(results, fire_classes)
+
+        if fire:
+            positive_frames += 1
+            if index - last_fire > args.confirm_window:
+                onsets.append(index)
+            last_fire = index
+
+        run, _ = gate.check(frame)
+        if run:
+            gate.observe(anything)
+        elif fire:
+            missed_positive_frames += 1
+        gated_fire = fire and run
+
+        was_confirmed = ungated.confirmed
+        if ungated.update(fire) and not was_confirmed:
+            ungated_edges.append(index)
+        was_confirmed = gated.confirmed
+        if gated.update(gated_fire) and not was_confirmed:
+            gated_edges.append(index)
+        index += 1
+    cap.release()
+
+    report = {
+        'input': args.input,
+        'frames': index,
+        'model_ms_per_frame': round(inference_seconds / index * 1000, 2) if index else None,
+        'gate': gate.report(),
+        'fire_frames': positive_frames,
+        'fire_frames_skipped_by_gate': missed_positive_frames,
+        'fire_onsets': len(onsets),
+        'single_frame_alert_triggers': ungated.raw_triggers,
+        'latency_from_onset': {
+            'ungated': summarize(onset_latencies(ungated_edges, onsets), fps),
+            'gated': summarize(onset_latencies(gated_edges, onsets), fps),
+        },
+        'confirmation_rule': ungated.report()['rule'],
+    }
+
+    print(f"🎞️ {index} frames, model invoked on {report['gate']['model_invocations']} "
+          f"({report['gate']['invocation_rate']:.1%}), gate {report['gate']['gate_ms_per_frame']} ms/frame")
+    print(f"🔥 {len(onsets)} fire onset(s), {ungated.raw_triggers} single-frame alert trigger(s), "
+          f"{len(ungated_edges)} confirmed ungated, {len(gated_edges)} confirmed gated")
+    for name, latency in report['latency_from_onset'].items():
+        print(f"   {name:<8} mean latency {latency['mean_latency_frames']} frames "
+              f"({latency['mean_latency_ms']} ms), max {latency['max_latency_frames']}")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"📄 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
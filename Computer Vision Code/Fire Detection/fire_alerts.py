@@ -0,0 +1,98 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import AlertCooldown, PhotoAlertDispatcher, RetryableAlertError
+
+
+class FireAlertDispatcher(PhotoAlertDispatcher):
+    """Fire photo alerts, see vision_common.PhotoAlertDispatcher"""
+
+    LABEL = 'fire'
+    CAPTION = '🔥 FIRE DETECTED!'
+
+
+class AlertStubServer:
+    """
+    Local stand-in for the Telegram sendPhoto endpoint.
+
+    Records every upload it receives. The first fail_first requests are
+    answered with fail_status, which exercises retries and the spool.
+
+    Args:
+        port (int): Port to listen on, 0 picks a free one.
+        fail_first (int): Number of initial requests to fail.
+        fail_status (int): Status code of the failed requests.
+    """
+
+    def __init__(self, port=0, host='127.0.0.1', fail_first=0, fail_status=503):
+        self.received = []
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests_seen = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with stub.lock:
+                    stub.requests_seen += 1
+                    failing = stub.requests_seen <= stub.fail_first
+                    if not failing:
+                        stub.received.append({
+                            'path': self.path,
+                            'content_type': self.headers.get('Content-Type'),
+                            'bytes': len(body),
+                            'has_photo': b'name="photo"' in body and b'\xff\xd8' in body,
+                        })
+                status = stub.fail_status if failing else 200
+                payload = b'{"ok": false}' if failing else b'{"ok": true}'
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/sendPhoto"
+        self.thread = threading.Thread(target=self.server.serve_forever, name='alert-stub', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Telegram sendPhoto endpoint")
+    parser.add_argument('--port', type=int, default=8081,
+                        help='Port to listen on')
+    parser.add_argument('--fail-first', type=int, default=0,
+                        help='Answer the first N uploads with --fail-status')
+    parser.add_argument('--fail-status', type=int, default=503,
+                        help='Status code of the failed uploads')
+    args = parser.parse_args()
+
+    stub = AlertStubServer(args.port, fail_first=args.fail_first, fail_status=args.fail_status)
+    print(f"🧪 Alert stub listening at {stub.url} (run the detector with --alert-url {stub.url})")
+    try:
+        seen = 0
+        while True:
+            time.sleep(0.5)
+            with stub.lock:
+                new = stub.received[seen:]
+            for upload in new:
+                print(f"📨 {upload['bytes']} bytes, photo={upload['has_photo']}")
+            seen += len(new)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.close()
@@ -0,0 +1,394 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import cv2
+from dotenv import load_dotenv
+
+from fire_alerts import AlertCooldown, FireAlertDispatcher
+from fire_gating import MotionGate, TemporalConfirmation
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import add_backend_arguments, load_model
+
+DEFAULT_MODEL_PATH = r"Models\best.pt"
+FRAME_SIZE = (1020, 500)
+STYLES = {
+    'fire': ((0, 0, 255), "FIRE"),
+    'smoke': ((255, 0, 0), "SMOKE"),
+}
+
+
+class Camera:
+    """
+    Per-camera state of the fire service: capture, motion gate, alert
+    confirmation and cooldown, and the recent fire/smoke score used to
+    prioritize it.
+
+    A reader thread per camera decodes and resizes frames, so one slow or
+    stalled stream does not hold up the others. Live streams keep only the
+    latest frame, older ones are dropped. Files are handed over frame by
+    frame so a recording replays completely.
+    """
+
+    def __init__(self, index, source, name=None, priority=1.0, cooldown=10.0,
+                 confirm_frames=3, confirm_window=5, reconnect_delay=5.0):
+        self.index = index
+        self.source = int(source) if isinstance(source, str) and source.isdigit() else source
+        self.name = name or f"camera_{index}"
+        self.priority = priority
+        self.reconnect_delay = reconnect_delay
+        # Files end, cameras and network streams are reopened when they drop
+        self.is_file = isinstance(self.source, str) and os.path.isfile(self.source)
+        if isinstance(self.source, str) and not self._is_stream(self.source) and not os.path.exists(self.source):
+            # A mistyped path would otherwise be retried forever as a dead stream
+            raise ValueError(f"{self.name}: video file not found: {self.source}")
+
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            print(f"⚠️ {self.name}: cannot open {self.source}")
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.gate = MotionGate()
+        self.confirmation = TemporalConfirmation(confirm_frames, confirm_window, fps)
+        self.cooldown = AlertCooldown(cooldown)
+
+        self.score = 0.0          # smoothed max fire/smoke confidence
+        self.waiting = 0          # consecutive frames the gate wanted inference but the batch was full
+        self.frames_read = 0
+        self.frames_dropped = 0   # live frames replaced by a newer one before the service took them
+        self.invocations = 0
+        self.deferred = 0
+        self.alerts = 0
+
+        self.latest = None
+        self.ended = False
+        self.stopping = threading.Event()
+        self.ready = threading.Condition()
+        self.reader = threading.Thread(target=self._run, name=f'{self.name}-reader', daemon=True)
+        self.reader.start()
+
+    @staticmethod
+    def _is_stream(source):
+        """True for URLs (rtsp://, http://, ...) and GStreamer pipelines"""
+        return '://' in source or '!' in source
+
+    def _run(self):
+        """Reader thread: keep the newest resized frame in self.latest"""
+        try:
+            while not self.stopping.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    if self.is_file:
+                        break
+                    print(f"⚠️ {self.name}: stream lost, retrying in {self.reconnect_delay}s")
+                    if self.stopping.wait(self.reconnect_delay):
+                        break
+                    self.cap.release()
+                    self.cap = cv2.VideoCapture(self.source)
+                    continue
+                frame = cv2.resize(frame, FRAME_SIZE)
+                with self.ready:
+                    if self.is_file:
+                        while self.latest is not None and not self.stopping.is_set():
+                            self.ready.wait()
+                    elif self.latest is not None:
+                        self.frames_dropped += 1
+                    self.latest = frame
+        finally:
+            self.cap.release()
+            with self.ready:
+                self.ended = True
+
+    def read(self):
+        """Latest frame resized for the model, None if no new one arrived since the last call"""
+        with self.ready:
+            frame, self.latest = self.latest, None
+            if frame is not None:
+                self.frames_read += 1
+                self.ready.notify()
+            return frame
+
+    @property
+    def finished(self):
+        """The source ended and its last frame was taken"""
+        return self.ended and self.latest is None
+
+    def close(self, timeout=2.0):
+        """Stop the reader thread, which releases the capture"""
+        self.stopping.set()
+        with self.ready:
+            self.ready.notify()
+        self.reader.join(timeout)
+
+    def summary(self):
+        return {
+            'name': self.name,
+            'source': self.source,
+            'frames_read': self.frames_read,
+            'frames_dropped': self.frames_dropped,
+            'model_invocations': self.invocations,
+            'invocation_rate': round(self.invocations / self.frames_read, 4) if self.frames_read else None,
+            'deferred': self.deferred,
+            'alerts': self.alerts,
+            'gate': self.gate.report(),
+            'confirmation': self.confirmation.report(),
+        }
+
+
+class FireMonitoringService:
+    """
+    Fire and smoke monitoring of many cameras with one shared model.
+
+    Every tick takes the frame each camera's reader has ready. Each camera's motion gate
+    decides whether its frame needs the model. At most batch_size of those
+    frames go through one batched forward pass. With the 'priority' schedule
+    cameras with a high recent fire/smoke score go first. With 'round-robin'
+    they take turns. Either way a camera that was deferred gains priority on
+    the next tick. Confirmation, cooldown and alert state are kept per
+    camera, while the model and the alert dispatcher are shared.
+
+    Args:
+        cameras (list): Camera objects.
+        model_path (str): Fire/smoke segmentation weights shared by all cameras.
+        batch_size (int): Max frames per forward pass, i.e. per tick.
+        schedule (str): 'priority' or 'round-robin'.
+        alerts (FireAlertDispatcher): Shared alert dispatcher, None to disable alerts.
+        backend (str): Inference backend, see vision_common.load_model.
+        int8 (bool): Use an INT8 export on the ONNX/OpenVINO backends.
+    """
+
+    SCHEDULES = ('priority', 'round-robin')
+
+    def __init__(self, cameras, model_path=DEFAULT_MODEL_PATH, batch_size=4, schedule='priority',
+                 alerts=None, backend='auto', int8=False, calibration_data=None):
+        if not cameras:
+            raise ValueError("At least one camera is required")
+        if schedule not in self.SCHEDULES:
+            raise ValueError(f"Unknown schedule '{schedule}', expected one of {self.SCHEDULES}")
+        self.cameras = cameras
+        # Stagger the gates' periodic refresh so static cameras do not all need the model on one tick
+        for position, camera in enumerate(cameras):
+            camera.gate.frames_since_inference = position * camera.gate.max_interval // len(cameras)
+        self.batch_size = max(1, batch_size)
+        self.schedule = schedule
+        self.alerts = alerts
+
+        # Exports need a dynamic batch dimension for batched predict
+        self.model = load_model(model_path, backend, int8=int8, dynamic=self.batch_size > 1,
+                                calibration_data=calibration_data)
+        self.class_kinds = {
+            class_id: 'fire' if 'fire' in name.lower() else 'smoke' if 'smoke' in name.lower() else None
+            for class_id, name in self.model.names.items()
+        }
+
+        self.ticks = 0
+        self.frames_read = 0
+        self.frames_inferred = 0
+        self.inference_seconds = 0.0
+        self.started = time.time()
+
+    @classmethod
+    def from_config(cls, path, **kwargs):
+        """
+        Build the service from a JSON config:
+
+            {"model": "Models/best.pt",
+             "cameras": [{"name": "dock", "source": "rtsp://...", "priority": 2.0,
+                          "cooldown": 10, "confirm_frames": 3, "confirm_window": 5}]}
+
+        Only "cameras" and each camera's "source" are required. Keyword
+        arguments override the config's service-wide settings.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        cameras = [Camera(index, **camera) for index, camera in enumerate(config['cameras'])]
+        settings = {key: config[key] for key in ('batch_size', 'schedule') if key in config}
+        if 'model' in config:
+            settings['model_path'] = config['model']
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+        return cls(cameras, **settings)
+
+    def _urgency(self, camera, reason):
+        """Sort key, most urgent first"""
+        if self.schedule == 'round-robin':
+            return (-camera.waiting, (camera.index - self.ticks) % len(self.cameras))
+        urgent = reason in ('active', 'flicker')
+        return (-urgent, -(camera.priority * (1 + 10 * camera.score) + 0.5 * camera.waiting), camera.index)
+
+    def select(self, candidates):
+        """Split gated (camera, frame, reason) candidates into this tick's batch and the deferred rest"""
+        if len(candidates) <= self.batch_size:
+            return candidates, []
+        ranked = sorted(candidates, key=lambda c: self._urgency(c[0], c[2]))
+        return ranked[:self.batch_size], ranked[self.batch_size:]
+
+    def infer(self, frames):
+        start = time.perf_counter()
+        results = self.model.predict(frames, verbose=False)
+        self.inference_seconds += time.perf_counter() - start
+        self.frames_inferred += len(frames)
+        return results
+
+    def detect(self, result):
+        """
+        Returns:
+            tuple: (fire_detected, fire/smoke score, [(box, kind)] for the alert photo)
+        """
+        boxes = result.boxes
+        if boxes is None or not len(boxes):
+            return False, 0.0, []
+        class_ids = boxes.cls.cpu().numpy().astype(int)
+        confidences = boxes.conf.cpu().numpy()
+        xyxy = boxes.xyxy.cpu().numpy()
+        fire, score, found = False, 0.0, []
+        for box, class_id, confidence in zip(xyxy, class_ids, confidences):
+            kind = self.class_kinds.get(class_id)
+            if kind is None:
+                continue
+            fire = fire or kind == 'fire'
+            score = max(score, float(confidence))
+            found.append((box, kind))
+        return fire, score, found
+
+    def send_alert(self, camera, frame, found):
+        """Annotate a copy of the frame and queue it, subject to the camera's cooldown"""
+        now = time.time()
+        # Checked first so a confirmed fire does not copy and draw every frame of the cooldown
+        if self.alerts is None or camera.cooldown.running(now):
+            return
+        photo = frame.copy()
+        for box, kind in found:
+            color, label = STYLES[kind]
+            x1, y1, x2, y2 = map(int, box)
+            cv2.rectangle(photo, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(photo, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+        if self.alerts.alert(photo, caption=f"🔥 FIRE DETECTED! ({camera.name})", now=now,
+                             cooldown=camera.cooldown):
+            camera.alerts += 1
+            print(f"🔥 {camera.name}: fire alert raised")
+
+    def tick(self):
+        """Gate, batch and evaluate the frames the cameras have ready, returns how many were taken"""
+        candidates, skipped = [], []
+        for camera in self.cameras:
+            frame = camera.read()
+            if frame is None:
+                continue
+            reason = camera.gate.assess(frame)
+            if reason is None:
+                skipped.append(camera)
+            else:
+                candidates.append((camera, frame, reason))
+        read = len(candidates) + len(skipped)
+        if not read:
+            return 0
+
+        batch, deferred = self.select(candidates)
+        results = self.infer([frame for _, frame, _ in batch]) if batch else []
+        for (camera, frame, reason), result in zip(batch, results):
+            camera.gate.record(reason)
+            camera.waiting = 0
+            camera.invocations += 1
+            fire, score, found = self.detect(result)
+            camera.gate.observe(bool(found))
+            camera.score = 0.6 * camera.score + 0.4 * score
+            if camera.confirmation.update(fire):
+                self.send_alert(camera, frame, found)
+
+        for camera, _, _ in deferred:
+            # Not evaluated is not a negative, the confirmation window and score wait for the next run
+            camera.gate.record(None)
+            camera.waiting += 1
+            camera.deferred += 1
+        for camera in skipped:
+            camera.gate.record(None)
+            camera.score *= 0.98
+            camera.confirmation.update(False)
+
+        self.ticks += 1
+        self.frames_read += read
+        return read
+
+    @property
+    def finished(self):
+        return all(camera.finished for camera in self.cameras)
+
+    def run(self, max_ticks=None, idle_sleep=0.01):
+        """Monitor until every file source has ended (network cameras run until interrupted)"""
+        print(f"🔥 Monitoring {len(self.cameras)} cameras, batch size {self.batch_size}, "
+              f"{self.schedule} schedule")
+        try:
+            while not self.finished and (max_ticks is None or self.ticks < max_ticks):
+                if not self.tick():
+                    time.sleep(idle_sleep)
+        except KeyboardInterrupt:
+            print("⏹️ Stopping")
+        finally:
+            for camera in self.cameras:
+                camera.close()
+            if self.alerts is not None:
+                self.alerts.close()
+        return self.report()
+
+    def report(self):
+        elapsed = time.time() - self.started
+        return {
+            'cameras': [camera.summary() for camera in self.cameras],
+            'statistics': {
+                'ticks': self.ticks,
+                'frames_read': self.frames_read,
+                'frames_inferred': self.frames_inferred,
+                'invocation_rate': round(self.frames_inferred / self.frames_read, 4) if self.frames_read else None,
+                'average_batch_size': round(self.frames_inferred / self.ticks, 2) if self.ticks else 0,
+                'processing_fps': round(self.frames_read / elapsed, 2) if elapsed else 0,
+                'inference_fps': round(self.frames_inferred / self.inference_seconds, 2)
+                                 if self.inference_seconds else 0,
+                'alerts': sum(camera.alerts for camera in self.cameras),
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Multi-camera fire & smoke monitoring with one shared model",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--config', type=str, required=True,
+                        help='JSON file listing the cameras (see FireMonitoringService.from_config)')
+    parser.add_argument('--model', type=str, default=None,
+                        help=f'Segmentation weights, overrides the config (default {DEFAULT_MODEL_PATH})')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Max frames per batched forward pass (default 4)')
+    parser.add_argument('--schedule', choices=FireMonitoringService.SCHEDULES, default=None,
+                        help='How cameras share the batch when more need inference (default priority)')
+    parser.add_argument('--alert-url', type=str, default=None,
+                        help='Send alerts to this sendPhoto URL instead of Telegram (e.g. fire_alerts.py stub)')
+    parser.add_argument('--report', type=str, default='fire_service_report.json',
+                        help='Where to write the per-camera report')
+    add_backend_arguments(parser)
+    args = parser.parse_args()
+
+    load_dotenv()
+    service = FireMonitoringService.from_config(
+        args.config,
+        model_path=args.model,
+        batch_size=args.batch_size,
+        schedule=args.schedule,
+        alerts=FireAlertDispatcher.from_env(args.alert_url),
+        backend=args.backend,
+        int8=args.int8,
+        calibration_data=args.calibration_data
+    )
+    report = service.run()
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(json.dumps(report['statistics'], indent=4))
+    print(f"📄 Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime
 from bson.decimal128 import Decimal128
 from decimal import Decimal, InvalidOperation
 import os
+import sys
+import threading
 from dotenv import load_dotenv
 import certifi
 import argparse
@@ -11,27 +14,81 @@ import json
 from tracking_and_identifying import ObjectTracker
 from red_text_detector_with_Paddle_OCR import RedTextDetector
 from OcrCorrecting import get_correct_words
+from customer_sessions import SessionManager
+from api_client import get_api_client
+from product_catalog import DEFAULT_CATALOG_PATH, ProductCatalog
+from model_pool import DEFAULT_DAEMON_PORT, ModelDaemon, ModelPool, submit_job
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import (add_backend_arguments, add_display_arguments, add_metrics_arguments,
+                           configure_metrics, metrics)
 
 
 # Load environment variables
 load_dotenv()
 
+# Per-video options a daemon job may override
+JOB_OPTIONS = {
+    'input', 'output', 'skip_frames', 'adaptive_skip', 'target_fps', 'max_skip', 'capture_interval', 'no_db', 'pipelined', 'decode_queue',
+    'sink_queue', 'catalog', 'hand_roi', 'frame_buffer_size', 'red_capture', 'save_frames',
+    'stream_sessions', 'checkout_timeout', 'no_render',
+}
+
 class MongoDBHandler:
     """Enhanced MongoDB handler with purchase processing capabilities"""
     
+    # One pooled client per process, shared by every handler instance
+    _shared_client = None
+    _client_lock = threading.Lock()
+    _last_health_check = 0.0
+    HEALTH_CHECK_INTERVAL = 60  # seconds between pings of the pooled client
+    
     def __init__(self):
-        self.client = None
         self.INITIAL_CREDIT = Decimal("500")
         
     def __enter__(self):
-        self.client = self._get_client()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.client:
-            self.client.close()
+        # The pooled client outlives the block, see close_client()
+        pass
+    
+    @property
+    def client(self):
+        return self.get_shared_client()
     
-    def _get_client(self):
+    @classmethod
+    def get_shared_client(cls):
+        """Return the process-wide client, connecting lazily and pinging at most once per interval"""
+        with cls._client_lock:
+            now = time.monotonic()
+            if cls._shared_client is not None and now - cls._last_health_check < cls.HEALTH_CHECK_INTERVAL:
+                return cls._shared_client
+            
+            if cls._shared_client is not None:
+                try:
+                    cls._shared_client.admin.command('ping')
+                    cls._last_health_check = now
+                    return cls._shared_client
+                except Exception as e:
+                    print(f"⚠️ MongoDB health check failed, reconnecting: {str(e)}")
+                    cls._shared_client.close()
+                    cls._shared_client = None
+            
+            cls._shared_client = cls._get_client()
+            cls._last_health_check = now
+            return cls._shared_client
+    
+    @classmethod
+    def close_client(cls):
+        """Close the pooled client (call once at shutdown)"""
+        with cls._client_lock:
+            if cls._shared_client is not None:
+                cls._shared_client.close()
+                cls._shared_client = None
+    
+    @staticmethod
+    def _get_client():
         """Secure MongoDB connection with robust timeout settings"""
         connection_string = os.getenv("MONGODB_URI")
         if not connection_string:
@@ -43,13 +100,18 @@ class MongoDBHandler:
                 tlsCAFile=certifi.where(),
                 serverSelectionTimeoutMS=10000,
                 connectTimeoutMS=30000,
-                socketTimeoutMS=30000
+                socketTimeoutMS=30000,
+                maxPoolSize=20,
+                retryWrites=True
             )
             client.admin.command('ping')
             return client
         except Exception as e:
             raise ConnectionError(f"MongoDB connection failed: {str(e)}")
     
+    def _collection(self):
+        return self.client["customerspurchases"]["customer_purchases"]
+    
     def _convert_to_decimal128(self, value):
         """Type-safe decimal conversion"""
         try:
@@ -59,65 +121,125 @@ class MongoDBHandler:
         except (InvalidOperation, TypeError, ValueError) as e:
             raise ValueError(f"Invalid decimal value: {value} - {str(e)}")
     
+    def build_document(self, customer_data, metadata):
+        """
+        Build the MongoDB document for one customer, None if it exceeds the credit
+        """
+        # Process financial data with decimal precision
+        try:
+            total_price = Decimal(str(customer_data['financial_summary']['total_price']))
+            remaining_credit = self.INITIAL_CREDIT - total_price
+            
+            if remaining_credit < 0:
+                print(f"⚠️ Purchase exceeds available credit for customer {customer_data['customer_id']}")
+                return None
+            
+        except (KeyError, InvalidOperation) as e:
+            raise ValueError(f"Invalid financial data: {str(e)}")
+        
+        # Prepare MongoDB document (without metadata)
+        document = {
+            "customer_Id": customer_data['customer_id'],
+            "entry_date": datetime.now(),
+            "processing_date": metadata['processing_date'], 
+            "box": [],
+            "total_amount": self._convert_to_decimal128(total_price),
+            #"credit": self._convert_to_decimal128(remaining_credit)
+        }
+        
+        # Add all purchased items
+        for item_name, item_data in customer_data['purchased_items'].items():
+            document["box"].append({
+                "name": item_name,
+                "quantity": item_data['quantity'],
+                "unit_price": self._convert_to_decimal128(item_data['unit_price']),
+                "total_price": self._convert_to_decimal128(item_data['item_total'])
+            })
+        return document
+    
     def save_purchase_data(self, report_data):
         """
         Save complete purchase data from the analysis report
+        
+        The basket is stored in MongoDB and sent to the store API. The API
+        call does not depend on the insert: a database outage must not stop
+        customers from being charged. Reports with several customers go
+        through save_many (one insert_many).
+        
+        Returns:
+            bool: True if the purchase was stored in MongoDB.
         """
         try:
-            with self as db_handler:
-                db = db_handler.client["customerspurchases"]
-                collection = db["customer_purchases"]
-                
-                if not report_data.get('customers'):
-                    print("⚠️ No customer data to save")
-                    return False
-                
-                customer_data = report_data['customers'][0]
-                metadata = report_data['metadata']
-                
-                # Process financial data with decimal precision
-                try:
-                    total_price = Decimal(str(customer_data['financial_summary']['total_price']))
-                    remaining_credit = self.INITIAL_CREDIT - total_price
-                    
-                    if remaining_credit < 0:
-                        print("⚠️ Purchase exceeds available credit")
-                        return False
-                    
-                
-                except (KeyError, InvalidOperation) as e:
-                    raise ValueError(f"Invalid financial data: {str(e)}")
-                
-                # Prepare MongoDB document (without metadata)
-                document = {
-                    "customer_Id": customer_data['customer_id'],
-                    "entry_date": datetime.now(),
-                    "processing_date": metadata['processing_date'], 
-                    "box": [],
-                    "total_amount": self._convert_to_decimal128(total_price),
-                    #"credit": self._convert_to_decimal128(remaining_credit)
-                }
-                
-                # Add all purchased items
-                for item_name, item_data in customer_data['purchased_items'].items():
-                    document["box"].append({
-                        "name": item_name,
-                        "quantity": item_data['quantity'],
-                        "unit_price": self._convert_to_decimal128(item_data['unit_price']),
-                        "total_price": self._convert_to_decimal128(item_data['item_total'])
-                    })
-                
-                print(document)
-                ObjectTracker.send_customer_box_to_api(document)
-                # Insert document
-                #result = collection.insert_one(document)
-                
-                print(f"✅ Saved purchase for customer {customer_data['customer_id']}")
-                return True
+            if not report_data.get('customers'):
+                print("⚠️ No customer data to save")
+                return False
+            if len(report_data['customers']) > 1:
+                return self.save_many(report_data) > 0
+            
+            customer_data = report_data['customers'][0]
+            document = self.build_document(customer_data, report_data['metadata'])
+            if document is None:
+                return False
+            
+            ObjectTracker.send_customer_box_to_api(document)
+            
+            # Insert document through the pooled client
+            with metrics.time('db_save'):
+                self._collection().insert_one(document)
+            
+            print(f"✅ Saved purchase for customer {customer_data['customer_id']}")
+            return True
                 
         except Exception as e:
             print(f"❌ Failed to save purchase data: {str(e)}")
             return False
+    
+    def save_many(self, report_data):
+        """
+        Bulk-insert every customer's basket from a report with one insert_many call.
+        
+        Baskets MongoDB rejects individually (write errors) are not sent to
+        the API. If the database cannot be reached at all, every basket is
+        still sent, as in save_purchase_data.
+        
+        Returns:
+            int: Number of documents written.
+        """
+        documents = []
+        for customer_data in report_data.get('customers', []):
+            try:
+                document = self.build_document(customer_data, report_data['metadata'])
+            except ValueError as e:
+                print(f"❌ Skipping customer {customer_data.get('customer_id')}: {str(e)}")
+                continue
+            if document is not None:
+                documents.append(document)
+        
+        if not documents:
+            print("⚠️ No customer data to save")
+            return 0
+        
+        try:
+            # Unordered: one bad document does not stop the rest of the batch
+            with metrics.time('db_save'):
+                self._collection().insert_many(documents, ordered=False)
+            inserted = documents
+        except BulkWriteError as e:
+            # Every document without a write error was stored
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            inserted = [document for i, document in enumerate(documents) if i not in failed]
+            print(f"⚠️ Bulk insert partially failed: {len(failed)} error(s)")
+        except Exception as e:
+            print(f"❌ Failed to save purchase data: {str(e)}")
+            for document in documents:
+                ObjectTracker.send_customer_box_to_api(document)
+            return 0
+        
+        # Baskets with a write error were invalid, the rest go to the API
+        for document in inserted:
+            ObjectTracker.send_customer_box_to_api(document)
+        print(f"✅ Saved {len(inserted)} purchase(s) in bulk")
+        return len(inserted)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -130,40 +252,179 @@ def main():
                        help='Directory for output files')
     parser.add_argument('--skip-frames', type=int, default=3, 
                        help='Number of frames to skip during processing')
+    parser.add_argument('--adaptive-skip', action='store_true',
+                       help='Raise or lower the frame skip to keep up with --target-fps')
+    parser.add_argument('--target-fps', type=float, default=0,
+                       help='Source frames per second to keep up with in adaptive mode, 0 for the video fps')
+    parser.add_argument('--max-skip', type=int, default=10,
+                       help='Upper bound of the adaptive frame skip')
     parser.add_argument('--capture-interval', type=int, default=3, 
                        help='Interval in seconds between frame captures')
     parser.add_argument('--no-db', action='store_true',
                        help='Skip database saving if flag is present')
+    parser.add_argument('--pipelined', action='store_true',
+                       help='Run decode, inference and encode on separate threads')
+    parser.add_argument('--decode-queue', type=int, default=4,
+                       help='Frames buffered between decoder and inference (pipelined mode)')
+    parser.add_argument('--sink-queue', type=int, default=4,
+                       help='Frames buffered between inference and encoder (pipelined mode)')
+    parser.add_argument('--catalog', type=str, default=DEFAULT_CATALOG_PATH,
+                       help='Product catalog, SQLite (reloaded when it changes) or JSON (class IDs, names and prices)')
+    parser.add_argument('--hand-roi', action='store_true',
+                       help='Detect hands on padded person crops instead of the full frame')
+    parser.add_argument('--frame-buffer-size', type=int, default=20,
+                       help='Captured frames kept in memory for red-text detection, 0 skips purchase detection')
+    parser.add_argument('--red-capture', action='store_true',
+                       help='Check every processed frame for red regions and capture those frames')
+    parser.add_argument('--save-frames', action='store_true',
+                       help='Also write captured frames to analyze_frames/ (debug)')
+    parser.add_argument('--no-render', action='store_true',
+                       help='Only draw the red off-table product labels that OCR needs')
+    parser.add_argument('--stream-sessions', action='store_true',
+                       help='Report, save and bill each customer as soon as they check out')
+    parser.add_argument('--checkout-timeout', type=float, default=5.0,
+                       help='Seconds a customer may be out of view before checkout (stream mode)')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep models loaded and serve video jobs on a local socket')
+    parser.add_argument('--submit', action='store_true',
+                       help='Send --input to a running daemon instead of loading models here')
+    parser.add_argument('--port', type=int, default=DEFAULT_DAEMON_PORT,
+                       help='Localhost port of the model daemon')
+    add_backend_arguments(parser)
+    add_display_arguments(parser)
+    add_metrics_arguments(parser)
     args = parser.parse_args()
 
+    if args.submit:
+        # Only per-video options travel with the job, the daemon keeps its own display settings
+        job = {key: value for key, value in vars(args).items() if key in JOB_OPTIONS}
+        job['input'] = os.path.abspath(args.input)
+        job['output'] = os.path.abspath(args.output)
+        print(json.dumps(submit_job(job, port=args.port), indent=4))
+        return
+
     try:
         start_time = time.time()
         print("\n🚀 Starting Smart Store Analytics Pipeline...")
         
-        # Validate input
-        if not os.path.exists(args.input):
-            raise FileNotFoundError(f"Input file not found: {args.input}")
+        configure_metrics(args)
+        
+        # YOLO, hands and OCR load concurrently while the catalog and video are opened
+        pool = ModelPool(backend=args.backend, int8=args.int8, calibration_data=args.calibration_data)
+        
+        if args.daemon:
+            def run_daemon_job(job):
+                job_args = argparse.Namespace(**vars(args))
+                for key, value in job.items():
+                    if key in JOB_OPTIONS:
+                        setattr(job_args, key, value)
+                report = run_job(job_args, pool, time.time())
+                # Deliver this job's API events but keep the client for the next job
+                get_api_client().flush()
+                return {
+                    'report': os.path.join(job_args.output, 'analysis_report.json'),
+                    'statistics': report['statistics'],
+                    'startup': report['startup'],
+                }
+            
+            print(f"⏳ Models ready in {pool.wait():.2f}s")
+            ModelDaemon(run_daemon_job, port=args.port).serve()
+        else:
+            run_job(args, pool, start_time)
 
-        # Initialize components
-        tracker = ObjectTracker()
-        tracker.video_path = args.input
-        tracker.output_path = os.path.join(args.output, f"Tracking_Output_{time.strftime('%Y%m%d_%H%M%S')}.mp4")
-        tracker.frame_skip = args.skip_frames
-        tracker.capture_interval = args.capture_interval
+        # Deliver queued API events (undelivered ones stay in the outbox)
+        get_api_client().close()
+        MongoDBHandler.close_client()
+        metrics.close()
 
-        # Process video
-        print("\n🎥 Processing video...")
+        print(f"\n✅ Pipeline completed in {time.time() - start_time:.2f} seconds")
+
+    except Exception as e:
+        print(f"\n❌ Pipeline failed: {str(e)}")
+        raise
+
+def run_job(args, pool, start_time):
+    """Process one video with the pooled models, returns its report"""
+    # Validate input
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"Input file not found: {args.input}")
+    
+    warm = pool.jobs > 0
+    pool.reset()
+
+    # Initialize components
+    tracker = ObjectTracker(
+        headless=args.headless,
+        preview_path=args.preview,
+        preview_interval=args.preview_interval,
+        video_path=args.input,
+        output_path=os.path.join(args.output, f"Tracking_Output_{time.strftime('%Y%m%d_%H%M%S')}.mp4"),
+        model=pool.yolo,
+        hands=pool.hands,
+        catalog=ProductCatalog.load(args.catalog),
+        hand_roi_mode=args.hand_roi,
+        frame_buffer_size=args.frame_buffer_size,
+        save_frames=args.save_frames,
+        red_capture=args.red_capture,
+        render=not args.no_render
+    )
+    tracker.frame_skip = args.skip_frames
+    if args.adaptive_skip:
+        tracker.enable_adaptive_skip(args.target_fps, args.max_skip)
+    tracker.capture_interval = args.capture_interval
+    
+    # Streaming mode: every completed customer session is persisted on its own
+    sessions = None
+    if args.stream_sessions:
+        persister = SessionPersister(tracker, args.output, save_to_db=not args.no_db, detector=pool.detector)
+        sessions = SessionManager(persister, checkout_timeout=args.checkout_timeout)
+        tracker.sessions = sessions
+
+    # Process video
+    print("\n🎥 Processing video...")
+    if args.pipelined:
+        tracker.run_pipelined(
+            decode_queue_size=args.decode_queue,
+            sink_queue_size=args.sink_queue
+        )
+    else:
         tracker.run()
-        
+    
+    if sessions is not None:
+        # Sessions were already billed as they completed, close the ones still open
+        sessions.close()
+        report = generate_report(tracker, {}, start_time)
+        report['customers'] = persister.customers
+        report['session_latency'] = sessions.latency_summary()
+    elif tracker.frame_buffer is None:
+        print("\n⚠️ --frame-buffer-size 0: no frames captured, skipping purchase detection")
+        report = generate_report(tracker, {}, start_time)
+    else:
         # Detect purchases
         print("\n🔍 Analyzing purchases...")
-        purchased_items = get_correct_words()
+        purchased_items = get_correct_words(
+            detector=pool.detector,
+            frames=tracker.frame_buffer.items(),
+            catalog=tracker.catalog
+        )
         
         # Generate report
         report = generate_report(tracker, purchased_items, start_time)
-        save_results(report, args.output)
 
-        # MongoDB integration
+    report['startup'] = {
+        'warm_models': warm,
+        'model_load_seconds': pool.summary()['load_seconds'],
+        'yolo_backend': pool.summary()['yolo_backend'],
+        'startup_to_first_frame_seconds': (
+            round(tracker.first_frame_time - start_time, 3) if tracker.first_frame_time else None
+        ),
+    }
+    print(f"⏱️ Startup to first frame: {report['startup']['startup_to_first_frame_seconds']}s"
+          f" ({'warm' if warm else 'cold'} models)")
+    save_results(report, args.output)
+
+    # MongoDB integration (streaming mode already saved each customer)
+    if sessions is None:
         if not args.no_db and report.get('customers'):
             print("\n💾 Connecting to MongoDB...")
             db_handler = MongoDBHandler()
@@ -171,12 +432,7 @@ def main():
                 print("⚠️ Proceeding without database save")
         else:
             print("\nℹ️ Skipping database save as requested")
-
-        print(f"\n✅ Pipeline completed in {time.time() - start_time:.2f} seconds")
-
-    except Exception as e:
-        print(f"\n❌ Pipeline failed: {str(e)}")
-        raise
+    return report
 
 def generate_report(tracker, purchased_items, start_time):
     """Generate comprehensive analytics report"""
@@ -194,37 +450,108 @@ def generate_report(tracker, purchased_items, start_time):
             'total_frames_processed': tracker.frame_count,
             'processing_fps': round(tracker.frame_count/processing_time, 2),
         },
+        'frame_skip': {
+            'skip': tracker.frame_skip,
+            'frames_grabbed_only': tracker.frames_grabbed_only,
+            'adaptive': tracker.skip_controller.report() if tracker.skip_controller else None,
+        },
+        'pipeline_stages': tracker.stage_stats,
         'customers': [],
     }
+    if metrics.enabled:
+        report['metrics'] = metrics.snapshot()
     
     if tracker.entry_counter > 0 and purchased_items:
-        customer_data = {
-            'customer_id': tracker.entry_counter,  # Using entry count as ID
-            'entry_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time)),
-            'purchased_items': {},
-            'financial_summary': {
-                'total_price': 0,  
-                'item_count': 0
-            }
+        # Using entry count as ID
+        report['customers'].append(build_customer_data(tracker.entry_counter, start_time, purchased_items))
+    
+    return report
+
+def build_customer_data(customer_id, entry_time, purchased_items):
+    """Build one customer's entry of a report from the purchased {item: price} dict"""
+    customer_data = {
+        'customer_id': customer_id,
+        'entry_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry_time)),
+        'purchased_items': {},
+        'financial_summary': {
+            'total_price': 0,  
+            'item_count': 0
         }
+    }
+    
+    # Calculate item totals
+    for item, price in purchased_items.items():
+        quantity = 1  # Default quantity
+        item_total = quantity * price
         
-        # Calculate item totals
-        for item, price in purchased_items.items():
-            quantity = 1  # Default quantity
-            item_total = quantity * price
-            
-            customer_data['purchased_items'][item] = {
-                'quantity': quantity,
-                'unit_price': price,
-                'item_total': item_total
-            }
-            customer_data['financial_summary']['total_price'] += item_total 
-            customer_data['financial_summary']['item_count'] += quantity
-        
-        report['customers'].append(customer_data)
+        customer_data['purchased_items'][item] = {
+            'quantity': quantity,
+            'unit_price': price,
+            'item_total': item_total
+        }
+        customer_data['financial_summary']['total_price'] += item_total 
+        customer_data['financial_summary']['item_count'] += quantity
     
+    return customer_data
+
+def generate_session_report(tracker, session, purchased_items):
+    """Generate the report of a single completed customer session"""
+    report = {
+        'metadata': {
+            'processing_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'input_video': tracker.video_path,
+            'track_id': session.track_id,
+            'entry_video_time': round(session.entry_time, 2),
+            'checkout_reason': session.checkout_reason,
+            'frames_captured': len(session.frame_files),
+        },
+        'customers': [],
+    }
+    if purchased_items:
+        report['customers'].append(
+            build_customer_data(session.customer_id, session.entry_wall_time, purchased_items)
+        )
     return report
 
+class SessionPersister:
+    """
+    Completed-session handler for SessionManager: OCR, report, DB and API for one customer.
+    
+    Runs on the session worker thread; each report is appended as one JSON line
+    to customer_reports.jsonl as soon as the customer checks out.
+    """
+    
+    def __init__(self, tracker, output_dir, save_to_db=True, detector=None):
+        self.tracker = tracker
+        self.detector = detector  # without a pooled one, PaddleOCR is loaded on the first completed session
+        self.db_handler = MongoDBHandler() if save_to_db else None
+        self.customers = []
+        os.makedirs(output_dir, exist_ok=True)
+        self.reports_path = os.path.join(output_dir, 'customer_reports.jsonl')
+    
+    def __call__(self, session):
+        purchased_items = {}
+        # Copies: the tracker keeps pushing into the ring buffer while this thread reads
+        frames = []
+        if self.tracker.frame_buffer is not None:
+            frames = self.tracker.frame_buffer.items(session.frame_files, copy=True)
+        if frames:
+            if self.detector is None:
+                self.detector = RedTextDetector(frames_folder=self.tracker.frames_dir)
+            purchased_items = get_correct_words(detector=self.detector, frames=frames, catalog=self.tracker.catalog)
+        
+        report = generate_session_report(self.tracker, session, purchased_items)
+        with open(self.reports_path, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+        
+        if self.db_handler is not None and report['customers']:
+            if not self.db_handler.save_purchase_data(report):
+                print(f"⚠️ Customer {session.customer_id} not saved to database")
+        
+        session.persisted_wall_time = time.time()
+        self.customers.extend(report['customers'])
+        print(f"📄 Customer {session.customer_id} persisted {session.latency:.2f}s after checkout")
+
 def save_results(data, output_dir):
     """Save analytics report to JSON"""
     os.makedirs(output_dir, exist_ok=True)
@@ -1,53 +1,73 @@
 from red_text_detector_with_Paddle_OCR import RedTextDetector  # Import the original class
-from fuzzywuzzy import fuzz  # For fuzzy matching
+from product_matcher import ProductMatcher  # Indexed fuzzy matching
+from product_catalog import ProductCatalog  # Product names and prices
 
-# Define the list of valid words
-VALID_WORDS = ["Spoon", "Bag", "Bottle of Water", "Cup", "Tennis Racket"]
+_catalog = None
 
-def find_matching_valid_word(word, valid_words=VALID_WORDS, threshold=80):
+def get_catalog():
+    """Catalog shared by calls that do not pass their own, loaded on first use"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ProductCatalog.load()
+    return _catalog
+
+def find_matching_valid_word(word, valid_words=None, threshold=80, catalog=None):
     """
     Find the valid word that matches the extracted word using fuzzy matching.
     
     Args:
         word (str): The extracted word.
-        valid_words (list): List of valid words to compare against.
+        valid_words (list): List of valid words to compare against, defaults to the catalog names.
         threshold (int): Minimum similarity score to consider a match (default: 80).
+        catalog (ProductCatalog): Catalog whose names are used when valid_words is not given.
     
     Returns:
-        str or None: The matching valid word if a match is found, otherwise None.
+        str or None: The best matching valid word if a match is found, otherwise None.
     """
-    word_lower = word.lower()
-    for valid_word in valid_words:
-        valid_word_lower = valid_word.lower()
-        # Use partial_ratio for better substring matching
-        similarity_score = fuzz.partial_ratio(word_lower, valid_word_lower)
-        if similarity_score >= threshold:
-            return valid_word  # Return the valid word (not lowercase)
-    return None  # No match found
+    global _matcher
+    if valid_words is None:
+        if catalog is None:
+            catalog = get_catalog()
+        # The version changes on every reload, so a new catalog gets a new matcher
+        source, key, valid_words = catalog, (id(catalog), catalog.version, threshold), catalog.names
+    else:
+        # Same list object, same matcher: a list edited in place needs a new list
+        source, key = valid_words, (id(valid_words), None, threshold)
+    if _matcher is None or _matcher[0] != key:
+        # Built once per catalog, lookups then only score indexed candidates
+        _matcher = (key, source, ProductMatcher(valid_words, threshold=threshold))
+    return _matcher[2].match(word)
 
-# Update the VALID_WORDS dictionary to include prices
-VALID_WORDS = {
-    "Spoon": 2,
-    "Bag": 50,
-    "Bottle of Water": 0.9,
-    "Cup": 10,
-    "Tennis Racket": 100
-}
+# (key, catalog or word list, ProductMatcher) of the last lookup. The source is
+# kept so its id() cannot be reused, only the current matcher is kept
+_matcher = None
 
-def get_correct_words():
+def get_correct_words(frame_files=None, detector=None, frames=None, catalog=None):
     """
     Find the first frame with red text, validate the extracted words,
     and return a dictionary of valid words with their prices.
     
+    Args:
+        frame_files (list): Frame paths to search, defaults to all of analyze_frames.
+        detector (RedTextDetector): Reuse an initialized detector instead of loading OCR again.
+        frames (list): In-memory (name, image) pairs, oldest first, instead of files.
+        catalog (ProductCatalog): Names and prices, defaults to the shared catalog.
+    
     Returns:
         dict: Dictionary of valid words and their prices {item: price}.
     """
     try:
+        if catalog is None:
+            catalog = get_catalog()
+        # Pick up price changes made since the last call
+        catalog.maybe_reload()
+        
         # Initialize the RedTextDetector
-        detector = RedTextDetector(frames_folder="analyze_frames")
+        if detector is None:
+            detector = RedTextDetector(frames_folder="analyze_frames")
         
         # Find the first frame with red text and extract the list of words
-        frame_file, extracted_words = detector.find_first_frame_with_red_text()
+        frame_file, extracted_words = detector.find_first_frame_with_red_text(frame_files, frames)
         
         if not extracted_words:
             print("No red text detected in any frame.")
@@ -58,9 +78,9 @@ def get_correct_words():
         # Validate each word and collect the corresponding valid words with prices
         purchased_items = {}
         for word in extracted_words:
-            matching_valid_word = find_matching_valid_word(word, VALID_WORDS.keys())
+            matching_valid_word = find_matching_valid_word(word, catalog=catalog)
             if matching_valid_word:
-                price = VALID_WORDS[matching_valid_word]
+                price = catalog.get_price(matching_valid_word)
                 purchased_items[matching_valid_word] = price
                 print(f"✅ Correct word: {word} -> Valid word: {matching_valid_word} (Price: {price}dt)")
             else:
@@ -0,0 +1,96 @@
+import atexit
+import json
+import os
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import BackgroundDispatcher, request_not_sent
+
+API_BASE_URL = os.getenv("RETAIL_API_URL", "http://localhost:3000/api/pcd0/admin")
+API_OUTBOX_PATH = os.getenv("RETAIL_API_OUTBOX", "api_outbox.jsonl")
+
+
+class RetryableApiError(Exception):
+    """Server-side or transient API failure worth retrying"""
+
+
+class RetailApiClient:
+    """
+    Non-blocking client for the store backend.
+
+    Calls only enqueue the event. A BackgroundDispatcher posts them in order
+    over a pooled keep-alive session, with timeouts and retries. Events that
+    cannot be delivered are kept in an on-disk outbox and replayed later.
+
+    'retrieve' debits the customer's credit on the server, so a request is
+    only resent after a 429/5xx answer or when it never left this machine.
+    A timeout or reset after sending is logged to the unconfirmed file
+    instead of risking a double charge.
+    """
+
+    def __init__(self, base_url=API_BASE_URL, outbox_path=API_OUTBOX_PATH,
+                 timeout=(3.05, 10), max_retries=3):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.dispatcher = BackgroundDispatcher(
+            self._post,
+            outbox_path=outbox_path,
+            max_retries=max_retries,
+            retryable=self._retryable,
+            name='retail-api'
+        )
+
+    @staticmethod
+    def _retryable(error):
+        return isinstance(error, RetryableApiError) or request_not_sent(error)
+
+    def _post(self, session, event):
+        """Deliver one {'endpoint', 'payload'} event"""
+        api_url = f"{self.base_url}/{event['endpoint']}"
+        response = session.post(
+            api_url,
+            data=json.dumps(event['payload']),
+            headers={'Content-Type': 'application/json'},
+            timeout=self.timeout
+        )
+
+        if response.status_code == 200:
+            print(f"✅ API {event['endpoint']} delivered: {event['payload'].get('customer_Id')}")
+        elif response.status_code >= 500 or response.status_code == 429:
+            raise RetryableApiError(f"{response.status_code} - {response.text}")
+        else:
+            # 4xx will not succeed on retry, report and drop
+            print(f"❌ API Error: {response.status_code} - {response.text}")
+
+    def send_customer_count(self, customer_id):
+        """Queue the 'affect-id' call for a customer that just entered"""
+        return self.dispatcher.submit({
+            'endpoint': 'affect-id',
+            'payload': {'customer_Id': customer_id}
+        })
+
+    def send_customer_box(self, payload):
+        """Queue the 'retrieve' call with a JSON-ready purchase payload"""
+        return self.dispatcher.submit({'endpoint': 'retrieve', 'payload': payload})
+
+    def flush(self, timeout=10.0):
+        """Wait for queued events to be delivered, the client stays open"""
+        return self.dispatcher.flush(timeout)
+
+    def close(self, timeout=10.0):
+        self.dispatcher.close(timeout)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_api_client():
+    """Process-wide RetailApiClient, created on first use and flushed at exit"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RetailApiClient()
+            atexit.register(_client.close)
+        return _client
@@ -0,0 +1,95 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from product_catalog import DEFAULT_CATALOG_PATH, ProductCatalog
+from tracking_and_identifying import ObjectTracker
+
+
+def load_frames(video_path, max_frames):
+    """Decode the first max_frames frames so decode cost is excluded from timing"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video file: {video_path}")
+
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def time_tracking(model_path, frames, classes, warmup=5):
+    """Per-frame model.track latency in milliseconds with a fresh tracker state"""
+    model = YOLO(model_path)
+    for frame in frames[:warmup]:
+        model.track(source=frame, classes=classes, tracker="botsort.yaml", persist=True, verbose=False)
+
+    # Reset the tracker so warm-up tracks do not leak into the measured run
+    for tracker in model.predictor.trackers:
+        tracker.reset()
+    latencies = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        model.track(source=frame, classes=classes, tracker="botsort.yaml", persist=True, verbose=False)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return np.array(latencies)
+
+
+def summarize(latencies):
+    return {
+        'frames': int(latencies.size),
+        'mean_ms': round(float(latencies.mean()), 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare model.track latency with all COCO classes vs catalog classes",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--input', type=str, default=ObjectTracker.DEFAULT_VIDEO_PATH,
+                       help='Path to input video file')
+    parser.add_argument('--model', type=str, default=ObjectTracker.DEFAULT_MODEL_PATH,
+                       help='YOLO weights')
+    parser.add_argument('--catalog', type=str, default=DEFAULT_CATALOG_PATH,
+                       help='Product catalog (SQLite or JSON)')
+    parser.add_argument('--frames', type=int, default=200,
+                       help='Number of frames to benchmark')
+    parser.add_argument('--output', type=str, default='class_filter_benchmark.json',
+                       help='Where to write the results')
+    args = parser.parse_args()
+
+    catalog = ProductCatalog.load(args.catalog)
+    catalog_classes = sorted(set(ObjectTracker.STRUCTURAL_NAMES) | set(catalog.class_ids))
+    frames = load_frames(args.input, args.frames)
+    print(f"Benchmarking {len(frames)} frames from {args.input}")
+
+    results = {
+        'all_classes': summarize(time_tracking(args.model, frames, list(range(80)))),
+        'catalog_classes': summarize(time_tracking(args.model, frames, catalog_classes)),
+    }
+    results['catalog_class_ids'] = catalog_classes
+    results['mean_speedup'] = round(results['all_classes']['mean_ms'] / results['catalog_classes']['mean_ms'], 3)
+
+    for name in ('all_classes', 'catalog_classes'):
+        r = results[name]
+        print(f"{name:<16} mean {r['mean_ms']:>8} ms  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms")
+    print(f"Speedup: {results['mean_speedup']}x")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"📄 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
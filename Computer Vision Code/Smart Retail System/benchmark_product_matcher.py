@@ -0,0 +1,133 @@
+import argparse
+import json
+import random
+import string
+import time
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+from product_matcher import ProductMatcher
+
+REAL_PRODUCTS = ["Spoon", "Bag", "Bottle of Water", "Cup", "Tennis Racket"]
+WORDS = ["Red", "Blue", "Steel", "Plastic", "Glass", "Large", "Small", "Kids", "Sport", "Travel",
+         "Box", "Bottle", "Jar", "Plate", "Fork", "Knife", "Towel", "Ball", "Shoe", "Hat",
+         "Juice", "Soap", "Brush", "Lamp", "Chair", "Mug", "Bowl", "Pan", "Pen", "Book"]
+
+
+def build_catalog(size, rng):
+    """Real products plus synthetic multi-word names up to `size` entries"""
+    names = list(REAL_PRODUCTS)
+    seen = set(names)
+    while len(names) < size:
+        name = " ".join(rng.sample(WORDS, rng.randint(2, 3))) + f" {rng.randint(1, 9999)}"
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names[:size]
+
+
+def ocr_noise(text, rng, rate=0.1):
+    """Simulate OCR errors: substituted, dropped and look-alike characters"""
+    lookalike = {'o': '0', 'l': '1', 'e': 'c', 's': '5', 'a': 'o', 'i': 'l'}
+    out = []
+    for ch in text:
+        r = rng.random()
+        if r < rate / 3:
+            continue
+        if r < 2 * rate / 3:
+            out.append(lookalike.get(ch.lower(), rng.choice(string.ascii_lowercase)))
+        else:
+            out.append(ch)
+    return "".join(out) or text
+
+
+def build_queries(names, count, rng):
+    """Noisy catalog names, half of them real products, plus some garbage tokens"""
+    queries = []
+    for i in range(count):
+        if i % 10 == 9:
+            queries.append("".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(3, 8))))
+        elif i % 2:
+            queries.append(ocr_noise(rng.choice(REAL_PRODUCTS), rng))
+        else:
+            queries.append(ocr_noise(rng.choice(names), rng))
+    return queries
+
+
+def linear_match(word, names, threshold=80):
+    """The original first-over-threshold partial_ratio scan"""
+    word_lower = word.lower()
+    for name in names:
+        if fuzz.partial_ratio(word_lower, name.lower()) >= threshold:
+            return name
+    return None
+
+
+def time_queries(match, queries):
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        match(query)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies = np.array(latencies)
+    return {
+        'queries': int(latencies.size),
+        'mean_ms': round(float(latencies.mean()), 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the linear fuzzy scan against the indexed ProductMatcher",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000],
+                       help='Catalog sizes to benchmark')
+    parser.add_argument('--queries', type=int, default=500,
+                       help='OCR tokens per catalog size')
+    parser.add_argument('--linear-budget', type=int, default=2_000_000,
+                       help='Max catalog entries x queries for the linear scan, it is O(catalog) per token')
+    parser.add_argument('--seed', type=int, default=0,
+                       help='Random seed for catalogs and queries')
+    parser.add_argument('--output', type=str, default='product_matcher_benchmark.json',
+                       help='Where to write the results')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in args.sizes:
+        names = build_catalog(size, rng)
+        queries = build_queries(names, args.queries, rng)
+
+        t0 = time.perf_counter()
+        matcher = ProductMatcher(names)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        linear_queries = queries[:max(10, min(len(queries), args.linear_budget // size))]
+        row = {
+            'catalog_size': size,
+            'index_build_ms': round(build_ms, 2),
+            'linear': time_queries(lambda q: linear_match(q, names), linear_queries),
+            'indexed_cold': time_queries(matcher.match, queries),
+            'indexed_cached': time_queries(matcher.match, queries),
+        }
+        row['speedup_cold'] = round(row['linear']['mean_ms'] / row['indexed_cold']['mean_ms'], 1)
+        # Agreement on real products, where the linear scan is the reference behaviour
+        real = [q for i, q in enumerate(linear_queries) if i % 2 and i % 10 != 9]
+        row['real_product_agreement'] = round(
+            sum(matcher.match(q) == linear_match(q, REAL_PRODUCTS) for q in real) / max(1, len(real)), 3)
+        results.append(row)
+
+        print(f"{size:>7} products  linear {row['linear']['mean_ms']:>9} ms  "
+              f"indexed {row['indexed_cold']['mean_ms']:>7} ms  cached {row['indexed_cached']['mean_ms']:>7} ms  "
+              f"speedup {row['speedup_cold']:>7}x  build {row['index_build_ms']} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"📄 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+
+
+class CustomerSession:
+    """One customer's visit, from entrance-line crossing to checkout"""
+
+    def __init__(self, customer_id, track_id, entry_time):
+        self.customer_id = customer_id
+        self.track_id = track_id
+        self.entry_time = entry_time          # video time in seconds
+        self.entry_wall_time = time.time()
+        self.last_seen = entry_time
+        self.frame_files = []             # frame references: buffer sequence numbers or paths
+        self.checkout_reason = None
+        self.checkout_wall_time = None
+        self.persisted_wall_time = None
+
+    @property
+    def latency(self):
+        """Seconds from checkout detection to persisted record"""
+        if self.checkout_wall_time is None or self.persisted_wall_time is None:
+            return None
+        return self.persisted_wall_time - self.checkout_wall_time
+
+
+class SessionManager:
+    """
+    Turn each customer visit into its own event as soon as it is complete.
+
+    A session opens when a person track crosses the entrance line. Checkout
+    happens when that track crosses back over the line or has not been seen
+    for checkout_timeout seconds of video time. Completed sessions are handed
+    to on_complete on a worker thread, so OCR, reports, DB writes and API
+    calls never run on the frame loop.
+
+    Args:
+        on_complete (callable): on_complete(session), runs on the worker thread.
+        checkout_timeout (float): Seconds a track may be missing before checkout.
+        exit_margin (int): Pixels past the entrance line, so jitter on the line is not an exit.
+    """
+
+    def __init__(self, on_complete, checkout_timeout=5.0, exit_margin=20):
+        self.on_complete = on_complete
+        self.checkout_timeout = checkout_timeout
+        self.exit_margin = exit_margin
+        self.open_sessions = {}       # track_id -> CustomerSession
+        self.completed = []
+        self.completed_queue = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name='customer-sessions', daemon=True)
+        self.worker.start()
+
+    def start(self, customer_id, track_id, now):
+        """Open a session for a customer who just crossed the entrance line"""
+        session = CustomerSession(customer_id, track_id, now)
+        self.open_sessions[track_id] = session
+        return session
+
+    def observe(self, person_positions, entrance_line_x, now):
+        """
+        Update sessions with the people visible in this frame.
+
+        Args:
+            person_positions (dict): {track_id: center_x} of visible people.
+            entrance_line_x (int): Entrance line, crossing back means leaving.
+            now (float): Video time in seconds.
+        """
+        for track_id, session in list(self.open_sessions.items()):
+            center_x = person_positions.get(track_id)
+            if center_x is None:
+                if now - session.last_seen > self.checkout_timeout:
+                    self.checkout(track_id, 'left view')
+                continue
+
+            session.last_seen = now
+            if center_x < entrance_line_x - self.exit_margin:
+                self.checkout(track_id, 'crossed entrance line')
+
+    def add_frame(self, frame_file):
+        """Attach a captured frame (buffer sequence number or path) to every customer in the store"""
+        # Copy: in pipelined mode frames are saved from the sink thread
+        for session in list(self.open_sessions.values()):
+            session.frame_files.append(frame_file)
+
+    def checkout(self, track_id, reason):
+        session = self.open_sessions.pop(track_id, None)
+        if session is None:
+            return
+        session.checkout_reason = reason
+        session.checkout_wall_time = time.time()
+        print(f"🛒 Customer {session.customer_id} checked out ({reason})")
+        self.completed_queue.put(session)
+
+    def _run(self):
+        while True:
+            session = self.completed_queue.get()
+            if session is None:
+                break
+            try:
+                self.on_complete(session)
+            except Exception as e:
+                print(f"❌ Failed to process session for customer {session.customer_id}: {str(e)}")
+            finally:
+                self.completed.append(session)
+
+    def close(self):
+        """Check out everyone still open (end of stream) and wait for the worker"""
+        for track_id in list(self.open_sessions):
+            self.checkout(track_id, 'end of stream')
+        self.completed_queue.put(None)
+        self.worker.join()
+
+    def latency_summary(self):
+        """Checkout-to-persisted latency statistics in seconds"""
+        latencies = sorted(s.latency for s in self.completed if s.latency is not None)
+        if not latencies:
+            return {'sessions': len(self.completed)}
+        return {
+            'sessions': len(self.completed),
+            'persisted': len(latencies),
+            'p50_seconds': round(latencies[len(latencies) // 2], 3),
+            'max_seconds': round(latencies[-1], 3),
+            'mean_seconds': round(sum(latencies) / len(latencies), 3),
+        }
@@ -0,0 +1,122 @@
+import os
+import queue
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import metrics
+
+
+class FrameRingBuffer:
+    """
+    The last `capacity` frames in one preallocated array.
+
+    push() copies a frame into the next slot and returns its sequence number.
+    Readers get NumPy views into the buffer, so no encode/decode or disk I/O
+    happens between the tracker and the red-text stage. A view stays valid
+    until `capacity` newer frames have been pushed; readers on another
+    thread should ask for copies.
+
+    Args:
+        capacity (int): Number of frames kept.
+    """
+
+    def __init__(self, capacity=20):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.frames = None          # allocated on the first push, when the shape is known
+        self.labels = [None] * capacity
+        self.seqs = np.full(capacity, -1, dtype=np.int64)
+        self.next_seq = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.next_seq, self.capacity)
+
+    def push(self, frame, label=None):
+        """Copy a frame into the buffer, returns its sequence number"""
+        with self.lock:
+            if self.frames is None or self.frames.shape[1:] != frame.shape:
+                self.frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+                self.seqs.fill(-1)
+            seq = self.next_seq
+            slot = seq % self.capacity
+            np.copyto(self.frames[slot], frame)
+            self.seqs[slot] = seq
+            self.labels[slot] = label if label is not None else f"frame_{seq:04d}"
+            self.next_seq += 1
+            return seq
+
+    def get(self, seq, copy=False):
+        """Frame with the given sequence number, None if it was overwritten"""
+        with self.lock:
+            slot = seq % self.capacity
+            if self.frames is None or self.seqs[slot] != seq:
+                return None
+            return self.frames[slot].copy() if copy else self.frames[slot]
+
+    def label(self, seq):
+        with self.lock:
+            slot = seq % self.capacity
+            return self.labels[slot] if self.seqs[slot] == seq else None
+
+    def items(self, seqs=None, copy=False):
+        """
+        (label, frame) pairs, oldest first.
+
+        Args:
+            seqs (list): Sequence numbers to return, defaults to every frame held.
+            copy (bool): Return copies instead of views into the buffer.
+        """
+        with self.lock:
+            if self.frames is None:
+                return []
+            if seqs is None:
+                seqs = range(max(0, self.next_seq - self.capacity), self.next_seq)
+            items = []
+            for seq in seqs:
+                slot = seq % self.capacity
+                if self.seqs[slot] != seq:
+                    continue
+                frame = self.frames[slot].copy() if copy else self.frames[slot]
+                items.append((self.labels[slot], frame))
+            return items
+
+
+class AsyncFrameWriter:
+    """Debug sink that writes frames as JPEG files from a background thread"""
+
+    def __init__(self, directory, max_queue=32):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.worker = threading.Thread(target=self._run, name='frame-writer', daemon=True)
+        self.worker.start()
+
+    def write(self, filename, frame):
+        """Queue a copy of the frame, dropped (not blocking) if the writer is behind"""
+        try:
+            self.queue.put_nowait((filename, frame.copy()))
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc('frames_dropped')
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            filename, frame = item
+            with metrics.time('jpeg_write'):
+                cv2.imwrite(os.path.join(self.directory, filename), frame)
+
+    def close(self):
+        self.queue.put(None)
+        self.worker.join()
+        if self.dropped:
+            print(f"⚠️ Frame writer dropped {self.dropped} frame(s)")
@@ -0,0 +1,135 @@
+import numpy as np
+
+
+class HandTrackStore:
+    """
+    Stable hand IDs with smoothed wrist positions in constant memory.
+
+    Hands are matched to existing tracks by nearest last wrist position.
+    Tracks not seen for `ttl` seconds are evicted and their slot reused, so
+    memory is fixed by `max_tracks` no matter how long the stream runs.
+    History lives in preallocated ring buffers and smoothing uses a running
+    sum, so an update costs O(hands) instead of a mean over the history.
+
+    Args:
+        max_tracks (int): Number of hand slots.
+        history (int): Positions averaged per hand.
+        max_distance (float): Max wrist movement in pixels to keep the same ID.
+        ttl (float): Seconds without a detection before a track is dropped.
+    """
+
+    def __init__(self, max_tracks=32, history=10, max_distance=80.0, ttl=1.0):
+        self.max_tracks = max_tracks
+        self.history = history
+        self.max_distance = max_distance
+        self.ttl = ttl
+
+        self.positions = np.zeros((max_tracks, history, 2), dtype=np.float64)
+        self.sums = np.zeros((max_tracks, 2), dtype=np.float64)
+        self.counts = np.zeros(max_tracks, dtype=np.int64)
+        self.heads = np.zeros(max_tracks, dtype=np.int64)
+        self.last_seen = np.full(max_tracks, -np.inf)
+        self.ids = np.full(max_tracks, -1, dtype=np.int64)
+        self.next_id = 0
+
+    @property
+    def active(self):
+        return self.ids >= 0
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def _reset_slots(self, slots):
+        self.sums[slots] = 0
+        self.counts[slots] = 0
+        self.heads[slots] = 0
+        self.last_seen[slots] = -np.inf
+        self.ids[slots] = -1
+
+    def evict_stale(self, now):
+        """Drop tracks not seen for more than ttl seconds"""
+        stale = self.active & (now - self.last_seen > self.ttl)
+        if stale.any():
+            self._reset_slots(stale)
+
+    def _last_positions(self, slots):
+        return self.positions[slots, (self.heads[slots] - 1) % self.history]
+
+    def _allocate_slot(self, taken):
+        """New track slot, never one of the `taken` slots already used this frame; None if all are"""
+        free = np.flatnonzero(~self.active)
+        if free.size:
+            slot = int(free[0])
+        else:
+            # Every slot is live: recycle the one seen least recently, unless it was matched this frame
+            last_seen = self.last_seen.copy()
+            last_seen[list(taken)] = np.inf
+            slot = int(np.argmin(last_seen))
+            if last_seen[slot] == np.inf:
+                return None
+            self._reset_slots(slot)
+        self.ids[slot] = self.next_id
+        self.next_id += 1
+        return slot
+
+    def _push(self, slot, position, now):
+        head = self.heads[slot]
+        if self.counts[slot] == self.history:
+            self.sums[slot] -= self.positions[slot, head]
+        else:
+            self.counts[slot] += 1
+        self.positions[slot, head] = position
+        self.sums[slot] += position
+        self.heads[slot] = (head + 1) % self.history
+        if self.heads[slot] == 0 and self.counts[slot] == self.history:
+            # Re-sum once per lap so floating point error cannot build up over long runs
+            self.sums[slot] = self.positions[slot].sum(axis=0)
+        self.last_seen[slot] = now
+
+    def update(self, wrists, now):
+        """
+        Associate this frame's wrists with tracks and return smoothed positions.
+
+        Args:
+            wrists (array-like): (N, 2) wrist positions in pixels.
+            now (float): Timestamp in seconds (video time or wall clock).
+
+        Returns:
+            List of (hand_id, (x, y)) in the same order as `wrists`. Hands
+            beyond max_tracks in a single frame are left out.
+        """
+        self.evict_stale(now)
+        wrists = np.asarray(wrists, dtype=np.float64).reshape(-1, 2)
+        assigned = np.full(len(wrists), -1, dtype=np.int64)
+
+        slots = np.flatnonzero(self.active)
+        if slots.size and len(wrists):
+            distances = np.linalg.norm(
+                wrists[:, None, :] - self._last_positions(slots)[None, :, :], axis=2
+            )
+            # Greedy matching, closest pairs first
+            order = np.argsort(distances, axis=None)
+            used_slots = set()
+            for flat in order:
+                w, s = divmod(int(flat), slots.size)
+                if distances[w, s] > self.max_distance:
+                    break
+                if assigned[w] >= 0 or s in used_slots:
+                    continue
+                assigned[w] = slots[s]
+                used_slots.add(s)
+
+        results = []
+        taken = {int(slot) for slot in assigned if slot >= 0}
+        for w, position in enumerate(wrists):
+            if assigned[w] >= 0:
+                slot = int(assigned[w])
+            else:
+                slot = self._allocate_slot(taken)
+                if slot is None:
+                    continue
+                taken.add(slot)
+            self._push(slot, position, now)
+            smoothed = self.sums[slot] / self.counts[slot]
+            results.append((int(self.ids[slot]), (int(smoothed[0]), int(smoothed[1]))))
+        return results
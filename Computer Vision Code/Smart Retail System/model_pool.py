@@ -0,0 +1,166 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mediapipe as mp
+
+from red_text_detector_with_Paddle_OCR import RedTextDetector
+from tracking_and_identifying import ObjectTracker
+from vision_common import load_model, metrics
+
+DEFAULT_DAEMON_HOST = "127.0.0.1"
+DEFAULT_DAEMON_PORT = 8765
+
+
+class ModelPool:
+    """
+    YOLO, MediaPipe Hands and PaddleOCR, loaded concurrently and kept warm.
+
+    Loading starts in the constructor on a small thread pool, so the three
+    cold loads overlap instead of running in series. Each model property
+    blocks only until that model is ready: the tracker can start on the first
+    frame while PaddleOCR is still initializing. Between jobs, reset() clears
+    per-video tracker state so the same instances can serve the next video.
+
+    Args:
+        model_path (str): YOLO weights.
+        backend (str): Inference backend for YOLO, see vision_common.load_model.
+        int8 (bool): Use an INT8 export on the ONNX/OpenVINO backends.
+        calibration_data (str): Dataset YAML for OpenVINO INT8 calibration.
+        frames_dir (str): Frames folder of the shared RedTextDetector.
+        load_ocr (bool): Also load PaddleOCR (not needed when OCR runs elsewhere).
+    """
+
+    def __init__(self, model_path=ObjectTracker.DEFAULT_MODEL_PATH, frames_dir='analyze_frames', load_ocr=True,
+                 backend='auto', int8=False, calibration_data=None):
+        self.created_time = time.time()
+        self.load_times = {}
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='model-load')
+        self.futures = {
+            'yolo': self.executor.submit(self._timed, 'yolo', load_model, model_path, backend,
+                                         int8=int8, calibration_data=calibration_data),
+            'hands': self.executor.submit(self._timed, 'hands', self._load_hands),
+        }
+        if load_ocr:
+            self.futures['ocr'] = self.executor.submit(self._timed, 'ocr', RedTextDetector, frames_folder=frames_dir)
+        self.executor.shutdown(wait=False)
+        self.jobs = 0
+
+    def _timed(self, name, loader, *args, **kwargs):
+        t0 = time.perf_counter()
+        model = loader(*args, **kwargs)
+        self.load_times[name] = round(time.perf_counter() - t0, 3)
+        metrics.set_gauge(f'model_load_seconds_{name}', self.load_times[name])
+        print(f"🧠 {name} loaded in {self.load_times[name]:.2f}s")
+        return model
+
+    @staticmethod
+    def _load_hands():
+        # Same settings as ObjectTracker.initialize_models
+        return mp.solutions.hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    @property
+    def yolo(self):
+        return self.futures['yolo'].result()
+
+    @property
+    def hands(self):
+        return self.futures['hands'].result()
+
+    @property
+    def detector(self):
+        """Shared RedTextDetector, None if the pool was built without OCR"""
+        future = self.futures.get('ocr')
+        return future.result() if future is not None else None
+
+    def wait(self):
+        """Block until every model is loaded, returns wall-clock seconds since the pool was created"""
+        for future in self.futures.values():
+            future.result()
+        return time.time() - self.created_time
+
+    def reset(self):
+        """Forget per-video state (tracks, hand landmarks) before the next job"""
+        predictor = getattr(self.yolo, 'predictor', None)
+        for tracker in getattr(predictor, 'trackers', None) or []:
+            tracker.reset()
+        if hasattr(self.hands, 'reset'):
+            self.hands.reset()
+        self.jobs += 1
+
+    def summary(self):
+        return {
+            'load_seconds': dict(self.load_times),
+            'yolo_backend': getattr(self.yolo, 'backend_name', 'pytorch'),
+            'jobs_served': self.jobs,
+        }
+
+
+class ModelDaemon(socketserver.TCPServer):
+    """
+    Local job server that keeps a ModelPool warm between videos.
+
+    A client sends one JSON object per line, e.g. {"input": "video.mp4"}, and
+    gets one JSON line back when the job is done. Jobs run one at a time
+    (the models are not thread-safe), so back-to-back videos only pay for
+    processing. {"command": "shutdown"} stops the server.
+
+    Args:
+        run_job (callable): run_job(job_dict) -> result dict.
+        host (str): Interface to bind, localhost by default.
+        port (int): TCP port.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, run_job, host=DEFAULT_DAEMON_HOST, port=DEFAULT_DAEMON_PORT):
+        self.run_job = run_job
+        super().__init__((host, port), _JobHandler)
+
+    def serve(self):
+        host, port = self.server_address
+        print(f"🟢 Model daemon listening on {host}:{port}")
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+            print("🛑 Model daemon stopped")
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                if job.get('command') == 'shutdown':
+                    self._reply({'status': 'ok', 'message': 'shutting down'})
+                    # shutdown() blocks until serve_forever returns, which needs this handler to finish first
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                result = self.server.run_job(job)
+                self._reply({'status': 'ok', **result})
+            except Exception as e:
+                print(f"❌ Job failed: {str(e)}")
+                self._reply({'status': 'error', 'error': str(e)})
+
+    def _reply(self, message):
+        self.wfile.write((json.dumps(message) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+
+def submit_job(job, host=DEFAULT_DAEMON_HOST, port=DEFAULT_DAEMON_PORT, timeout=None):
+    """Send one job to a running ModelDaemon and wait for its result"""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(job) + '\n').encode('utf-8'))
+        reply = sock.makefile('r', encoding='utf-8').readline()
+    if not reply:
+        raise ConnectionError("Model daemon closed the connection without a reply")
+    return json.loads(reply)
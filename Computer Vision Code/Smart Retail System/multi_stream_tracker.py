@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import mediapipe as mp
+from ultralytics.trackers.bot_sort import BOTSORT
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
+
+from product_catalog import ProductCatalog
+from tracking_and_identifying import ObjectTracker
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import add_backend_arguments, add_display_arguments, load_model
+
+
+class CameraStream:
+    """Per-camera state: video I/O, counters and its own BoT-SORT tracker"""
+
+    def __init__(self, index, tracker, bot_sort):
+        self.index = index
+        self.tracker = tracker
+        self.bot_sort = bot_sort
+        self.finished = False
+
+    def summary(self):
+        return {
+            'camera': self.index,
+            'input_video': self.tracker.video_path,
+            'output_video': self.tracker.output_path,
+            'total_customers': self.tracker.entry_counter,
+            'frames_read': self.tracker.frame_count,
+        }
+
+
+class MultiStreamTracker:
+    """
+    Track many cameras with a single YOLO model and batched inference.
+
+    Each tick reads the next selected frame from every live stream, runs one
+    batched forward pass (split into chunks of batch_size), then feeds each
+    stream's detections to that stream's own BoT-SORT tracker. Counters such
+    as entry_counter, person_ids_crossed and table_bbox live in a per-stream
+    ObjectTracker that shares the model and hand detector instead of loading
+    its own copies.
+
+    Args:
+        sources (list): Video files or camera indices, one per stream.
+        output_dir (str): Directory for the per-camera annotated videos.
+        batch_size (int): Max frames per forward pass.
+        frame_skip (int): Process every Nth frame of each stream.
+        headless (bool): Skip GUI windows.
+        preview_path (str): Headless preview path, suffixed per camera.
+        preview_interval (float): Seconds between preview frames.
+        model_path (str): YOLO weights shared by all streams.
+        backend (str): Inference backend, see vision_common.load_model.
+        int8 (bool): Use an INT8 export on the ONNX/OpenVINO backends.
+    """
+
+    def __init__(self, sources, output_dir='Output Videos', batch_size=8, frame_skip=3,
+                 headless=True, preview_path=None, preview_interval=5.0,
+                 tracker_config="botsort.yaml", catalog=None, model_path=ObjectTracker.DEFAULT_MODEL_PATH,
+                 backend='auto', int8=False):
+        if not sources:
+            raise ValueError("At least one source is required")
+
+        self.batch_size = max(1, batch_size)
+        # Exports need a dynamic batch dimension for batched predict
+        self.model = load_model(model_path, backend, int8=int8, dynamic=self.batch_size > 1)
+        # static_image_mode: a single hand detector is shared by interleaved streams,
+        # so it must not carry tracking state from one camera's frame to the next
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=True,
+            min_detection_confidence=0.5
+        )
+        self.catalog = catalog if catalog is not None else ProductCatalog.load()
+        self.tracker_args = IterableSimpleNamespace(**yaml_load(check_yaml(tracker_config)))
+
+        self.streams = []
+        for index, source in enumerate(sources):
+            tracker = ObjectTracker(
+                headless=headless,
+                preview_path=self._per_camera_path(preview_path, index),
+                preview_interval=preview_interval,
+                video_path=source,
+                output_path=os.path.join(output_dir, f"Tracking_Camera_{index}.mp4"),
+                frames_dir=os.path.join('analyze_frames', f"camera_{index}"),
+                model=self.model,
+                hands=self.hands,
+                catalog=self.catalog,
+                # Nothing reads captured frames here, skip the per-camera ring buffer
+                frame_buffer_size=0
+            )
+            tracker.frame_skip = frame_skip
+            tracker.display.window_name = f"Tracking Camera {index}"
+            bot_sort = BOTSORT(args=self.tracker_args, frame_rate=max(1, tracker.fps))
+            self.streams.append(CameraStream(index, tracker, bot_sort))
+
+        self.ticks = 0
+        self.frames_processed = 0
+        self.inference_time = 0.0
+
+    @staticmethod
+    def _per_camera_path(path, index):
+        if not path:
+            return None
+        root, ext = os.path.splitext(path)
+        return f"{root}_camera_{index}{ext}"
+
+    def read_batch(self):
+        """Read the next selected frame of every live stream"""
+        batch = []
+        for stream in self.streams:
+            if stream.finished:
+                continue
+            frame = stream.tracker.read_next_frame()
+            if frame is None:
+                stream.finished = True
+                continue
+            batch.append((stream, frame))
+        return batch
+
+    def infer(self, frames):
+        """Run one batched forward pass per chunk of batch_size frames"""
+        results = []
+        # Shared catalog: one reload updates the classes of every stream
+        if self.catalog.maybe_reload():
+            for stream in self.streams:
+                stream.tracker.track_classes = sorted(
+                    set(stream.tracker.STRUCTURAL_NAMES) | set(self.catalog.class_ids))
+        for start in range(0, len(frames), self.batch_size):
+            chunk = frames[start:start + self.batch_size]
+            t0 = time.perf_counter()
+            results.extend(self.model.predict(
+                chunk,
+                classes=self.streams[0].tracker.track_classes,
+                verbose=False
+            ))
+            self.inference_time += time.perf_counter() - t0
+        return results
+
+    def update_stream(self, stream, frame, result):
+        """Associate detections with this stream's tracks and update its counters"""
+        detections = result.boxes.cpu().numpy()
+        tracks = stream.bot_sort.update(detections, frame)
+        # BOTSORT rows are (x1, y1, x2, y2, id, conf, cls, idx), ObjectTracker expects the first 7
+        processed_frame = stream.tracker.annotate_frame(frame, tracks[:, :7] if len(tracks) else None)
+        stream.tracker.out.write(processed_frame)
+        stream.tracker.save_frame_periodically(processed_frame)
+        return stream.tracker.display.show(processed_frame)
+
+    def run(self):
+        """Process all streams until every source is exhausted"""
+        start_time = time.time()
+        print(f"Starting multi-stream tracking: {len(self.streams)} cameras, batch size {self.batch_size}")
+
+        try:
+            while True:
+                batch = self.read_batch()
+                if not batch:
+                    break
+
+                results = self.infer([frame for _, frame in batch])
+                keep_running = True
+                for (stream, frame), result in zip(batch, results):
+                    keep_running &= self.update_stream(stream, frame, result)
+
+                self.ticks += 1
+                self.frames_processed += len(batch)
+                if not keep_running:
+                    break
+        finally:
+            for stream in self.streams:
+                stream.tracker.finish()
+
+        return self.report(time.time() - start_time)
+
+    def report(self, elapsed):
+        """Per-camera counters plus aggregate throughput"""
+        return {
+            'cameras': [stream.summary() for stream in self.streams],
+            'statistics': {
+                'ticks': self.ticks,
+                'frames_processed': self.frames_processed,
+                'average_batch_size': round(self.frames_processed / self.ticks, 2) if self.ticks else 0,
+                'processing_fps': round(self.frames_processed / elapsed, 2) if elapsed else 0,
+                'inference_fps': round(self.frames_processed / self.inference_time, 2) if self.inference_time else 0,
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Batched multi-camera tracking with one shared model",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--sources', nargs='+', required=True,
+                       help='Video files or camera indices, one per stream')
+    parser.add_argument('--output', type=str, default='Output Videos',
+                       help='Directory for output files')
+    parser.add_argument('--batch-size', type=int, default=8,
+                       help='Max frames per batched forward pass')
+    parser.add_argument('--skip-frames', type=int, default=3,
+                       help='Process every Nth frame of each stream')
+    add_backend_arguments(parser)
+    add_display_arguments(parser)
+    args = parser.parse_args()
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    tracker = MultiStreamTracker(
+        sources,
+        output_dir=args.output,
+        batch_size=args.batch_size,
+        frame_skip=args.skip_frames,
+        headless=args.headless,
+        preview_path=args.preview,
+        preview_interval=args.preview_interval,
+        backend=args.backend,
+        int8=args.int8
+    )
+    report = tracker.run()
+
+    report_path = os.path.join(args.output, 'multi_stream_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(json.dumps(report['statistics'], indent=4))
+    print(f"📄 Report saved to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+CATALOG_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CATALOG_PATH = os.path.join(CATALOG_DIR, "product_catalog.db")
+DEFAULT_SEED_PATH = os.path.join(CATALOG_DIR, "product_catalog.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    class_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    price REAL NOT NULL
+)
+"""
+
+
+def normalize_name(name):
+    """Lookup key for a product name: case- and whitespace-insensitive"""
+    return " ".join(name.lower().split())
+
+
+class ProductCatalog:
+    """
+    Products the store sells, keyed by the YOLO class ID that detects them.
+
+    The catalog is read once into dicts, so lookups by class ID and by
+    normalized name are O(1) and allocate nothing. The on-disk store is a
+    SQLite file (products(class_id, name, price)); a JSON file of the form
+    {"products": [{"class_id": 39, "name": "Bottle of Water", "price": 0.9}, ...]}
+    is also accepted and is used to seed the database on first use.
+    Several class IDs may map to the same product name.
+
+    maybe_reload() re-reads the file when its modification time changes, so a
+    price update is picked up without restarting the pipeline.
+    """
+
+    def __init__(self, products, path=None, reload_interval=2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._file_state = self._stat(path)
+        self._next_check = time.monotonic() + reload_interval
+        self._build(products)
+
+    def _build(self, products):
+        names_by_class = {}
+        prices = {}
+        names_by_key = {}
+        for product in products:
+            class_id = int(product['class_id'])
+            name = product['name']
+            names_by_class[class_id] = name
+            prices[name] = product['price']
+            names_by_key[normalize_name(name)] = name
+        # Swap whole tables so readers on other threads never see a half-built catalog
+        self.names_by_class = names_by_class
+        self.prices = prices
+        self.names_by_key = names_by_key
+        self.names = tuple(prices)
+        self.version += 1
+
+    @staticmethod
+    def _stat(path):
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH, reload_interval=2.0):
+        """Load the catalog from a SQLite or JSON file, seeding a missing database from JSON"""
+        if path.endswith('.json'):
+            products = read_json(path)
+        else:
+            if not os.path.exists(path):
+                print(f"📦 Creating product catalog {path} from {DEFAULT_SEED_PATH}")
+                write_sqlite(path, read_json(DEFAULT_SEED_PATH))
+            products = read_sqlite(path)
+        if not products:
+            raise ValueError(f"Product catalog is empty: {path}")
+        return cls(products, path=path, reload_interval=reload_interval)
+
+    def maybe_reload(self, now=None):
+        """
+        Re-read the catalog file if it changed, at most once per reload_interval.
+
+        Returns:
+            bool: True if the catalog was reloaded.
+        """
+        if self.path is None:
+            return False
+        now = time.monotonic() if now is None else now
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+
+        state = self._stat(self.path)
+        if state is None or state == self._file_state:
+            return False
+        try:
+            products = read_json(self.path) if self.path.endswith('.json') else read_sqlite(self.path)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            # Keep serving the current catalog, a half-written file is retried next check
+            print(f"⚠️ Could not reload product catalog: {str(e)}")
+            return False
+        if not products:
+            return False
+        self._file_state = state
+        self._build(products)
+        print(f"🔄 Product catalog reloaded ({len(self.names)} products)")
+        return True
+
+    @property
+    def class_ids(self):
+        """Sorted class IDs that correspond to products"""
+        return sorted(self.names_by_class)
+
+    def get_name(self, class_id):
+        return self.names_by_class.get(class_id)
+
+    def get_price(self, name):
+        return self.prices.get(name)
+
+    def find_name(self, text):
+        """Catalog spelling of a product name, matched case- and whitespace-insensitively"""
+        return self.names_by_key.get(normalize_name(text))
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('products', [])
+
+
+def read_sqlite(path):
+    # Read-only URI: a reader must never create an empty database by accident
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT class_id, name, price FROM products").fetchall()
+    finally:
+        conn.close()
+    return [{'class_id': class_id, 'name': name, 'price': price} for class_id, name, price in rows]
+
+
+def write_sqlite(path, products):
+    """Replace the products table of a SQLite catalog in one transaction"""
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.execute(SCHEMA)
+            conn.execute("DELETE FROM products")
+            conn.executemany(
+                "INSERT INTO products (class_id, name, price) VALUES (?, ?, ?)",
+                [(int(p['class_id']), p['name'], p['price']) for p in products]
+            )
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage the SQLite product catalog (running trackers reload it automatically)",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--db', type=str, default=DEFAULT_CATALOG_PATH,
+                       help='SQLite catalog')
+    parser.add_argument('--import-json', type=str, metavar='PATH',
+                       help='Replace the catalog with the products of a JSON file')
+    parser.add_argument('--set-price', nargs=2, metavar=('NAME', 'PRICE'),
+                       help='Update the price of a product')
+    args = parser.parse_args()
+
+    if args.import_json:
+        products = read_json(args.import_json)
+        write_sqlite(args.db, products)
+        print(f"✅ Imported {len(products)} rows from {args.import_json}")
+
+    catalog = ProductCatalog.load(args.db)
+    if args.set_price:
+        name, price = args.set_price
+        canonical = catalog.find_name(name)
+        if canonical is None:
+            raise SystemExit(f"❌ Unknown product: {name}")
+        conn = sqlite3.connect(args.db)
+        try:
+            with conn:
+                conn.execute("UPDATE products SET price = ? WHERE name = ?", (float(price), canonical))
+        finally:
+            conn.close()
+        print(f"✅ {canonical} now costs {float(price)}dt")
+        catalog = ProductCatalog.load(args.db)
+
+    for class_id in catalog.class_ids:
+        name = catalog.get_name(class_id)
+        print(f"{class_id:>4}  {name:<20} {catalog.get_price(name)}dt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+from fuzzywuzzy import fuzz  # For fuzzy matching
+
+
+class ProductMatcher:
+    """
+    Fuzzy-match OCR tokens to catalog names through an n-gram index.
+
+    Candidate names are the ones sharing the most character n-grams with the
+    token. Only those are scored with fuzz.partial_ratio, so a lookup costs the
+    size of the touched posting lists rather than one fuzzy comparison per
+    catalog entry. The best-scoring name wins, not the first one over the
+    threshold. Results are cached because OCR repeats the same strings often.
+
+    Args:
+        names (iterable): Catalog product names.
+        threshold (int): Minimum partial_ratio score for a match.
+        ngram (int): Character n-gram length used for the index.
+        max_candidates (int): Names scored per lookup.
+        cache_size (int): Cached lookups, 0 to disable the cache.
+    """
+
+    def __init__(self, names, threshold=80, ngram=3, max_candidates=20, cache_size=4096):
+        self.names = list(dict.fromkeys(names))
+        self.lowered = [name.lower() for name in self.names]
+        self.threshold = threshold
+        self.ngram = ngram
+        self.max_candidates = max_candidates
+
+        self.index = defaultdict(list)
+        for i, name in enumerate(self.lowered):
+            for gram in self._ngrams(name):
+                self.index[gram].append(i)
+
+        self.match = lru_cache(maxsize=cache_size)(self._match) if cache_size else self._match
+
+    def _ngrams(self, text):
+        padded = f" {text} "
+        return {padded[i:i + self.ngram] for i in range(max(1, len(padded) - self.ngram + 1))}
+
+    def candidates(self, word):
+        """Indices of the names sharing the most n-grams with the word"""
+        counts = Counter()
+        for gram in self._ngrams(word):
+            counts.update(self.index.get(gram, ()))
+        return [i for i, _ in counts.most_common(self.max_candidates)]
+
+    def _match(self, word):
+        word_lower = word.lower().strip()
+        if not word_lower:
+            return None
+
+        best_index, best_key = None, None
+        for i in self.candidates(word_lower):
+            # Use partial_ratio for better substring matching
+            score = fuzz.partial_ratio(word_lower, self.lowered[i])
+            if score < self.threshold:
+                continue
+            # Ties go to the name closest to the whole token, e.g. "Cup" over "Cupboard"
+            key = (score, fuzz.ratio(word_lower, self.lowered[i]))
+            if best_key is None or key > best_key:
+                best_index, best_key = i, key
+        return self.names[best_index] if best_index is not None else None
@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+
+
+class RedRegionDetector:
+    """
+    Find red regions with buffers that are allocated once per frame size.
+
+    The hue test is a single 256-entry LUT (red wraps around 0/180 in OpenCV
+    HSV), saturation/value are one inRange, and small regions are filtered
+    from connectedComponentsWithStats output with NumPy instead of a Python
+    loop over contours. With scale < 1 the mask is computed on a downscaled
+    frame and the boxes are scaled back to full resolution.
+
+    Like findContours(RETR_EXTERNAL), regions inside a hole of another red
+    region are not reported. Only components whose box lies within a larger
+    component's box are checked, with a flood fill of that box.
+
+    Args:
+        min_size (int): Regions must be wider and taller than this (full-res pixels).
+        scale (float): Downscale factor for detection, 1.0 for full resolution.
+        hue_ranges (tuple): Inclusive (low, high) hue ranges counted as red.
+        min_saturation (int): Lower saturation bound.
+        min_value (int): Lower value bound.
+    """
+
+    def __init__(self, min_size=10, scale=1.0, hue_ranges=((0, 10), (170, 180)),
+                 min_saturation=70, min_value=50):
+        if not 0 < scale <= 1:
+            raise ValueError("scale must be in (0, 1]")
+        self.min_size = min_size
+        self.scale = scale
+
+        self.hue_lut = np.zeros((1, 256), dtype=np.uint8)
+        for low, high in hue_ranges:
+            self.hue_lut[0, low:high + 1] = 255
+        self.sv_lower = np.array([0, min_saturation, min_value], dtype=np.uint8)
+        self.sv_upper = np.array([255, 255, 255], dtype=np.uint8)
+
+        self.input_shape = None
+
+    def _ensure_buffers(self, shape):
+        """(Re)allocate the work buffers when the input frame size changes"""
+        if shape == self.input_shape:
+            return
+        height, width = shape[:2]
+        self.work_size = (max(1, int(width * self.scale)), max(1, int(height * self.scale)))
+        work_w, work_h = self.work_size
+        self.small = np.empty((work_h, work_w, 3), dtype=np.uint8) if self.scale < 1 else None
+        self.hsv = np.empty((work_h, work_w, 3), dtype=np.uint8)
+        self.hue = np.empty((work_h, work_w), dtype=np.uint8)
+        self.hue_mask = np.empty((work_h, work_w), dtype=np.uint8)
+        self.sv_mask = np.empty((work_h, work_w), dtype=np.uint8)
+        self.mask = np.empty((work_h, work_w), dtype=np.uint8)
+        self.labels = np.empty((work_h, work_w), dtype=np.int32)
+        self.input_shape = shape
+
+    def mask_for(self, image):
+        """Binary red mask of the (possibly downscaled) image, a reused buffer"""
+        self._ensure_buffers(image.shape)
+        source = image
+        if self.small is not None:
+            source = cv2.resize(image, self.work_size, dst=self.small, interpolation=cv2.INTER_AREA)
+
+        cv2.cvtColor(source, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        cv2.extractChannel(self.hsv, 0, dst=self.hue)
+        cv2.LUT(self.hue, self.hue_lut, dst=self.hue_mask)
+        cv2.inRange(self.hsv, self.sv_lower, self.sv_upper, dst=self.sv_mask)
+        cv2.bitwise_and(self.hue_mask, self.sv_mask, dst=self.mask)
+        return self.mask
+
+    def detect(self, image):
+        """
+        Detect red-colored regions in the image.
+
+        Returns:
+            List of tuples: [(x, y, w, h), ...] in full-resolution pixels.
+        """
+        mask = self.mask_for(image)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, labels=self.labels, connectivity=8)
+        if count <= 1:
+            return []
+
+        boxes = stats[1:, :4]  # row 0 is the background
+        min_size = self.min_size * self.scale
+        keep = (boxes[:, 2] > min_size) & (boxes[:, 3] > min_size)
+        boxes = boxes[keep]
+        if len(boxes) > 1:
+            boxes = boxes[~self._nested(boxes, np.flatnonzero(keep) + 1)]
+        if self.scale < 1:
+            boxes = np.round(boxes / self.scale).astype(np.int64)
+        return [tuple(box) for box in boxes.tolist()]
+
+    def _nested(self, boxes, ids):
+        """Mask of the components (label ids) that lie in a hole of another one"""
+        x1, y1 = boxes[:, 0], boxes[:, 1]
+        x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+        area = boxes[:, 2].astype(np.int64) * boxes[:, 3]
+        # inside[i, j]: box j lies within the larger box i, so j may be in a hole of i
+        inside = ((x1[:, None] <= x1) & (y1[:, None] <= y1) & (x2[:, None] >= x2) & (y2[:, None] >= y2)
+                  & (area[:, None] > area))
+        nested = np.zeros(len(boxes), dtype=bool)
+        for i in np.flatnonzero(inside.any(axis=1)):
+            x, y, w, h = boxes[i]
+            # Component i alone with a 1 px margin, background reachable from outside becomes 2
+            region = np.zeros((h + 2, w + 2), dtype=np.uint8)
+            region[1:-1, 1:-1] = self.labels[y:y + h, x:x + w] == ids[i]
+            cv2.floodFill(region, None, (0, 0), 2)
+            for j in np.flatnonzero(inside[i] & ~nested):
+                jx, jy, jw, jh = boxes[j]
+                py, px = np.argwhere(self.labels[jy:jy + jh, jx:jx + jw] == ids[j])[0]
+                nested[j] = region[jy + py - y + 1, jx + px - x + 1] != 2
+        return nested
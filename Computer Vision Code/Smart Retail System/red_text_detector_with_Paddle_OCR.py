@@ -1,14 +1,96 @@
 from paddleocr import PaddleOCR
 import os
+import sys
 import cv2
 import numpy as np
+from red_regions import RedRegionDetector
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import metrics
 
 class RedTextDetector:
-    def __init__(self, frames_folder="analyze_frames"):
+    def __init__(self, frames_folder="analyze_frames", max_line_height=64, min_text_aspect=1.5,
+                 red_scale=1.0):
         self.frames_folder = frames_folder
+        # Red mask buffers are reused across frames of the same size
+        self.red_regions = RedRegionDetector(scale=red_scale)
+        # ROIs at most this tall and at least this wide/tall are treated as a single
+        # text line, so the text detector is skipped and they go straight to recognition
+        self.max_line_height = max_line_height
+        self.min_text_aspect = min_text_aspect
         # Initialize PaddleOCR
         self.ocr = PaddleOCR(use_angle_cls=True, lang='en')  # English language
 
+    def _is_text_line(self, roi):
+        h, w = roi.shape[:2]
+        return h <= self.max_line_height and w >= self.min_text_aspect * h
+
+    def recognize_regions(self, rois):
+        """
+        Recognize text in many ROIs with as few OCR calls as possible.
+
+        Tight single-line ROIs skip text detection and are recognized in batches,
+        grouped by aspect ratio so each batch pads to a similar width. Other ROIs
+        still need detection + recognition and are processed one by one.
+
+        Args:
+            rois (list): Image crops.
+
+        Returns:
+            List: Recognized text (or None) for each ROI, in input order.
+        """
+        texts = [None] * len(rois)
+
+        # Group text-line ROIs by aspect ratio bucket (powers of two)
+        groups = {}
+        full_ocr = []
+        for i, roi in enumerate(rois):
+            if roi.size == 0:
+                continue
+            if self._is_text_line(roi):
+                h, w = roi.shape[:2]
+                groups.setdefault(int(np.log2(w / h)), []).append(i)
+            else:
+                full_ocr.append(i)
+
+        for indices in groups.values():
+            # PaddleOCR 2.7 treats each top-level list item as a page, so the crops are
+            # wrapped as one page: with det=False that page's crops go through angle
+            # classification and recognition as batches, result is [[(text, score), ...]]
+            result = self.ocr.ocr([[rois[i] for i in indices]], det=False, cls=True)
+            lines = self._recognized_lines(result, len(indices))
+            if lines is None:
+                # Another PaddleOCR version: one call per crop is slower but unambiguous
+                metrics.inc('ocr_batch_fallbacks')
+                lines = [self._recognize_one(rois[i]) for i in indices]
+            for i, (text, score) in zip(indices, lines):
+                if text.strip():
+                    texts[i] = text
+
+        for i in full_ocr:
+            result = self.ocr.ocr(rois[i], cls=True)  # Perform OCR on the ROI
+            # Check if OCR result is valid
+            if result and result[0]:
+                texts[i] = " ".join([line[1][0] for line in result[0]])  # Extract recognized text
+
+        return texts
+
+    @staticmethod
+    def _recognized_lines(result, count):
+        """The (text, score) pairs of a det=False page of `count` crops, None if the result has another shape"""
+        if not result or len(result) != 1 or result[0] is None or len(result[0]) != count:
+            return None
+        lines = result[0]
+        if all(isinstance(line, (tuple, list)) and len(line) == 2 and isinstance(line[0], str)
+               for line in lines):
+            return lines
+        return None
+
+    def _recognize_one(self, roi):
+        result = self.ocr.ocr(roi, det=False, cls=True)
+        lines = self._recognized_lines(result, 1)
+        return lines[0] if lines else ('', 0.0)
+
     def _detect_red_regions(self, image):
         """
         Detect red-colored regions in the image.
@@ -20,39 +102,21 @@ class RedTextDetector:
             List of tuples: [(x, y, w, h), ...] representing bounding boxes of red regions.
         """
         try:
-            # Convert the image to HSV color space
-            hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-
-            # Define range for red color in HSV
-            lower_red1 = np.array([0, 70, 50])   # Lower bound for red (hue ~0-10)
-            upper_red1 = np.array([10, 255, 255])
-            lower_red2 = np.array([170, 70, 50]) # Upper bound for red (hue ~170-180)
-            upper_red2 = np.array([180, 255, 255])
-
-            # Create masks for red regions
-            mask1 = cv2.inRange(hsv_image, lower_red1, upper_red1)
-            mask2 = cv2.inRange(hsv_image, lower_red2, upper_red2)
-            red_mask = mask1 | mask2
-
-            # Find contours of red regions
-            contours, _ = cv2.findContours(red_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            # Extract bounding boxes of red regions
-            red_regions = []
-            for contour in contours:
-                x, y, w, h = cv2.boundingRect(contour)
-                if w > 10 and h > 10:  # Ignore very small regions
-                    red_regions.append((x, y, w, h))
-
-            return red_regions
+            return self.red_regions.detect(image)
         except Exception as e:
             print(f"⚠️ Error detecting red regions: {str(e)}")
             return []
 
-    def find_first_frame_with_red_text(self):
+    def find_first_frame_with_red_text(self, frame_files=None, frames=None):
         """
         Find the first frame (counting from the last) that contains red text.
 
+        Args:
+            frame_files (list): Frame paths to search (e.g. one customer's session),
+                defaults to the files in frames_folder.
+            frames (list): In-memory (name, image) pairs, oldest first, used instead
+                of reading files (e.g. ObjectTracker.frame_buffer.items()).
+
         Returns:
             Tuple: (frame_file, red_texts) where:
                 - frame_file: Name of the frame file.
@@ -60,16 +124,23 @@ class RedTextDetector:
         """
         try:
             # Load all frame files and sort them
-            frame_files = sorted(os.listdir(self.frames_folder))
-            total_frames = len(frame_files)
+            if frames is None:
+                if frame_files is None:
+                    frame_files = [
+                        os.path.join(self.frames_folder, name)
+                        for name in sorted(os.listdir(self.frames_folder))
+                    ]
+                frames = [(os.path.basename(path), path) for path in frame_files]
+            total_frames = len(frames)
 
             # Select only the last 20 frames (or fewer if total_frames < 20)
-            last_20_frames = frame_files[-20:] if total_frames >= 20 else frame_files
+            last_20_frames = frames[-20:] if total_frames >= 20 else frames
 
-            # Process each frame in reverse order
-            for frame_file in reversed(last_20_frames):
-                frame_path = os.path.join(self.frames_folder, frame_file)
-                frame = cv2.imread(frame_path)
+            # Collect red regions of every candidate frame, newest first
+            candidates = []
+            for frame_file, frame in reversed(last_20_frames):
+                if isinstance(frame, str):
+                    frame = cv2.imread(frame)
                 if frame is None:
                     print(f"⚠️ Failed to load frame: {frame_file}")
                     continue
@@ -79,27 +150,36 @@ class RedTextDetector:
 
                 # Check if red regions are found
                 if red_regions:
-                    print(f"\n✅ Found red text in frame: {frame_file}")
-                    print(f"Red regions (bounding boxes): {red_regions}")
-
-                    # Perform OCR on the red regions using PaddleOCR
-                    red_texts = []
-                    for i, (x, y, w, h) in enumerate(red_regions):
-                        roi = frame[y:y+h, x:x+w]
-                        result = self.ocr.ocr(roi, cls=True)  # Perform OCR on the ROI
-
-                        # Check if OCR result is valid
-                        if result and result[0]:
-                            text = " ".join([line[1][0] for line in result[0]])  # Extract recognized text
-                            print(f"Red text detected in region {i+1}: {text}")
-                            red_texts.append(text)
-                        else:
-                            print(f"No text detected in region {i+1}.")
-
-                    # If any red text was detected, return the frame and the texts
-                    if red_texts:
-                        print(f"Returning first frame with red text: {frame_file}")
-                        return frame_file, red_texts
+                    print(f"Red regions in {frame_file} (bounding boxes): {red_regions}")
+                    rois = [frame[y:y+h, x:x+w] for (x, y, w, h) in red_regions]
+                    candidates.append((frame_file, rois))
+
+            if not candidates:
+                print("\n❌ No frames with red text found.")
+                return None, []
+
+            # Perform OCR on every red region of every candidate frame in one batched pass
+            all_rois = [roi for _, rois in candidates for roi in rois]
+            with metrics.time('ocr'):
+                texts = self.recognize_regions(all_rois)
+            metrics.inc('ocr_regions', len(all_rois))
+
+            # Map per-region results back to frames, the newest frame with text wins
+            offset = 0
+            for frame_file, rois in candidates:
+                frame_texts = texts[offset:offset + len(rois)]
+                offset += len(rois)
+
+                red_texts = []
+                for i, text in enumerate(frame_texts):
+                    if text:
+                        print(f"Red text detected in {frame_file} region {i+1}: {text}")
+                        red_texts.append(text)
+
+                # If any red text was detected, return the frame and the texts
+                if red_texts:
+                    print(f"\n✅ Returning first frame with red text: {frame_file}")
+                    return frame_file, red_texts
 
             # If no red text is found
             print("\n❌ No frames with red text found.")
@@ -1,24 +1,73 @@
 import cv2
+import math
 from decimal import Decimal, InvalidOperation
 import numpy as np
 import mediapipe as mp
-from ultralytics import YOLO
 from datetime import datetime
 from bson.decimal128 import Decimal128
 from collections import deque
 import os
+import sys
 import time
-import requests  # For making HTTP requests
-import json      # For JSON handling
+from api_client import get_api_client
+from frame_buffer import AsyncFrameWriter, FrameRingBuffer
+from hand_tracking import HandTrackStore
+from red_regions import RedRegionDetector
+from product_catalog import ProductCatalog
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common import AdaptiveFrameSkip, FrameDisplay, FramePipeline, grab_frames, load_model, metrics
 
 class ObjectTracker:
 
-    def __init__(self):
+    DEFAULT_VIDEO_PATH = r"Test Videos\besttest.mp4"
+    DEFAULT_OUTPUT_PATH = r"Output Videos\Tracking and Identifying3.mp4"
+    DEFAULT_MODEL_PATH = r"Models\yolo11m.pt"
+
+    # COCO classes the tracker needs besides the products themselves
+    PERSON_CLASS_ID = 0
+    TABLE_CLASS_ID = 60
+    STRUCTURAL_NAMES = {PERSON_CLASS_ID: "Customer", TABLE_CLASS_ID: "Table"}
+    UNTRACKED = -1  # track id column of detections BoT-SORT has not confirmed yet
+
+    def __init__(self, headless=False, preview_path=None, preview_interval=5.0,
+                 video_path=DEFAULT_VIDEO_PATH, output_path=DEFAULT_OUTPUT_PATH,
+                 frames_dir='analyze_frames', model=None, hands=None, catalog=None,
+                 hand_roi_mode=False, hand_roi_padding=0.15, hand_roi_cell_size=320,
+                 frame_buffer_size=20, save_frames=False, red_capture=False, red_scale=0.5,
+                 render=True):
+        self.video_path = video_path
+        # Without rendering only the red off-table product labels (the OCR input) are drawn
+        self.render = render
+        self.catalog = catalog if catalog is not None else ProductCatalog.load()
+        self.output_path = output_path
+        self.frames_dir = frames_dir
+        
+        # Captured frames stay in memory for the red-text stage, JPEGs are debug-only.
+        # frame_buffer_size=0 disables capture for trackers without a red-text stage
+        self.frame_buffer = FrameRingBuffer(frame_buffer_size) if frame_buffer_size > 0 else None
+        self.frame_writer = AsyncFrameWriter(frames_dir) if save_frames else None
+        # Optionally check every processed frame for red regions and capture those too
+        self.red_detector = RedRegionDetector(scale=red_scale) if red_capture else None
+        
+        # Hand detection on padded person crops tiled into one image (see detect_hands)
+        self.hand_roi_mode = hand_roi_mode
+        self.hand_roi_padding = hand_roi_padding
+        self.hand_roi_cell_size = hand_roi_cell_size
+        
+        # Display (window, or headless with an optional low-rate preview)
+        self.display = FrameDisplay(
+            'Tracking Frame',
+            headless=headless,
+            preview_path=preview_path,
+            preview_interval=preview_interval
+        )
+        
         # Initialize directories
         self.create_directories()
         
-        # Initialize models
-        self.initialize_models()
+        # Initialize models (shared instances can be passed in by MultiStreamTracker)
+        self.initialize_models(model, hands)
         
         # Video setup
         self.setup_video_io()
@@ -27,32 +76,12 @@ class ObjectTracker:
         self.initialize_tracking_variables()
         
     def send_customer_count_to_api(self, customer_id):
-        """Send customer count to API endpoint"""
-        api_url = "http://localhost:3000/api/pcd0/admin/affect-id"
-        headers = {'Content-Type': 'application/json'}
-        payload = {'customer_Id': customer_id}
-        
-        try:
-            response = requests.post(
-                api_url,
-                data=json.dumps(payload),
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                print(f"Successfully sent customer count: {customer_id}")
-            else:
-                print(f"API Error: {response.status_code} - {response.text}")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to send to API: {str(e)}")
+        """Queue the customer count for the API endpoint (never blocks the frame loop)"""
+        get_api_client().send_customer_count(customer_id)
 
     @classmethod
     def send_customer_box_to_api(cls, data):
-        """Send customer purchase data to API endpoint"""
-        api_url = "http://localhost:3000/api/pcd0/admin/retrieve"
-        headers = {'Content-Type': 'application/json'}
-
+        """Queue customer purchase data for the API endpoint, returns True once queued"""
         # Helper function to convert Decimal128 and datetime objects
         def convert_for_json(obj):
             if isinstance(obj, Decimal128):
@@ -78,46 +107,43 @@ class ObjectTracker:
             'total_amount': convert_for_json(data['total_amount'])
         }
 
-        try:
-            response = requests.post(
-                api_url,
-                data=json.dumps(payload, default=convert_for_json),
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                print(f"✅ Successfully Updated: {data['customer_Id']}")
-                return True
-            else:
-                print(f"❌ API Error: {response.status_code} - {response.text}")
-                return False
-                
-        except requests.exceptions.RequestException as e:
-            print(f"🚨 Failed to send to API: {str(e)}")
-            return False      
+        if get_api_client().send_customer_box(payload):
+            print(f"📨 Queued update for: {data['customer_Id']}")
+        else:
+            print(f"🚨 API queue full, stored in outbox: {data['customer_Id']}")
+        return True
 
     def create_directories(self):
         """Create required directories if they don't exist"""
-        os.makedirs('analyze_frames', exist_ok=True)
-        os.makedirs('Output Videos', exist_ok=True)
+        output_dir = os.path.dirname(self.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
         
-    def initialize_models(self):
-        """Initialize MediaPipe and YOLO models"""
+    def initialize_models(self, model=None, hands=None):
+        """Initialize MediaPipe and YOLO models, reusing the given instances if any"""
         # MediaPipe Hands
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self.hands = hands if hands is not None else self.mp_hands.Hands(
             min_detection_confidence=0.5, 
             min_tracking_confidence=0.5
         )
         self.mp_drawing = mp.solutions.drawing_utils
+        # The ROI mosaic changes layout every frame, so it needs a static-image detector
+        self.roi_hands = self.mp_hands.Hands(
+            static_image_mode=True,
+            max_num_hands=10,
+            min_detection_confidence=0.5
+        ) if self.hand_roi_mode else None
+        self.hand_connections = np.array(list(self.mp_hands.HAND_CONNECTIONS), dtype=np.int32)
         
         # YOLO Model
-        self.model = YOLO(r"Models\yolo11m.pt")
+        self.model = model if model is not None else load_model(self.DEFAULT_MODEL_PATH)
+        # Only people, the table and catalog products go through NMS and tracking
+        self.track_classes = sorted(set(self.STRUCTURAL_NAMES) | set(self.catalog.class_ids))
         
     def setup_video_io(self):
         """Set up video input and output"""
         # Input video
-        self.video_path = r"Test Videos\besttest.mp4"
         self.cap = cv2.VideoCapture(self.video_path)
         
         if not self.cap.isOpened():
@@ -130,7 +156,6 @@ class ObjectTracker:
         self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
         
         # Output video
-        self.output_path = r"Output Videos\Tracking and Identifying3.mp4"
         self.fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         self.out = cv2.VideoWriter(
             self.output_path, 
@@ -149,211 +174,421 @@ class ObjectTracker:
         self.current_red_objects = set()
         
         # Hand tracking
-        self.hand_ids = {}
+        self.hands_by_track = {}
+        self._roi_mosaic = None
+        self.hand_tracks = HandTrackStore()
         self.hand_position_history = deque(maxlen=10)
         
         # People counting
         self.person_ids_crossed = set()
+        self.visible_people = {}
+        self.sessions = None  # optional SessionManager for per-customer streaming
         self.entry_counter = 0
         self.entrance_line_x = int(self.frame_width * 0.53)
         
         # Frame processing
         self.frame_skip = 3
+        self.skip_controller = None  # AdaptiveFrameSkip, see enable_adaptive_skip
+        self.last_read_time = None
+        self.frames_grabbed_only = 0
         self.frame_count = 0
         self.capture_interval = 3  # seconds
         self.last_capture_time = time.time()
         self.frame_number = 0
+        self.stage_stats = []
+        self.first_frame_time = None  # wall clock when the first frame was processed
         
-    def is_on_table(self, object_bbox):
-        """Check if an object is on the table"""
-        if self.table_bbox is None:
-            return False
-            
-        x1, y1, x2, y2 = object_bbox
-        tx1, ty1, tx2, ty2 = self.table_bbox
-        return y2 > ty1
-        
-    def update_hand_tracking(self, hand_id, new_position):
-        """Update hand position with smoothing"""
-        if hand_id not in self.hand_ids:
-            self.hand_ids[hand_id] = deque(maxlen=10)
-            
-        self.hand_ids[hand_id].append(new_position)
-        avg_position = np.mean(self.hand_ids[hand_id], axis=0)
-        return tuple(map(int, avg_position))
-        
-    def is_crossing_entrance_line(self, center_x, track_id):
-        """Check if a person is crossing the entrance line"""
-        if track_id not in self.person_ids_crossed:
-            if center_x > self.entrance_line_x:
-                self.person_ids_crossed.add(track_id)
-                return True
-        return False
+    def update_hand_tracking(self, wrists):
+        """Match wrists to stable hand IDs, returns [(hand_id, smoothed_position)]"""
+        return self.hand_tracks.update(wrists, self.video_time())
+
+    def video_time(self):
+        """Seconds into the video, wall clock for sources without an fps"""
+        # Video time keeps timeouts meaningful when processing faster than real time
+        return self.frame_count / self.fps if self.fps else time.time()
         
     def process_frame(self, frame):
         """Process a single frame"""
-        # Convert to grayscale for optical flow (if needed)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # A catalog edit can add or remove product classes
+        if self.catalog.maybe_reload():
+            self.track_classes = sorted(set(self.STRUCTURAL_NAMES) | set(self.catalog.class_ids))
         
         # Run YOLO tracking
-        results = self.model.track(
-            source=frame,
-            classes=list(range(80)),
-            tracker="botsort.yaml",
-            persist=True
-        )
+        with metrics.time('yolo_track'):
+            results = self.model.track(
+                source=frame,
+                classes=self.track_classes,
+                tracker="botsort.yaml",
+                persist=True
+            )
+            detections = results[0].boxes.data.cpu().numpy() if results and results[0].boxes else None
+        
+        with metrics.time('annotate'):
+            annotated = self.annotate_frame(frame, detections)
+        if self.first_frame_time is None:
+            self.first_frame_time = time.time()
+        return annotated
+
+    def annotate_frame(self, frame, detections):
+        """Apply tracked detections (x1, y1, x2, y2, id, conf, cls rows) to a frame"""
+        self.visible_people = {}
+        if detections is not None and len(detections):
+            self.process_detections(frame, detections)
         
-        if results and results[0].boxes:
-            self.process_detections(frame, results[0].boxes.data.cpu().numpy())
+        if self.sessions is not None:
+            self.sessions.observe(self.visible_people, self.entrance_line_x, self.video_time())
         
         # Display customer count in top-left corner (added this)
-        cv2.putText(frame, f"Total Customers: {self.entry_counter}", 
-                (20, 40),  # Position (x,y) - top-left corner
-                cv2.FONT_HERSHEY_SIMPLEX, 
-                1.0,  # Font scale (larger than before)
-                (0, 255, 255),  # Yellow color
-                2)  # Thickness
+        if self.render:
+            cv2.putText(frame, f"Total Customers: {self.entry_counter}", 
+                    (20, 40),  # Position (x,y) - top-left corner
+                    cv2.FONT_HERSHEY_SIMPLEX, 
+                    1.0,  # Font scale (larger than before)
+                    (0, 255, 255),  # Yellow color
+                    2)  # Thickness
         
         return frame
         
     def process_detections(self, frame, detections):
-        """Process all detections in a frame"""
-        for det in detections:
-            x1, y1, x2, y2, conf, class_id, track_id = det
-            track_id = int(track_id)
-            
-            # Get object name based on class ID
-            object_name = self.get_object_name(track_id)
-            
-            # Process person detection
-            if track_id == 0:
-                self.process_person(frame, x1, y1, x2, y2, track_id, object_name)
-            # Process table detection
-            elif track_id == 60:
-                self.process_table(frame, x1, y1, x2, y2, object_name)
-            # Process other objects
-            else:
-                self.process_object(frame, x1, y1, x2, y2, track_id, object_name)
+        """Process all detections in a frame, with array operations per class instead of per row"""
+        # Tracked rows are (x1, y1, x2, y2, track id, confidence, class id). On frames
+        # without confirmed tracks the rows have no id column: mark them untracked (-1)
+        if detections.shape[1] == 6:
+            detections = np.insert(detections, 4, self.UNTRACKED, axis=1)
+        class_ids = detections[:, -1].astype(np.int64)
+        is_person = class_ids == self.PERSON_CLASS_ID
+        is_table = class_ids == self.TABLE_CLASS_ID
+        is_product = ~(is_person | is_table)
+        
+        # Hands are detected once per frame, on the clean frame, for all people at once
+        person_rows = detections[is_person]
+        if len(person_rows):
+            with metrics.time('hands'):
+                self.detect_hands(frame, person_rows)
+        else:
+            self.hands_by_track = {}
+        
+        # Tables first, so products are checked against this frame's table
+        if is_table.any():
+            table_rows = detections[is_table]
+            self.table_bbox = tuple(table_rows[-1, :4])
+            if self.render:
+                self.draw_boxes(frame, table_rows, (255, 0, 0), [self.STRUCTURAL_NAMES[self.TABLE_CLASS_ID]] * len(table_rows))
+        
+        if len(person_rows):
+            self.process_people(frame, person_rows)
+        if is_product.any():
+            self.process_products(frame, detections[is_product], class_ids[is_product])
                 
-    def get_object_name(self, track_id):
-        """Get the name of an object based on its track ID"""
-        object_names = {
-            0:"Customer",
-            60: "Table",
-            24: "Bag",
-            26: "Bag",
-            44: "Spoon",
-            38: "Tennis Racket",
-            39: "Bottle of Water",
-            41: "Cup"
-        }
-        return object_names.get(track_id)
+    def get_object_name(self, class_id):
+        """Get the name of an object based on its class ID"""
+        if class_id in self.STRUCTURAL_NAMES:
+            return self.STRUCTURAL_NAMES[class_id]
+        return self.catalog.get_name(class_id)
         
-    def process_person(self, frame, x1, y1, x2, y2, track_id, object_name):
-        """Process a person detection"""
-        # Check for entrance crossing
-        center_x = int((x1 + x2) / 2)
-        if self.is_crossing_entrance_line(center_x, track_id):
+    def process_people(self, frame, person_rows):
+        """Record visible people, count entrance crossings and draw the person boxes"""
+        centers = ((person_rows[:, 0] + person_rows[:, 2]) / 2).astype(np.int64)
+        track_ids = person_rows[:, 4].astype(np.int64)
+        tracked = track_ids != self.UNTRACKED
+        self.visible_people = dict(zip(track_ids[tracked].tolist(), centers[tracked].tolist()))
+        
+        # Check for entrance crossing, only tracked people past the line need a per-track look
+        for track_id in track_ids[tracked & (centers > self.entrance_line_x)].tolist():
+            if track_id in self.person_ids_crossed:
+                continue
+            self.person_ids_crossed.add(track_id)
             self.entry_counter += 1
             print(f"People entered: {self.entry_counter}")
             # Send to API (added this)
             self.send_customer_count_to_api(self.entry_counter)
-            
-        # Hand detection
-        self.detect_hands(frame)
-        
-        # Draw person bounding box
-        color = (0, 255, 0)  # Green for person
-        self.draw_bounding_box(frame, x1, y1, x2, y2, color, f"Customer {self.entry_counter}")
-        
-    def process_table(self, frame, x1, y1, x2, y2, object_name):
-        """Process a table detection"""
-        self.table_bbox = (x1, y1, x2, y2)
-        color = (255, 0, 0)  # Blue for table
-        self.draw_bounding_box(frame, x1, y1, x2, y2, color, object_name)
-        
-    def process_object(self, frame, x1, y1, x2, y2, track_id, object_name):
-        """Process other object detections"""
-        if self.table_bbox and not self.is_on_table([x1, y1, x2, y2]):
-            color = (0, 0, 255)  # Red for objects not on table
-            self.current_red_objects.add(track_id)
+            if self.sessions is not None:
+                self.sessions.start(self.entry_counter, track_id, self.video_time())
+        
+        if self.render:
+            # Green for person
+            self.draw_boxes(frame, person_rows, (0, 255, 0), [f"Customer {self.entry_counter}"] * len(person_rows))
+        
+    def process_products(self, frame, product_rows, class_ids):
+        """Flag products that are off the table and draw the product boxes"""
+        # Objects whose bottom edge is not below the table top are off the table
+        if self.table_bbox is not None:
+            off_table = product_rows[:, 3] <= self.table_bbox[1]
         else:
-            color = (0, 255, 0)  # Green for objects on table
-            
-        self.draw_bounding_box(frame, x1, y1, x2, y2, color, object_name)
+            off_table = np.zeros(len(product_rows), dtype=bool)
+        red_ids = product_rows[off_table, 4].astype(np.int64)
+        self.current_red_objects.update(red_ids[red_ids != self.UNTRACKED].tolist())
+        
+        names = [self.get_object_name(class_id) for class_id in class_ids.tolist()]
+        # Red labels are always drawn: the red-text OCR stage reads product names from them
+        if off_table.any():
+            self.draw_boxes(frame, product_rows[off_table], (0, 0, 255),
+                            [name for name, off in zip(names, off_table.tolist()) if off])
+        if self.render and not off_table.all():
+            self.draw_boxes(frame, product_rows[~off_table], (0, 255, 0),
+                            [name for name, off in zip(names, off_table.tolist()) if not off])
+        
+    def detect_hands(self, frame, person_rows):
+        """
+        Detect hands once for the frame and attribute them to person tracks.
+
+        Args:
+            frame (numpy.ndarray): BGR frame, hands are drawn on it.
+            person_rows (numpy.ndarray): Person detections (x1, y1, x2, y2, id, conf, cls).
+
+        Returns:
+            dict: {track_id: [21x2 landmark pixel arrays]} also kept in self.hands_by_track.
+        """
+        if self.hand_roi_mode:
+            hands = self.detect_hands_in_rois(frame, person_rows)
+        else:
+            hands = self.detect_hands_full_frame(frame, person_rows)
         
-    def detect_hands(self, frame):
-        """Detect and draw hand landmarks"""
+        self.hands_by_track = {}
+        for track_id, points in hands:
+            self.hands_by_track.setdefault(track_id, []).append(points)
+            if self.render:
+                self.draw_hand(frame, points)
+            
+        if hands:
+            smoothed = self.update_hand_tracking([points[0] for _, points in hands])
+            if self.render:
+                for _, smoothed_hand_position in smoothed:
+                    cv2.circle(frame, smoothed_hand_position, 5, (0, 0, 255), -1)
+        return self.hands_by_track
+
+    def detect_hands_full_frame(self, frame, person_rows):
+        """Run the hand model on the whole frame, owner = person box holding the wrist"""
+        height, width = frame.shape[:2]
         rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         results_hands = self.hands.process(rgb_frame)
         
-        if results_hands.multi_hand_landmarks:
-            for hand_landmarks in results_hands.multi_hand_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    frame, 
-                    hand_landmarks, 
-                    self.mp_hands.HAND_CONNECTIONS
-                )
-                
-                hand_id = len(self.hand_ids)
-                hand_positions = [
-                    (landmark.x * self.frame_width, landmark.y * self.frame_height) 
-                    for landmark in hand_landmarks.landmark
-                ]
-                smoothed_hand_position = self.update_hand_tracking(hand_id, hand_positions[0])
-                cv2.circle(frame, smoothed_hand_position, 5, (0, 0, 255), -1)
+        hands = []
+        for hand_landmarks in results_hands.multi_hand_landmarks or []:
+            points = np.array(
+                [(landmark.x, landmark.y) for landmark in hand_landmarks.landmark]
+            ) * (width, height)
+            hands.append((self.find_hand_owner(points[0], person_rows), points))
+        return hands
+
+    def find_hand_owner(self, wrist, person_rows):
+        """Track ID of the person box containing (or nearest to) the wrist"""
+        boxes = person_rows[:, :4]
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        inside = (
+            (boxes[:, 0] <= wrist[0]) & (wrist[0] <= boxes[:, 2]) &
+            (boxes[:, 1] <= wrist[1]) & (wrist[1] <= boxes[:, 3])
+        )
+        distances = np.linalg.norm(centers - wrist, axis=1)
+        distances[~inside] += 1e6  # prefer containing boxes, fall back to nearest
+        return int(person_rows[np.argmin(distances), 4])
+
+    def detect_hands_in_rois(self, frame, person_rows):
+        """
+        Run the hand model once on a mosaic of padded person crops.
+
+        Each crop is scaled into a square cell of a grid image, so one inference
+        covers every person and the cost follows the crops, not the frame size.
+        Landmarks are mapped back to frame pixels through their cell.
+        """
+        height, width = frame.shape[:2]
+        cell = self.hand_roi_cell_size
+        
+        crops = []
+        for row in person_rows:
+            x1, y1, x2, y2 = row[:4]
+            pad_x = (x2 - x1) * self.hand_roi_padding
+            pad_y = (y2 - y1) * self.hand_roi_padding
+            cx1, cy1 = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+            cx2, cy2 = min(width, int(x2 + pad_x)), min(height, int(y2 + pad_y))
+            if cx2 > cx1 and cy2 > cy1:
+                crops.append((int(row[4]), cx1, cy1, frame[cy1:cy2, cx1:cx2]))
+        if not crops:
+            return []
+        
+        cols = math.ceil(math.sqrt(len(crops)))
+        rows = math.ceil(len(crops) / cols)
+        mosaic_shape = (rows * cell, cols * cell, 3)
+        if self._roi_mosaic is None or self._roi_mosaic.shape != mosaic_shape:
+            self._roi_mosaic = np.zeros(mosaic_shape, dtype=np.uint8)
+        else:
+            self._roi_mosaic.fill(0)
+        
+        placements = []
+        for i, (track_id, cx1, cy1, crop) in enumerate(crops):
+            scale = cell / max(crop.shape[:2])
+            resized = cv2.resize(crop, (int(crop.shape[1] * scale), int(crop.shape[0] * scale)))
+            oy, ox = (i // cols) * cell, (i % cols) * cell
+            self._roi_mosaic[oy:oy + resized.shape[0], ox:ox + resized.shape[1]] = resized
+            placements.append((track_id, ox, oy, scale, cx1, cy1))
+        
+        rgb_mosaic = cv2.cvtColor(self._roi_mosaic, cv2.COLOR_BGR2RGB)
+        results_hands = self.roi_hands.process(rgb_mosaic)
+        
+        hands = []
+        for hand_landmarks in results_hands.multi_hand_landmarks or []:
+            points = np.array(
+                [(landmark.x, landmark.y) for landmark in hand_landmarks.landmark]
+            ) * (mosaic_shape[1], mosaic_shape[0])
+            index = int(points[0, 1] // cell) * cols + int(points[0, 0] // cell)
+            if not 0 <= index < len(placements):
+                continue
+            track_id, ox, oy, scale, cx1, cy1 = placements[index]
+            hands.append((track_id, (points - (ox, oy)) / scale + (cx1, cy1)))
+        return hands
+
+    def draw_hand(self, frame, points):
+        """Draw hand landmarks given in frame pixel coordinates"""
+        pixels = points.astype(np.int32)
+        # All bones in one polylines call
+        cv2.polylines(frame, list(pixels[self.hand_connections]), False, (224, 224, 224), 2)
+        for x, y in pixels.tolist():
+            cv2.circle(frame, (x, y), 3, (0, 0, 255), -1)
                 
-    def draw_bounding_box(self, frame, x1, y1, x2, y2, color, label):
-        """Draw bounding box and label on frame"""
-        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
-        cv2.putText(frame, label, (int(x1), int(y2) + 20),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    def draw_boxes(self, frame, rows, color, labels):
+        """Draw the bounding boxes of several detections in one color, with their labels"""
+        corners = rows[:, :4].astype(np.int32)
+        # Outline every box with one polylines call
+        outlines = corners[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        cv2.polylines(frame, list(outlines), True, color, 2)
+        for (x1, _, _, y2), label in zip(corners.tolist(), labels):
+            cv2.putText(frame, label, (x1, y2 + 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
                    
     def save_frame_periodically(self, frame):
-        """Save frame every specified interval"""
+        """Capture frame into the frame buffer every interval, or when it shows red regions"""
+        if self.frame_buffer is None and self.frame_writer is None:
+            return
         current_time = time.time()
-        if current_time - self.last_capture_time >= self.capture_interval:
-            frame_filename = f"analyze_frames/frame_{self.frame_number:04d}.jpg"
-            cv2.imwrite(frame_filename, frame)
-            print(f"Saved frame to {frame_filename}")
+        interval_elapsed = current_time - self.last_capture_time >= self.capture_interval
+        has_red = self.red_detector is not None and bool(self.red_detector.detect(frame))
+        if interval_elapsed or has_red:
+            frame_filename = f"frame_{self.frame_number:04d}.jpg"
+            seq = self.frame_buffer.push(frame, frame_filename) if self.frame_buffer is not None else None
+            if self.frame_writer is not None:
+                self.frame_writer.write(frame_filename, frame)
+            if self.sessions is not None and seq is not None:
+                self.sessions.add_frame(seq)
             self.frame_number += 1
             self.last_capture_time = current_time
             
-    def run(self):
-        """Main processing loop"""
+    def enable_adaptive_skip(self, target_fps=None, max_skip=10):
+        """Adjust frame_skip on the fly to keep up with target_fps (default: the video fps, i.e. real time)"""
+        self.skip_controller = AdaptiveFrameSkip(
+            target_fps or self.fps or 30,
+            max_skip=max(max_skip, self.frame_skip),
+            initial_skip=self.frame_skip
+        )
+
+    def read_next_frame(self):
+        """Return the next frame selected by frame_skip, None at end of stream"""
+        with metrics.time('decode'):
+            return self._grab_and_read()
+
+    def _grab_and_read(self):
+        if not self.cap.isOpened():
+            return None
+
+        if self.skip_controller is not None:
+            # Time per selected frame, including waiting on a full queue when pipelined
+            now = time.perf_counter()
+            if self.last_read_time is not None:
+                self.frame_skip = self.skip_controller.update(now - self.last_read_time)
+            self.last_read_time = now
+
+        # Frames in between are grabbed but never retrieved (no BGR conversion or copy)
+        grabbed = grab_frames(self.cap, self.frame_skip - 1)
+        self.frame_count += grabbed
+        self.frames_grabbed_only += grabbed
+        if grabbed < self.frame_skip - 1:
+            return None
+
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.frame_count += 1
+        return frame
+
+    def print_video_info(self):
+        """Print input video properties"""
         print(f"Starting video processing: {self.video_path}")
         print(f"Frame dimensions: {self.frame_width}x{self.frame_height}")
         print(f"FPS: {self.fps}, Total frames: {self.total_frames}")
+
+    def run(self):
+        """Main processing loop"""
+        self.print_video_info()
         
-        while self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
+        while True:
+            frame = self.read_next_frame()
+            if frame is None:
                 break
                 
-            self.frame_count += 1
-            if self.frame_count % self.frame_skip != 0:
-                continue
-                
             # Process frame
             processed_frame = self.process_frame(frame)
             
-            # Write to output video
-            self.out.write(processed_frame)
-            
-            # Display
-            cv2.imshow('Tracking Frame', processed_frame)
+            # Write to output video and save frame periodically
+            self._write_frame(processed_frame)
             
-            # Save frame periodically
-            self.save_frame_periodically(processed_frame)
-            
-            # Check for quit command
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+            # Display (checks for quit command)
+            with metrics.time('display'):
+                keep_running = self.display.show(processed_frame)
+            if not keep_running:
                 break
                 
-        # Cleanup
+        self.finish()
+
+    def run_pipelined(self, decode_queue_size=4, sink_queue_size=4):
+        """
+        Processing loop with decode, inference and encode on separate threads.
+
+        Frames flow through bounded queues, so a slow stage applies backpressure
+        to the one before it instead of growing memory. Per-stage throughput is
+        printed at the end and kept in self.stage_stats.
+
+        Args:
+            decode_queue_size (int): Frames buffered between decoder and inference.
+            sink_queue_size (int): Frames buffered between inference and encoder.
+        """
+        self.print_video_info()
+        pipeline = FramePipeline(
+            self.read_next_frame,
+            self._infer_and_display,
+            self._write_frame,
+            decode_queue_size=decode_queue_size,
+            sink_queue_size=sink_queue_size
+        )
+        
+        try:
+            pipeline.run()
+        finally:
+            self.stage_stats = pipeline.report()
+            pipeline.print_report()
+            self.finish()
+
+    def _infer_and_display(self, frame):
+        """Inference stage of the pipelined loop, returns None to stop"""
+        processed_frame = self.process_frame(frame)
+        with metrics.time('display'):
+            keep_running = self.display.show(processed_frame)
+        if not keep_running:
+            return None
+        return processed_frame
+
+    def _write_frame(self, frame):
+        """Encoder/sink stage: output video and periodic captures"""
+        with metrics.time('video_write'):
+            self.out.write(frame)
+        with metrics.time('frame_capture'):
+            self.save_frame_periodically(frame)
+
+    def finish(self):
+        """Release video resources and verify the output file"""
         self.cap.release()
         self.out.release()
-        cv2.destroyAllWindows()
+        self.display.close()
+        if self.frame_writer is not None:
+            self.frame_writer.close()
         print("Processing completed successfully")
         
         # Verify output file
@@ -0,0 +1,97 @@
+import os
+
+import cv2
+import numpy as np
+
+
+def clip_path(clip_dir, width, height, frames, source=None):
+    """Cache path of a benchmark clip, one file per (source, resolution, length)"""
+    name = os.path.splitext(os.path.basename(source))[0].replace(' ', '_') if source else 'synthetic'
+    return os.path.join(clip_dir, f"{name}_{width}x{height}_{frames}.mp4")
+
+
+def make_synthetic_clip(path, width, height, frames, fps=30, seed=0):
+    """
+    Write a deterministic clip: textured background, moving boxes and red labels.
+
+    The texture keeps the encoder and decoder honest (flat frames decode for
+    free), the red labels give the red-region and OCR stages real work.
+    """
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    boxes = [
+        (rng.uniform(0, width), rng.uniform(0, height), rng.uniform(-6, 6), rng.uniform(-4, 4),
+         tuple(int(c) for c in rng.integers(0, 255, 3)))
+        for _ in range(6)
+    ]
+    labels = ["Bottle of Water", "Cup", "Spoon"]
+    scale = height / 720
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Could not create clip: {path}")
+    try:
+        for i in range(frames):
+            frame = np.roll(background, i * 2, axis=1)
+            for j, (x, y, dx, dy, color) in enumerate(boxes):
+                cx = int((x + dx * i) % width)
+                cy = int((y + dy * i) % height)
+                w, h = int(120 * scale), int(200 * scale)
+                cv2.rectangle(frame, (cx, cy), (cx + w, cy + h), color, -1)
+                if j < len(labels):
+                    cv2.rectangle(frame, (cx, cy), (cx + w, cy + h), (0, 0, 255), 2)
+                    cv2.putText(frame, labels[j], (cx, cy + h + int(20 * scale)),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6 * max(scale, 0.5), (0, 0, 255), 2)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def make_recorded_clip(source, path, width, height, frames):
+    """Resize the first `frames` frames of a recorded video (looping if it is shorter)"""
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video file: {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    written = 0
+    try:
+        while written < frames:
+            ret, frame = cap.read()
+            if not ret:
+                if written == 0:
+                    raise IOError(f"No frames in {source}")
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            writer.write(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+            written += 1
+    finally:
+        cap.release()
+        writer.release()
+    return path
+
+
+def get_clip(clip_dir, width, height, frames, source=None):
+    """Return a cached clip at the given resolution, building it on first use"""
+    os.makedirs(clip_dir, exist_ok=True)
+    path = clip_path(clip_dir, width, height, frames, source)
+    if not os.path.exists(path):
+        if source:
+            make_recorded_clip(source, path, width, height, frames)
+        else:
+            make_synthetic_clip(path, width, height, frames)
+    return path
+
+
+def load_frames(path, count):
+    """Decode up to `count` frames into memory"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from clips import get_clip, load_frames
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common.inference_backend import available_backends, load_model, record_benchmark, variant_key
+
+
+def box_iou(a, b):
+    """Pairwise IoU of two (N, 4) and (M, 4) xyxy arrays"""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def detections(result):
+    boxes = result.boxes
+    if boxes is None or not len(boxes):
+        return np.zeros((0, 4)), np.zeros(0, dtype=int), np.zeros(0)
+    return boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy().astype(int), boxes.conf.cpu().numpy()
+
+
+def agreement(reference, candidate, iou_threshold=0.5):
+    """
+    How closely a backend reproduces the PyTorch detections.
+
+    Boxes are greedily matched by IoU within the same class. Precision and
+    recall are measured against PyTorch as the reference, not ground truth.
+    """
+    matched = ref_total = cand_total = 0
+    ious, conf_diffs = [], []
+    for (ref_boxes, ref_cls, ref_conf), (boxes, cls, conf) in zip(reference, candidate):
+        ref_total += len(ref_boxes)
+        cand_total += len(boxes)
+        if not len(ref_boxes) or not len(boxes):
+            continue
+        iou = box_iou(ref_boxes, boxes)
+        iou[ref_cls[:, None] != cls[None, :]] = 0
+        while True:
+            i, j = np.unravel_index(np.argmax(iou), iou.shape)
+            if iou[i, j] < iou_threshold:
+                break
+            matched += 1
+            ious.append(iou[i, j])
+            conf_diffs.append(abs(ref_conf[i] - conf[j]))
+            iou[i, :] = 0
+            iou[:, j] = 0
+
+    precision = matched / cand_total if cand_total else 1.0
+    recall = matched / ref_total if ref_total else 1.0
+    return {
+        'reference_boxes': ref_total,
+        'boxes': cand_total,
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        'mean_iou': round(float(np.mean(ious)), 4) if ious else None,
+        'mean_conf_diff': round(float(np.mean(conf_diffs)), 4) if conf_diffs else None,
+    }
+
+
+def run_variant(weights, frames, backend, int8, imgsz, calibration_data, warmup):
+    load_start = time.perf_counter()
+    model = load_model(weights, backend, int8=int8, imgsz=imgsz, calibration_data=calibration_data)
+    load_seconds = time.perf_counter() - load_start
+    if model.backend_name.split('-')[0] != backend:
+        raise RuntimeError(f"{backend} export failed")
+
+    for frame in frames[:warmup]:
+        model.predict(frame, imgsz=imgsz, verbose=False)
+    latencies, outputs = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        result = model.predict(frame, imgsz=imgsz, verbose=False)[0]
+        latencies.append((time.perf_counter() - t0) * 1000)
+        outputs.append(detections(result))
+    latencies = np.array(latencies)
+    return outputs, {
+        'load_seconds': round(load_seconds, 2),
+        'mean_ms': round(float(latencies.mean()), 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'fps': round(1000 / float(latencies.mean()), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency and accuracy of ONNX Runtime / OpenVINO exports against PyTorch",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--weights', type=str, required=True,
+                       help='YOLO .pt weights (e.g. yolo11m.pt, Models/best.pt)')
+    parser.add_argument('--clip', type=str, default=None,
+                       help='Recorded video to evaluate on, a synthetic clip if omitted')
+    parser.add_argument('--resolution', type=str, default='1280x720',
+                       help='Clip resolution, WIDTHxHEIGHT')
+    parser.add_argument('--frames', type=int, default=100,
+                       help='Frames timed per variant')
+    parser.add_argument('--warmup', type=int, default=5,
+                       help='Unmeasured frames per variant')
+    parser.add_argument('--imgsz', type=int, default=640,
+                       help='Inference size, exports are built for it')
+    parser.add_argument('--no-int8', action='store_true',
+                       help='Skip the INT8 variants')
+    parser.add_argument('--calibration-data', type=str, default=None,
+                       help='Dataset YAML for OpenVINO INT8 calibration')
+    parser.add_argument('--min-f1', type=float, default=0.9,
+                       help='Variants below this agreement with PyTorch are never auto-selected')
+    parser.add_argument('--no-record', action='store_true',
+                       help='Do not store the timings used by --backend auto')
+    parser.add_argument('--output', type=str, default='backend_comparison.json',
+                       help='Where to write the report')
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.lower().split('x'))
+    clip_dir = os.path.join(tempfile.gettempdir(), 'vision_benchmark_clips')
+    clip = get_clip(clip_dir, width, height, args.frames + args.warmup, args.clip)
+    frames = load_frames(clip, args.frames + args.warmup)
+
+    variants = [('pytorch', False)]
+    for backend in ('onnx', 'openvino'):
+        if backend in available_backends():
+            variants.append((backend, False))
+            if not args.no_int8:
+                variants.append((backend, True))
+
+    reference = None
+    results = {}
+    for backend, int8 in variants:
+        key = variant_key(backend, int8, args.imgsz)
+        print(f"⏱️ {key} ...", flush=True)
+        try:
+            outputs, timing = run_variant(args.weights, frames, backend, int8, args.imgsz,
+                                          args.calibration_data, args.warmup)
+        except Exception as e:
+            print(f"   ❌ {str(e)}")
+            results[key] = {'status': 'error', 'error': str(e)}
+            continue
+        if reference is None:
+            reference = outputs[args.warmup:]
+        results[key] = {'status': 'ok', **timing, 'agreement': agreement(reference, outputs[args.warmup:])}
+        print(f"   {timing['mean_ms']} ms/frame ({timing['fps']} fps), "
+              f"F1 vs PyTorch {results[key]['agreement']['f1']}")
+
+    baseline = results.get(variant_key('pytorch', False, args.imgsz), {}).get('mean_ms')
+    print(f"\n{'variant':<22} {'mean ms':>8} {'p95 ms':>8} {'speedup':>8} {'F1':>7} {'mIoU':>7}")
+    for key, r in results.items():
+        if r['status'] != 'ok':
+            continue
+        speedup = round(baseline / r['mean_ms'], 2) if baseline else None
+        r['speedup_vs_pytorch'] = speedup
+        print(f"{key:<22} {r['mean_ms']:>8} {r['p95_ms']:>8} {speedup:>8} "
+              f"{r['agreement']['f1']:>7} {r['agreement']['mean_iou'] or '-':>7}")
+
+    if not args.no_record:
+        accurate = {key: r['mean_ms'] for key, r in results.items()
+                    if r['status'] == 'ok' and r['agreement']['f1'] >= args.min_f1}
+        if accurate:
+            record_benchmark(args.weights, accurate)
+            print(f"💾 Recorded timings for --backend auto: fastest is {min(accurate, key=accurate.get)}")
+
+    report = {
+        'weights': args.weights,
+        'clip': args.clip or 'synthetic',
+        'resolution': args.resolution,
+        'frames': len(frames) - args.warmup,
+        'imgsz': args.imgsz,
+        'variants': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"📄 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
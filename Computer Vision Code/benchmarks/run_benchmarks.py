@@ -0,0 +1,415 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from clips import get_clip, load_frames
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from vision_common.event_clips import EventClipRecorder
+from vision_common.inference_backend import BACKENDS, load_model
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_DIR = os.path.dirname(BENCHMARK_DIR)
+RETAIL_DIR = os.path.join(CODE_DIR, "Smart Retail System")
+FIRE_DIR = os.path.join(CODE_DIR, "Fire Detection")
+FIRE_SCRIPT = os.path.join(FIRE_DIR, "Fire Detection System.py")
+FALL_SCRIPT = os.path.join(CODE_DIR, "Fall Detection", "Fall Detection.py")
+
+PIPELINES = ('retail', 'retail-multi', 'red-regions', 'red-text', 'fire', 'fire-service', 'fall')
+# Pipelines benchmarked once per --streams count
+MULTI_STREAM_PIPELINES = ('retail-multi', 'fire-service')
+RESULT_MARKER = "BENCHMARK_RESULT "
+
+
+def import_script(path, name):
+    """Import a pipeline script whose file name is not a valid module name"""
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- pipeline steps -----------------------------------------------------------
+# Each setup function returns step(), which processes the next unit of work and
+# returns how many frames it covered (0 when the clip is exhausted).
+
+def setup_retail(case, workdir):
+    sys.path.insert(0, RETAIL_DIR)
+    from tracking_and_identifying import ObjectTracker
+
+    tracker = ObjectTracker(
+        headless=True,
+        video_path=case['clip'],
+        output_path=os.path.join(workdir, 'retail.mp4'),
+        frames_dir=os.path.join(workdir, 'analyze_frames'),
+        model=load_model(case['models']['retail'], case['backend'])
+    )
+    tracker.frame_skip = 1
+
+    def step():
+        frame = tracker.read_next_frame()
+        if frame is None:
+            return 0
+        tracker._write_frame(tracker.process_frame(frame))
+        return 1
+    return step
+
+
+def setup_retail_multi(case, workdir):
+    sys.path.insert(0, RETAIL_DIR)
+    from multi_stream_tracker import MultiStreamTracker
+
+    tracker = MultiStreamTracker(
+        [case['clip']] * case['streams'],
+        output_dir=workdir,
+        batch_size=case['streams'],
+        frame_skip=1,
+        headless=True,
+        model_path=case['models']['retail'],
+        backend=case['backend']
+    )
+
+    def step():
+        batch = tracker.read_batch()
+        if not batch:
+            return 0
+        results = tracker.infer([frame for _, frame in batch])
+        for (stream, frame), result in zip(batch, results):
+            tracker.update_stream(stream, frame, result)
+        return len(batch)
+    return step
+
+
+def setup_red_regions(case, workdir):
+    sys.path.insert(0, RETAIL_DIR)
+    from red_regions import RedRegionDetector
+
+    detector = RedRegionDetector(scale=0.5)
+    frames = iter(load_frames(case['clip'], case['frames'] + case['warmup']))
+
+    def step():
+        frame = next(frames, None)
+        if frame is None:
+            return 0
+        detector.detect(frame)
+        return 1
+    return step
+
+
+def setup_red_text(case, workdir):
+    sys.path.insert(0, RETAIL_DIR)
+    from red_text_detector_with_Paddle_OCR import RedTextDetector
+
+    detector = RedTextDetector(frames_folder=workdir)
+    frames = iter(enumerate(load_frames(case['clip'], case['frames'] + case['warmup'])))
+
+    def step():
+        item = next(frames, None)
+        if item is None:
+            return 0
+        index, frame = item
+        detector.find_first_frame_with_red_text(frames=[(f"frame_{index:04d}.jpg", frame)])
+        return 1
+    return step
+
+
+def setup_fire(case, workdir):
+    fire = import_script(FIRE_SCRIPT, 'fire_detection_system')
+    detector = fire.FireSmokeDetector(
+        headless=True,
+        model_path=case['models']['fire'],
+        video_path=case['clip'],
+        output_path=os.path.join(workdir, 'fire.mp4'),
+        backend=case['backend'],
+        clips_dir=os.path.join(workdir, 'fire_clips')
+    )
+
+    def step():
+        ret, frame = detector.cap.read()
+        if not ret:
+            return 0
+        # Alerts are left out: they measure the network, not the pipeline
+        processed_frame, _, _ = detector.process_frame(frame)
+        detector.output(processed_frame)
+        return 1
+    return step
+
+
+def setup_fire_service(case, workdir):
+    sys.path.insert(0, FIRE_DIR)
+    from fire_service import Camera, FireMonitoringService
+
+    cameras = [Camera(index, case['clip']) for index in range(case['streams'])]
+    service = FireMonitoringService(
+        cameras,
+        model_path=case['models']['fire'],
+        batch_size=case['streams'],
+        backend=case['backend']
+    )
+
+    def step():
+        # The camera readers run ahead on their own threads, wait for the next frames
+        while not service.finished:
+            read = service.tick()
+            if read:
+                return read
+            time.sleep(0.001)
+        return 0
+    return step
+
+
+def setup_fall(case, workdir):
+    fall = import_script(FALL_SCRIPT, 'fall_detection')
+    model = load_model(case['models']['fall'], case['backend'])
+    classnames = [model.names[i] for i in sorted(model.names)]
+    cap = cv2.VideoCapture(case['clip'])
+    clips = EventClipRecorder(os.path.join(workdir, 'fall_clips'), 30, name='fall-clips')
+
+    def step():
+        ret, frame = cap.read()
+        if not ret:
+            return 0
+        frame = cv2.resize(frame, (980, 740))
+        fall.detect_falls(model, classnames, frame)
+        clips.push(frame)
+        return 1
+    return step
+
+
+SETUPS = {
+    'retail': setup_retail,
+    'retail-multi': setup_retail_multi,
+    'red-regions': setup_red_regions,
+    'red-text': setup_red_text,
+    'fire': setup_fire,
+    'fire-service': setup_fire_service,
+    'fall': setup_fall,
+}
+
+
+# --- measurement ----------------------------------------------------------------
+
+def peak_rss_mb():
+    """Peak resident memory of this process, None if it cannot be measured here"""
+    try:
+        import resource   # Unix only
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        # peak_wset is the Windows peak working set, other platforms only report the current RSS
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure(step, frames, warmup):
+    """Run warm-up steps, then time steps until `frames` frames are covered"""
+    for _ in range(warmup):
+        if not step():
+            break
+
+    latencies = []
+    covered = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    while covered < frames:
+        t0 = time.perf_counter()
+        count = step()
+        if not count:
+            break
+        latencies.append((time.perf_counter() - t0) * 1000)
+        covered += count
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'frames': covered,
+        'steps': len(latencies),
+        'wall_seconds': round(wall, 3),
+        'fps': round(covered / wall, 2) if wall else 0.0,
+        'latency_ms': {
+            'mean': round(float(latencies.mean()), 2),
+            'p50': round(float(np.percentile(latencies, 50)), 2),
+            'p95': round(float(np.percentile(latencies, 95)), 2),
+            'p99': round(float(np.percentile(latencies, 99)), 2),
+            'max': round(float(latencies.max()), 2),
+        },
+        # CPU seconds per wall second: 1.0 is one core fully busy
+        'cpu_cores_used': round(cpu / wall, 2) if wall else 0.0,
+        'cpu_utilization_percent': round(100 * cpu / wall / (os.cpu_count() or 1), 1) if wall else 0.0,
+    }
+
+
+def run_case(case):
+    """Child-process entry point: set up one pipeline and measure it"""
+    with tempfile.TemporaryDirectory(prefix='vision-bench-') as workdir:
+        # Hub weights are downloaded (and exports cached) once in the model directory
+        os.makedirs(case['model_dir'], exist_ok=True)
+        os.chdir(case['model_dir'])
+        setup_start = time.perf_counter()
+        step = SETUPS[case['pipeline']](case, workdir)
+        setup_seconds = time.perf_counter() - setup_start
+        # API outboxes, frame dumps and the like land in the scratch directory
+        os.chdir(workdir)
+        result = measure(step, case['frames'], case['warmup'])
+    result['setup_seconds'] = round(setup_seconds, 3)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_in_subprocess(case, timeout):
+    """Run one case in a fresh interpreter so peak RSS and model caches do not leak between cases"""
+    command = [sys.executable, os.path.abspath(__file__), '--child', json.dumps(case)]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout, cwd=BENCHMARK_DIR)
+    except subprocess.TimeoutExpired:
+        return {'status': 'timeout'}
+
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    error = (completed.stderr.strip().splitlines() or ['no output'])[-1]
+    return {'status': 'error', 'error': error}
+
+
+def case_key(result):
+    return (result['pipeline'], result['resolution'], result['streams'], result.get('backend', 'pytorch'))
+
+
+def compare(baseline_path, results):
+    """Print fps of this run relative to a previous results file"""
+    with open(baseline_path, 'r') as f:
+        baseline = {case_key(r): r for r in json.load(f)['results'] if r.get('status') == 'ok'}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get(case_key(result))
+        if result.get('status') != 'ok' or old is None or not old['fps']:
+            continue
+        change = 100 * (result['fps'] / old['fps'] - 1)
+        print(f"{result['pipeline']:<13} {result['resolution']:>10} x{result['streams']:<3} "
+              f"{old['fps']:>8} -> {result['fps']:>8} fps ({change:+.1f}%)")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=CODE_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless throughput benchmark of the vision pipelines on fixed clips",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=list(PIPELINES),
+                       help='Pipelines to benchmark')
+    parser.add_argument('--resolutions', nargs='+', default=['640x360', '1280x720'],
+                       help='Clip resolutions, WIDTHxHEIGHT')
+    parser.add_argument('--streams', type=int, nargs='+', default=[1, 4],
+                       help='Stream counts for the retail-multi and fire-service pipelines')
+    parser.add_argument('--frames', type=int, default=100,
+                       help='Frames measured per case')
+    parser.add_argument('--warmup', type=int, default=5,
+                       help='Unmeasured frames per case (model warm-up)')
+    parser.add_argument('--clip', type=str, default=None,
+                       help='Recorded video to resize to each resolution instead of a synthetic clip')
+    parser.add_argument('--clip-dir', type=str, default=os.path.join(tempfile.gettempdir(), 'vision_benchmark_clips'),
+                       help='Where generated clips are cached')
+    parser.add_argument('--model-dir', type=str, default=os.path.join(tempfile.gettempdir(), 'vision_benchmark_models'),
+                       help='Where hub weights are downloaded and exports cached')
+    parser.add_argument('--retail-model', type=str, default='yolo11m.pt',
+                       help='YOLO weights for the retail pipelines')
+    parser.add_argument('--fire-model', type=str, default=os.path.join(CODE_DIR, 'Fire Detection', 'Models', 'best.pt'),
+                       help='Fire/smoke segmentation weights')
+    parser.add_argument('--fall-model', type=str, default='yolo12m.pt',
+                       help='YOLO weights for fall detection')
+    parser.add_argument('--backend', choices=('auto',) + BACKENDS, default='pytorch',
+                       help='Inference backend of the YOLO-based pipelines')
+    parser.add_argument('--timeout', type=float, default=1800,
+                       help='Seconds allowed per case')
+    parser.add_argument('--output', type=str, default='benchmark_results.json',
+                       help='Where to write the results')
+    parser.add_argument('--compare', type=str, default=None,
+                       help='Previous results file to compare fps against')
+    parser.add_argument('--child', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        case = json.loads(args.child)
+        result = run_case(case)
+        print(RESULT_MARKER + json.dumps({**case, 'status': 'ok', **result}))
+        return
+
+    # Local weight files are made absolute, bare names are hub models fetched into --model-dir
+    models = {
+        name: os.path.abspath(path) if os.path.exists(path) else path
+        for name, path in (('retail', args.retail_model), ('fire', args.fire_model), ('fall', args.fall_model))
+    }
+    results = []
+    for resolution in args.resolutions:
+        width, height = (int(v) for v in resolution.lower().split('x'))
+        clip = get_clip(args.clip_dir, width, height, args.frames + args.warmup, args.clip)
+        for pipeline in args.pipelines:
+            for streams in (args.streams if pipeline in MULTI_STREAM_PIPELINES else [1]):
+                case = {
+                    'pipeline': pipeline,
+                    'resolution': resolution,
+                    'streams': streams,
+                    'frames': args.frames * streams,
+                    'warmup': args.warmup,
+                    'clip': clip,
+                    'models': models,
+                    'backend': args.backend,
+                    'model_dir': os.path.abspath(args.model_dir),
+                }
+                print(f"⏱️ {pipeline} {resolution} x{streams} ...", flush=True)
+                result = run_in_subprocess(case, args.timeout)
+                result = {**case, **result}
+                results.append(result)
+                if result.get('status') == 'ok':
+                    print(f"   {result['fps']} fps  p50 {result['latency_ms']['p50']} ms  "
+                          f"p95 {result['latency_ms']['p95']} ms  peak RSS {result['peak_rss_mb']} MB  "
+                          f"CPU {result['cpu_cores_used']} cores")
+                else:
+                    print(f"   {result['status']}: {result.get('error', '')}")
+
+    report = {
+        'metadata': {
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'clip_source': args.clip or 'synthetic',
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"📄 Results saved to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Helpers shared by the Smart Retail, Fire Detection and Fall Detection pipelines"""
+from .alerts import AlertCooldown, PhotoAlertDispatcher, RetryableAlertError
+from .dispatch import BackgroundDispatcher, request_not_sent
+from .display import FrameDisplay, PreviewSink, add_display_arguments
+from .event_clips import EventClipRecorder, add_recording_arguments
+from .frame_skip import AdaptiveFrameSkip, grab_frames
+from .inference_backend import add_backend_arguments, load_model
+from .metrics import LatencyHistogram, MetricsRegistry, add_metrics_arguments, configure_metrics, metrics
+from .pipeline import END_OF_STREAM, FramePipeline, StageStats
+
+__all__ = [
+    "AdaptiveFrameSkip",
+    "AlertCooldown",
+    "BackgroundDispatcher",
+    "END_OF_STREAM",
+    "EventClipRecorder",
+    "FrameDisplay",
+    "FramePipeline",
+    "LatencyHistogram",
+    "MetricsRegistry",
+    "PhotoAlertDispatcher",
+    "PreviewSink",
+    "RetryableAlertError",
+    "StageStats",
+    "add_backend_arguments",
+    "add_display_arguments",
+    "add_metrics_arguments",
+    "add_recording_arguments",
+    "configure_metrics",
+    "grab_frames",
+    "load_model",
+    "metrics",
+    "request_not_sent",
+]
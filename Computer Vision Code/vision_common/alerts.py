@@ -0,0 +1,182 @@
+import os
+import time
+
+import cv2
+
+from .dispatch import BackgroundDispatcher
+
+TELEGRAM_API_URL = "https://api.telegram.org/bot{token}/sendPhoto"
+
+
+class RetryableAlertError(Exception):
+    """Server-side or rate-limit failure worth retrying"""
+
+
+class AlertCooldown:
+    """Decides when a new alert may be raised, independently of whether earlier ones were delivered"""
+
+    def __init__(self, cooldown=10.0):
+        self.cooldown = cooldown
+        self.last_alert_time = None
+
+    def running(self, now=None):
+        """True while the last alert's cooldown has not elapsed, without restarting it"""
+        now = time.time() if now is None else now
+        return self.last_alert_time is not None and now - self.last_alert_time < self.cooldown
+
+    def ready(self, now=None):
+        """True (and restarts the cooldown) if enough time passed since the last alert"""
+        now = time.time() if now is None else now
+        if self.running(now):
+            return False
+        self.last_alert_time = now
+        return True
+
+
+class PhotoAlertDispatcher:
+    """
+    Telegram photo alerts sent from a background thread.
+
+    alert() only JPEG-encodes the frame in memory and queues it, so the frame
+    loop never waits on the network. A BackgroundDispatcher uploads the photo
+    over a pooled session with retries. Alerts that cannot be delivered are
+    spooled to spool_dir (the JPEG plus a line in pending_alerts.jsonl) and
+    retried later, including on the next start. An alert delivered more than
+    late_after seconds after it was raised carries its detection time in the
+    caption; one older than max_age is dropped instead.
+
+    Args:
+        api_url (str): sendPhoto endpoint, the Telegram bot URL or a local stub.
+        chat_id (str): Telegram chat receiving the alerts.
+        spool_dir (str): Folder for undelivered alerts, None to drop them.
+        cooldown (float): Minimum seconds between two alerts.
+        jpeg_quality (int): JPEG quality of the uploaded photo.
+        label (str): What is reported, used in file and thread names and messages.
+        caption (str): Default photo caption.
+        max_age (float): Drop undelivered alerts older than this many seconds, None to keep them.
+        late_after (float): Delay after which the caption states when the alert was raised.
+    """
+
+    LABEL = 'alert'
+    CAPTION = '🚨 ALERT!'
+
+    def __init__(self, api_url, chat_id, spool_dir='alert_frames', cooldown=10.0,
+                 jpeg_quality=85, timeout=(3.05, 10), max_retries=3, label=None, caption=None,
+                 max_age=None, late_after=60.0):
+        self.api_url = api_url
+        self.chat_id = chat_id
+        self.spool_dir = spool_dir
+        self.label = label or self.LABEL
+        self.caption = caption or self.CAPTION
+        self.jpeg_quality = jpeg_quality
+        self.timeout = timeout
+        self.max_age = max_age
+        self.late_after = late_after
+        self.cooldown = AlertCooldown(cooldown)
+        self.alerts_raised = 0
+
+        outbox_path = None
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            outbox_path = os.path.join(spool_dir, 'pending_alerts.jsonl')
+        self.dispatcher = BackgroundDispatcher(
+            self._send,
+            outbox_path=outbox_path,
+            max_queue=50,
+            max_retries=max_retries,
+            serialize=self._spool,
+            deserialize=self._unspool,
+            name=f'{self.label}-alerts'
+        )
+
+    @classmethod
+    def from_env(cls, alert_url=None, **kwargs):
+        """Dispatcher configured from TELEGRAM_BOT_TOKEN / TELEGRAM_CHAT_ID, None if alerts are not configured"""
+        token = os.getenv("TELEGRAM_BOT_TOKEN")
+        chat_id = os.getenv("TELEGRAM_CHAT_ID")
+        if alert_url is None:
+            if not token:
+                print(f"⚠️ TELEGRAM_BOT_TOKEN not set, {kwargs.get('label') or cls.LABEL} alerts are disabled")
+                return None
+            alert_url = TELEGRAM_API_URL.format(token=token)
+        return cls(alert_url, chat_id, **kwargs)
+
+    def alert(self, frame, caption=None, now=None, cooldown=None):
+        """
+        Queue a photo alert unless the cooldown is running, returns True if one was raised.
+
+        cooldown overrides the dispatcher's own AlertCooldown, e.g. one per camera.
+        """
+        now = time.time() if now is None else now
+        if not (cooldown or self.cooldown).ready(now):
+            return False
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            print("⚠️ Could not encode the alert frame")
+            return False
+        self.alerts_raised += 1
+        self.dispatcher.submit({'jpeg': jpeg.tobytes(), 'caption': caption or self.caption, 'time': now})
+        return True
+
+    def _send(self, session, event):
+        """Upload one alert photo"""
+        raised = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event['time']))
+        if event['jpeg'] is None:
+            print(f"⚠️ Spooled alert photo missing, dropping alert from {raised}")
+            return
+        age = time.time() - event['time']
+        if self.max_age is not None and age > self.max_age:
+            print(f"⚠️ Dropping {self.label} alert from {raised}, {age / 60:.0f} min old")
+            self._remove_photo(event)
+            return
+        caption = event['caption']
+        if age > self.late_after:
+            # Replayed after an outage: say when it happened, not just that it did
+            caption = f"{caption}\n🕒 Detected at {raised}"
+        response = session.post(
+            self.api_url,
+            files={'photo': (f"{self.label}_{int(event['time'])}.jpg", event['jpeg'], 'image/jpeg')},
+            data={
+                'chat_id': self.chat_id,
+                'caption': caption,
+                'parse_mode': 'Markdown'
+            },
+            timeout=self.timeout
+        )
+        if response.status_code >= 500 or response.status_code == 429:
+            raise RetryableAlertError(f"{response.status_code} - {response.text}")
+        if response.status_code == 200:
+            print(f"✅ {self.label.capitalize()} alert sent to Telegram")
+        else:
+            # 4xx will not succeed on retry, report and drop
+            print(f"❌ Alert rejected: {response.status_code} - {response.text}")
+        self._remove_photo(event)
+
+    @staticmethod
+    def _remove_photo(event):
+        if event.get('photo_path') and os.path.exists(event['photo_path']):
+            os.remove(event['photo_path'])
+
+    def _spool(self, event):
+        """Write the photo next to the outbox and keep only its path in the JSON line"""
+        path = event.get('photo_path')
+        if not path:
+            path = os.path.join(self.spool_dir, f"{self.label}_{event['time']:.3f}.jpg")
+            with open(path, 'wb') as f:
+                f.write(event['jpeg'])
+        return {'photo_path': path, 'caption': event['caption'], 'time': event['time']}
+
+    def _unspool(self, data):
+        try:
+            with open(data['photo_path'], 'rb') as f:
+                jpeg = f.read()
+        except OSError:
+            jpeg = None
+        return {**data, 'jpeg': jpeg}
+
+    def flush(self, timeout=10.0):
+        return self.dispatcher.flush(timeout)
+
+    def close(self, timeout=10.0):
+        """Deliver queued alerts (up to timeout), spool the rest"""
+        self.dispatcher.close(timeout)
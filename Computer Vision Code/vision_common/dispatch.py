@@ -0,0 +1,236 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from .metrics import metrics
+
+
+def request_not_sent(error):
+    """
+    True if a requests error was raised before the request reached the server
+    (refused connection, DNS failure, connect timeout), so resending it cannot
+    apply it twice. Read timeouts and resets after sending return False.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        # NewConnectionError, NameResolutionError... all derive from ConnectTimeoutError
+        return isinstance(getattr(error.args[0], 'reason', None), ConnectTimeoutError)
+    return False
+
+
+class BackgroundDispatcher:
+    """
+    Deliver events from a background thread so network I/O never blocks a frame loop.
+
+    Events are queued by submit() and sent one request each, in order, over
+    one pooled keep-alive session. A failed send is retried with exponential
+    backoff when retryable(error) allows it. Events that still fail, or that
+    arrive while the queue is full, go to a JSON-lines outbox on disk. The
+    outbox is replayed on start and periodically afterwards, and while it
+    holds events new ones are appended behind them, so delivery order is kept.
+
+    Errors retryable() rejects (e.g. a read timeout, where the server may
+    already have applied the request) are not resent: the event is written
+    to an *_unconfirmed.jsonl file next to the outbox for reconciliation.
+
+    Args:
+        send (callable): send(session, event). Return normally once the event is
+            delivered or permanently rejected; raise to have it retried.
+        outbox_path (str): JSON-lines file for undelivered events, None to disable.
+        max_queue (int): Events held in memory before spilling to the outbox.
+        max_retries (int): Retries per event before it goes to the outbox.
+        backoff (float): First retry delay in seconds, doubled on every retry.
+        replay_interval (float): Seconds between outbox replay attempts.
+        retryable (callable): retryable(error), whether a failed send may be
+            repeated. Every error is retried by default.
+        serialize / deserialize (callable): Convert events to and from
+            JSON-compatible dicts for the outbox. Identity by default.
+    """
+
+    def __init__(self, send, outbox_path=None, max_queue=1000, max_retries=3, backoff=0.5,
+                 max_backoff=10.0, replay_interval=30.0, pool_size=4, retryable=None,
+                 serialize=None, deserialize=None, name='dispatcher'):
+        self.send = send
+        self.outbox_path = outbox_path
+        self.unconfirmed_path = None
+        if outbox_path:
+            root, ext = os.path.splitext(outbox_path)
+            self.unconfirmed_path = f"{root}_unconfirmed{ext or '.jsonl'}"
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.replay_interval = replay_interval
+        self.retryable = retryable or (lambda error: True)
+        self.serialize = serialize or (lambda event: event)
+        self.deserialize = deserialize or (lambda data: data)
+        self.name = name
+        self.metric_name = name.replace('-', '_')
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.outbox_lock = threading.Lock()
+        # True while the outbox holds events, new ones then queue up behind them on disk
+        self.outbox_pending = bool(outbox_path) and os.path.exists(outbox_path)
+        self.stop_event = threading.Event()
+        self.sent = 0
+        self.failed = 0
+        self.unconfirmed = 0
+        self.last_replay = time.monotonic()
+
+        self.replay_outbox()
+        self.worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self.worker.start()
+
+    def submit(self, event):
+        """Queue an event without blocking, returns False if it had to go to the outbox"""
+        with self.outbox_lock:
+            if not self.outbox_pending:
+                try:
+                    self.queue.put_nowait(event)
+                    return True
+                except queue.Full:
+                    pass
+            self._write_outbox([event])
+            return False
+
+    def _deliver(self, event):
+        """Send one event with retries, returns 'sent', 'failed' or 'unconfirmed'"""
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.time(f'{self.metric_name}_send'):
+                    self.send(self.session, event)
+                return 'sent'
+            except Exception as e:
+                if not self.retryable(e):
+                    print(f"⚠️ {self.name}: not retried, the server may have applied it: {str(e)}")
+                    return 'unconfirmed'
+                if attempt == self.max_retries or self.stop_event.is_set():
+                    print(f"⚠️ {self.name}: giving up after {attempt + 1} attempts: {str(e)}")
+                    return 'failed'
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+        return 'failed'
+
+    def _run(self):
+        while not (self.stop_event.is_set() and self.queue.empty()):
+            try:
+                event = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                if time.monotonic() - self.last_replay >= self.replay_interval:
+                    self.last_replay = time.monotonic()
+                    self.replay_outbox()
+                continue
+
+            outcome = self._deliver(event)
+            if outcome == 'sent':
+                self.sent += 1
+                metrics.inc(f'{self.metric_name}_sent')
+            elif outcome == 'unconfirmed':
+                self.unconfirmed += 1
+                metrics.inc(f'{self.metric_name}_unconfirmed')
+                self._write_unconfirmed(event)
+            else:
+                # Keep ordering: the failed event and everything queued after it
+                # go back in front of the outbox
+                with self.outbox_lock:
+                    events = [event] + self._drain()
+                    self.failed += len(events)
+                    metrics.inc(f'{self.metric_name}_failed', len(events))
+                    self._write_outbox(events, front=True)
+            self.queue.task_done()
+
+    def _drain(self):
+        """Take everything off the queue"""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+            self.queue.task_done()
+
+    def _write_outbox(self, events, front=False):
+        """Store events in the outbox, at its end or (older events) in front; caller holds outbox_lock"""
+        metrics.inc(f'{self.metric_name}_outboxed', len(events))
+        if not self.outbox_path:
+            print(f"⚠️ {self.name}: dropping {len(events)} undelivered event(s)")
+            return
+        lines = [json.dumps(self.serialize(event)) + '\n' for event in events]
+        if front and os.path.exists(self.outbox_path):
+            with open(self.outbox_path, 'r', encoding='utf-8') as f:
+                lines += [line for line in f if line.strip()]
+            mode = 'w'
+        else:
+            mode = 'w' if front else 'a'
+        with open(self.outbox_path, mode, encoding='utf-8') as f:
+            f.writelines(lines)
+        self.outbox_pending = True
+
+    def _write_unconfirmed(self, event):
+        if not self.unconfirmed_path:
+            print(f"⚠️ {self.name}: dropping 1 unconfirmed event")
+            return
+        with self.outbox_lock:
+            with open(self.unconfirmed_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.serialize(event)) + '\n')
+
+    def replay_outbox(self):
+        """Move outbox events back into the queue, keeping whatever does not fit"""
+        if not self.outbox_path:
+            return 0
+        with self.outbox_lock:
+            if not os.path.exists(self.outbox_path):
+                self.outbox_pending = False
+                return 0
+            with open(self.outbox_path, 'r', encoding='utf-8') as f:
+                lines = [line for line in f if line.strip()]
+            replayed = 0
+            for line in lines:
+                try:
+                    self.queue.put_nowait(self.deserialize(json.loads(line)))
+                except queue.Full:
+                    break
+                replayed += 1
+            remaining = lines[replayed:]
+            if remaining:
+                with open(self.outbox_path, 'w', encoding='utf-8') as f:
+                    f.writelines(remaining)
+            else:
+                os.remove(self.outbox_path)
+            self.outbox_pending = bool(remaining)
+        if replayed:
+            print(f"📤 {self.name}: replaying {replayed} event(s) from {self.outbox_path}")
+        return replayed
+
+    def flush(self, timeout=None):
+        """Wait until the queue is empty, returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout=10.0):
+        """Deliver what is queued (up to timeout), spill the rest to the outbox"""
+        self.flush(timeout)
+        self.stop_event.set()
+        self.worker.join(timeout=max(1.0, self.max_backoff))
+        with self.outbox_lock:
+            leftovers = self._drain()
+            if leftovers:
+                # Queued events are older than anything already in the outbox
+                self._write_outbox(leftovers, front=True)
+        self.session.close()
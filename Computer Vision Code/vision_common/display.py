@@ -0,0 +1,102 @@
+import os
+import time
+
+import cv2
+
+
+class PreviewSink:
+    """
+    Low-rate preview written to disk instead of a window.
+
+    A path ending in .jpg/.png is overwritten with the latest snapshot, any other
+    path is written as an MJPEG .avi with one frame per interval.
+
+    Args:
+        path (str): Snapshot image or MJPEG video path.
+        interval (float): Minimum seconds between two preview frames.
+    """
+
+    def __init__(self, path, interval=5.0):
+        self.path = path
+        self.interval = interval
+        self.last_write_time = 0.0
+        self.writer = None
+        self.is_snapshot = os.path.splitext(path)[1].lower() in ('.jpg', '.jpeg', '.png')
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        """Write the frame if the interval has elapsed"""
+        current_time = time.time()
+        if current_time - self.last_write_time < self.interval:
+            return
+
+        if self.is_snapshot:
+            cv2.imwrite(self.path, frame)
+        else:
+            if self.writer is None:
+                height, width = frame.shape[:2]
+                self.writer = cv2.VideoWriter(
+                    self.path,
+                    cv2.VideoWriter_fourcc(*'MJPG'),
+                    max(1.0, 1.0 / self.interval),
+                    (width, height)
+                )
+            self.writer.write(frame)
+        self.last_write_time = current_time
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class FrameDisplay:
+    """
+    Show frames in a window, or run headless with an optional preview sink.
+
+    In headless mode no HighGUI call is ever made, so the loop runs as fast as
+    inference allows and works on machines without a display.
+
+    Args:
+        window_name (str): Window title in GUI mode.
+        headless (bool): Skip imshow/waitKey entirely.
+        preview_path (str): Optional PreviewSink path used in headless mode.
+        preview_interval (float): Seconds between preview frames.
+        wait_ms (int): waitKey delay in GUI mode.
+    """
+
+    def __init__(self, window_name, headless=False, preview_path=None,
+                 preview_interval=5.0, wait_ms=1):
+        self.window_name = window_name
+        self.headless = headless
+        self.wait_ms = wait_ms
+        self.preview = PreviewSink(preview_path, preview_interval) if headless and preview_path else None
+
+    def show(self, frame):
+        """Display the frame, returns False when the user asked to quit"""
+        if self.headless:
+            if self.preview is not None:
+                self.preview.write(frame)
+            return True
+
+        cv2.imshow(self.window_name, frame)
+        return cv2.waitKey(self.wait_ms) & 0xFF != ord('q')
+
+    def close(self):
+        if self.preview is not None:
+            self.preview.close()
+        if not self.headless:
+            cv2.destroyAllWindows()
+
+
+def add_display_arguments(parser):
+    """Add the --headless / --preview options shared by every pipeline CLI"""
+    parser.add_argument('--headless', action='store_true',
+                        help='Run without any GUI window (no imshow/waitKey)')
+    parser.add_argument('--preview', type=str, default=None,
+                        help='Headless preview: .jpg snapshot or MJPEG .avi path')
+    parser.add_argument('--preview-interval', type=float, default=5.0,
+                        help='Seconds between headless preview frames')
+    return parser
@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .metrics import metrics
+
+
+class EventClipRecorder:
+    """
+    Short video clips around alerts instead of recording the whole stream.
+
+    push() hands every output frame to a worker thread, which JPEG-encodes it
+    into a ring buffer holding the last pre_seconds. trigger() starts a clip
+    made of that buffer plus the next post_seconds of frames. Another trigger
+    while a clip is still being collected extends it, up to max_clip_seconds.
+    Finished clips are decoded and written as mp4 on a separate thread, so
+    the frame loop only pays for a queue put.
+
+    trigger() never blocks: it tags the last pushed frame's sequence number
+    and the worker acts on it once that frame is buffered. Calling it on
+    every frame of an event is cheap, only the newest request is kept.
+
+    Frames are not copied: the caller must not modify a frame after pushing it.
+
+    Args:
+        output_dir (str): Folder for the clips.
+        fps (float): Frame rate of the stream and of the clips.
+        pre_seconds (float): Context kept before the trigger.
+        post_seconds (float): Context recorded after the last trigger.
+        max_clip_seconds (float): Longest clip, a continuing event starts a new one.
+        jpeg_quality (int): Quality of the buffered frames.
+        max_buffer_mb (float): Memory cap of the ring buffer.
+        on_clip (callable): on_clip(path, label) after a clip is written.
+    """
+
+    def __init__(self, output_dir, fps=30.0, pre_seconds=5.0, post_seconds=5.0, max_clip_seconds=60.0,
+                 jpeg_quality=80, max_buffer_mb=64, on_clip=None, name='clips'):
+        self.output_dir = output_dir
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.pre_frames = max(1, int(pre_seconds * self.fps))
+        self.post_frames = max(1, int(post_seconds * self.fps))
+        self.max_clip_frames = max(self.pre_frames + self.post_frames, int(max_clip_seconds * self.fps))
+        self.jpeg_quality = jpeg_quality
+        self.max_buffer_bytes = int(max_buffer_mb * 1024 * 1024)
+        self.on_clip = on_clip
+        self.name = name
+        self.metric_name = name.replace('-', '_')
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.ring = deque()
+        self.ring_bytes = 0
+        self.event = None
+        self.clips = []
+        self.clip_count = 0
+        self.frames_dropped = 0
+        self.pushed = 0
+        # (frame seq, label, time) of the newest trigger, replaced as a whole so the worker reads it safely
+        self.trigger_request = None
+        self.handled_seq = -1
+
+        # Bounded so a stalled encoder costs dropped context, not memory
+        self.queue = queue.Queue(maxsize=max(8, int(self.fps)))
+        self.exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'{name}-export')
+        self.worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self.worker.start()
+
+    def push(self, frame):
+        """Queue an output frame for the ring buffer without blocking"""
+        seq = self.pushed
+        self.pushed += 1
+        try:
+            self.queue.put_nowait((seq, frame))
+        except queue.Full:
+            self.frames_dropped += 1
+            metrics.inc(f'{self.metric_name}_frames_dropped')
+
+    def trigger(self, label='event'):
+        """Start a clip around the frames pushed so far, or extend the one being recorded"""
+        self.trigger_request = (self.pushed - 1, label, time.time())
+
+    def _poll_trigger(self, seq):
+        """Act on a trigger request made at or before frame seq that was not handled yet"""
+        request = self.trigger_request
+        if request is None or request[0] <= self.handled_seq or request[0] > seq:
+            return
+        self.handled_seq = request[0]
+        self._start_event(request[1], request[2])
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                # A trigger made after the last frame was dequeued
+                self._poll_trigger(self.pushed)
+                break
+            seq, frame = item
+
+            with metrics.time(f'{self.metric_name}_encode'):
+                ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                self._poll_trigger(seq)
+                continue
+            jpeg = jpeg.tobytes()
+            self.ring.append(jpeg)
+            self.ring_bytes += len(jpeg)
+            while len(self.ring) > self.pre_frames or self.ring_bytes > self.max_buffer_bytes:
+                self.ring_bytes -= len(self.ring.popleft())
+
+            if self.event is not None:
+                self.event['frames'].append(jpeg)
+                self.event['remaining'] -= 1
+                if self.event['remaining'] <= 0 or len(self.event['frames']) >= self.max_clip_frames:
+                    self._finish_event()
+            self._poll_trigger(seq)
+
+    def _start_event(self, label, timestamp):
+        if self.event is not None:
+            self.event['remaining'] = self.post_frames
+            return
+        self.clip_count += 1
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))
+        path = os.path.join(self.output_dir, f"{label}_{stamp}_{self.clip_count}.mp4")
+        self.event = {
+            'label': label,
+            'path': path,
+            # The pre-event context, ending with the frame that triggered the event
+            'frames': list(self.ring),
+            'remaining': self.post_frames,
+        }
+        print(f"🎬 {self.name}: recording {label} clip {path}")
+
+    def _finish_event(self):
+        event, self.event = self.event, None
+        self.exporter.submit(self._export, event)
+
+    def _export(self, event):
+        """Decode the buffered JPEGs and write them as one mp4"""
+        frames = event['frames']
+        if not frames:
+            return
+        try:
+            first = cv2.imdecode(np.frombuffer(frames[0], np.uint8), cv2.IMREAD_COLOR)
+            height, width = first.shape[:2]
+            writer = cv2.VideoWriter(event['path'], cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (width, height))
+            if not writer.isOpened():
+                raise IOError(f"Could not create clip: {event['path']}")
+            try:
+                with metrics.time(f'{self.metric_name}_export'):
+                    writer.write(first)
+                    for jpeg in frames[1:]:
+                        writer.write(cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR))
+            finally:
+                writer.release()
+        except Exception as e:
+            print(f"⚠️ {self.name}: could not write {event['path']}: {str(e)}")
+            return
+        self.clips.append(event['path'])
+        print(f"🎞️ {self.name}: saved {len(frames)} frames ({len(frames) / self.fps:.1f}s) to {event['path']}")
+        if self.on_clip is not None:
+            self.on_clip(event['path'], event['label'])
+
+    def close(self):
+        """Encode what is queued, write the clip in progress and wait for pending exports"""
+        self.queue.put(None)
+        self.worker.join()
+        if self.event is not None:
+            self._finish_event()
+        self.exporter.shutdown(wait=True)
+        return list(self.clips)
+
+
+def add_recording_arguments(parser, clips_dir='event_clips'):
+    """Add the event clip / full-stream recording options to an argparse parser"""
+    parser.add_argument('--record-stream', action='store_true',
+                       help='Also encode the full annotated stream to --output')
+    parser.add_argument('--clips-dir', type=str, default=clips_dir,
+                       help='Folder for the short clips written around alerts')
+    parser.add_argument('--pre-event', type=float, default=5.0,
+                       help='Seconds of context kept in memory and saved before an alert')
+    parser.add_argument('--post-event', type=float, default=5.0,
+                       help='Seconds recorded after the last alert of an event')
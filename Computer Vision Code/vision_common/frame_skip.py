@@ -0,0 +1,81 @@
+import math
+
+
+def grab_frames(cap, count):
+    """
+    Advance a cv2.VideoCapture by count frames without retrieving them.
+
+    grab() only demuxes and decodes; the BGR conversion and the copy into a
+    NumPy array happen in retrieve(), which skipped frames never pay for.
+
+    Returns:
+        int: Frames actually grabbed (fewer at the end of the stream).
+    """
+    for grabbed in range(count):
+        if not cap.grab():
+            return grabbed
+    return count
+
+
+class AdaptiveFrameSkip:
+    """
+    Pick the frame skip that keeps processing in step with a target frame rate.
+
+    While one selected frame is processed, target_fps * frame_seconds source
+    frames go by, so that is the skip needed to keep up. The per-frame time
+    is smoothed with an exponential moving average, and the skip only moves
+    once the ideal value has left the current step by more than hysteresis,
+    so it does not flap between two values.
+
+    Args:
+        target_fps (float): Source frames per second to keep up with, e.g. the video fps for real time.
+        min_skip (int): Lowest skip (1 processes every frame).
+        max_skip (int): Highest skip, bounds how much video can go unanalyzed.
+        initial_skip (int): Starting skip, defaults to min_skip.
+        smoothing (float): EMA weight of the newest measurement.
+        hysteresis (float): Fraction of a step the ideal skip must cross before changing.
+    """
+
+    def __init__(self, target_fps, min_skip=1, max_skip=10, initial_skip=None,
+                 smoothing=0.2, hysteresis=0.25):
+        if target_fps <= 0:
+            raise ValueError("target_fps must be positive")
+        if not 1 <= min_skip <= max_skip:
+            raise ValueError("need 1 <= min_skip <= max_skip")
+        self.target_fps = target_fps
+        self.min_skip = min_skip
+        self.max_skip = max_skip
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        self.skip = min(max(initial_skip or min_skip, min_skip), max_skip)
+        self.frame_seconds = None
+        self.changes = 0
+
+    def update(self, frame_seconds):
+        """Record the time spent on the last selected frame, returns the skip to use next"""
+        if self.frame_seconds is None:
+            self.frame_seconds = frame_seconds
+        else:
+            self.frame_seconds += self.smoothing * (frame_seconds - self.frame_seconds)
+
+        ideal = self.target_fps * self.frame_seconds
+        if ideal > self.skip + self.hysteresis or ideal < self.skip - 1 - self.hysteresis:
+            skip = min(max(math.ceil(ideal), self.min_skip), self.max_skip)
+            if skip != self.skip:
+                self.skip = skip
+                self.changes += 1
+        return self.skip
+
+    @property
+    def processing_fps(self):
+        """Smoothed selected frames per second"""
+        return 1.0 / self.frame_seconds if self.frame_seconds else None
+
+    def report(self):
+        return {
+            'target_fps': self.target_fps,
+            'skip': self.skip,
+            'skip_changes': self.changes,
+            'processing_fps': round(self.processing_fps, 2) if self.processing_fps else None,
+            'effective_fps': round(self.processing_fps * self.skip, 2) if self.processing_fps else None,
+        }
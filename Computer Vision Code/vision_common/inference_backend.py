@@ -0,0 +1,220 @@
+import importlib.util
+import json
+import os
+import shutil
+import time
+
+BACKENDS = ('pytorch', 'onnx', 'openvino')
+# Fastest first on a CPU-only box when nothing has been measured yet
+CPU_PREFERENCE = ('openvino', 'onnx', 'pytorch')
+
+
+def available_backends():
+    """Backends whose export and runtime packages are installed"""
+    found = ['pytorch']
+    if importlib.util.find_spec('onnx') and importlib.util.find_spec('onnxruntime'):
+        found.append('onnx')
+    if importlib.util.find_spec('openvino'):
+        found.append('openvino')
+    return found
+
+
+def _cuda_available():
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def variant_key(backend, int8=False, imgsz=640, dynamic=False):
+    """Cache key of one exported variant, e.g. 'openvino-int8-640'"""
+    parts = [backend] + (['int8'] if int8 else []) + [str(imgsz)] + (['dynamic'] if dynamic else [])
+    return '-'.join(parts)
+
+
+def _export_dir(weights):
+    return os.path.join(os.path.dirname(os.path.abspath(weights)), 'exported')
+
+
+def _index_path(weights):
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return os.path.join(_export_dir(weights), f"{stem}_exports.json")
+
+
+def _read_index(weights):
+    try:
+        with open(_index_path(weights), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(weights, index):
+    os.makedirs(_export_dir(weights), exist_ok=True)
+    with open(_index_path(weights), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=4)
+
+
+def _weights_mtime(weights):
+    return os.path.getmtime(weights) if os.path.exists(weights) else None
+
+
+def _cached_export(weights, key, index=None):
+    """Index entry of an export that exists and matches the current weights, else None"""
+    index = _read_index(weights) if index is None else index
+    entry = index.get('exports', {}).get(key)
+    if entry and os.path.exists(entry['path']) and entry['weights_mtime'] == _weights_mtime(weights):
+        return entry
+    return None
+
+
+def _quantize_onnx(path, output):
+    """Weight-only dynamic INT8 quantization, ONNX Runtime needs no calibration set for it"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(path, output, weight_type=QuantType.QUInt8)
+    return output
+
+
+def export_model(weights, backend, int8=False, imgsz=640, dynamic=False, calibration_data=None):
+    """
+    Export YOLO weights to ONNX or OpenVINO once and reuse the export afterwards.
+
+    Exports live in an 'exported' folder next to the weights, one file or
+    folder per variant. An export is redone when the weights file changes.
+    OpenVINO INT8 is post-training quantization calibrated on
+    calibration_data (an ultralytics dataset YAML, coco8.yaml by default);
+    ONNX INT8 is dynamic weight quantization.
+
+    Returns:
+        tuple: (path to load with YOLO, task of the original model)
+    """
+    if backend not in ('onnx', 'openvino'):
+        raise ValueError(f"Nothing to export for backend '{backend}'")
+    key = variant_key(backend, int8, imgsz, dynamic)
+    index = _read_index(weights)
+    entry = _cached_export(weights, key, index)
+    if entry:
+        return entry['path'], entry['task']
+
+    from ultralytics import YOLO
+    model = YOLO(weights)   # may download a hub model by name, so the mtime is read afterwards
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    export_dir = _export_dir(weights)
+    os.makedirs(export_dir, exist_ok=True)
+
+    print(f"📦 Exporting {weights} to {key} (one-time)...")
+    t0 = time.perf_counter()
+    if backend == 'openvino':
+        exported = model.export(format='openvino', imgsz=imgsz, dynamic=dynamic, int8=int8,
+                                data=calibration_data if int8 else None)
+        # AutoBackend recognizes OpenVINO folders by this suffix
+        target = os.path.join(export_dir, f"{stem}_{key}_openvino_model")
+    else:
+        exported = model.export(format='onnx', imgsz=imgsz, dynamic=dynamic, simplify=True)
+        target = os.path.join(export_dir, f"{stem}_{key}.onnx")
+        if int8:
+            fp32 = exported
+            exported = _quantize_onnx(fp32, target)
+            # The fp32 model was only the quantizer's input
+            os.remove(fp32)
+
+    if os.path.abspath(exported) != os.path.abspath(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(exported, target)
+
+    index.setdefault('exports', {})[key] = {
+        'path': target,
+        'task': model.task,
+        'weights_mtime': _weights_mtime(weights),
+        'export_seconds': round(time.perf_counter() - t0, 2),
+    }
+    _write_index(weights, index)
+    print(f"✅ Exported {key} in {index['exports'][key]['export_seconds']}s: {target}")
+    return target, model.task
+
+
+def choose_backend(weights, int8=False, imgsz=640, dynamic=False):
+    """
+    Pick the backend for this box.
+
+    Only ONNX / OpenVINO variants that are already exported for these
+    weights are considered, so 'auto' never starts an export on a cold
+    start: run once with an explicit --backend (or compare_backends.py) to
+    create one. Among those, the variant with the lowest latency measured by
+    compare_backends.py wins; otherwise PyTorch on a GPU, and
+    OpenVINO > ONNX Runtime > PyTorch on CPU. With int8 only INT8 variants
+    are considered, PyTorch is the fallback when none is exported.
+
+    Returns:
+        tuple: (backend, int8)
+    """
+    available = available_backends()
+    index = _read_index(weights)
+
+    def exported(backend, quantized):
+        return backend in available and _cached_export(weights, variant_key(backend, quantized, imgsz, dynamic), index)
+
+    measured = index.get('benchmark', {})
+    candidates = []
+    for key, ms in measured.items():
+        backend, quantized = key.split('-')[0], '-int8' in key
+        if (not int8 or quantized) and ((backend == 'pytorch' and not quantized) or exported(backend, quantized)):
+            candidates.append((ms, key))
+    if candidates:
+        _, key = min(candidates)
+        return key.split('-')[0], '-int8' in key
+    if _cuda_available() and not int8:
+        return 'pytorch', False
+    for backend in CPU_PREFERENCE:
+        if backend != 'pytorch' and exported(backend, int8):
+            return backend, int8
+    if int8:
+        print(f"⚠️ No INT8 export of {weights} yet (run once with --backend onnx or openvino --int8), using PyTorch")
+    return 'pytorch', False
+
+
+def record_benchmark(weights, latencies):
+    """Store {variant: mean_ms} so choose_backend picks the fastest measured variant"""
+    index = _read_index(weights)
+    index['benchmark'] = latencies
+    _write_index(weights, index)
+
+
+def load_model(weights, backend='auto', int8=False, imgsz=640, dynamic=False, calibration_data=None):
+    """
+    YOLO model on the requested backend ('auto', 'pytorch', 'onnx' or 'openvino').
+
+    The returned object is an ultralytics YOLO in every case, so predict() and
+    track() work unchanged. If exporting fails the PyTorch weights are used.
+    """
+    if backend == 'auto':
+        backend, int8 = choose_backend(weights, int8, imgsz, dynamic)
+    elif backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected auto or one of {BACKENDS}")
+
+    from ultralytics import YOLO
+    if backend != 'pytorch':
+        try:
+            path, task = export_model(weights, backend, int8, imgsz, dynamic, calibration_data)
+            model = YOLO(path, task=task)
+            model.backend_name = variant_key(backend, int8, imgsz, dynamic)
+            print(f"🧠 {os.path.basename(weights)} running on {model.backend_name}")
+            return model
+        except Exception as e:
+            print(f"⚠️ {backend} backend unavailable for {weights} ({str(e)}), using PyTorch")
+
+    model = YOLO(weights)
+    model.backend_name = 'pytorch'
+    return model
+
+
+def add_backend_arguments(parser):
+    """Add the inference backend command-line options to an argparse parser"""
+    parser.add_argument('--backend', choices=('auto',) + BACKENDS, default='auto',
+                       help='Inference backend, auto picks the fastest one already exported for these weights')
+    parser.add_argument('--int8', action='store_true',
+                       help='Use an INT8-quantized export (ONNX or OpenVINO backends)')
+    parser.add_argument('--calibration-data', type=str, default=None,
+                       help='Dataset YAML for OpenVINO INT8 calibration (ultralytics default if omitted)')
@@ -0,0 +1,249 @@
+import bisect
+import json
+import re
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency bucket upper bounds in seconds, roughly 1-2-5 steps from 0.1 ms to 30 s
+LATENCY_BUCKETS = (
+    0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0,
+)
+
+_DISABLED_TIMER = nullcontext()
+
+
+def _metric_name(name):
+    """Prometheus-safe version of a counter or gauge name"""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, quantiles are estimated by interpolating inside a bucket"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                # Never report more than the largest value actually observed
+                return min(low + (high - low) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.sum / self.count) if self.count else None,
+            'p50_ms': ms(self.quantile(0.50)),
+            'p95_ms': ms(self.quantile(0.95)),
+            'p99_ms': ms(self.quantile(0.99)),
+            'max_ms': ms(self.max),
+        }
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Per-stage latency histograms, counters and gauges for a pipeline.
+
+    Stages are timed with `with metrics.time('yolo'):` or observe(). While the
+    registry is disabled every call returns immediately (time() hands back a
+    shared no-op context), so instrumented code costs one method call.
+    Everything can be exported as a dict for reports, as Prometheus text over
+    HTTP, or as JSON lines written periodically.
+
+    Args:
+        enabled (bool): Start collecting right away.
+        prefix (str): Prefix of the exported Prometheus metric names.
+    """
+
+    def __init__(self, enabled=False, prefix='vision'):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.time()
+        self.http_server = None
+        self.json_stop = None
+
+    def enable(self):
+        self.enabled = True
+        self.started = time.time()
+
+    def time(self, name):
+        """Context manager observing the duration of the block under `name`"""
+        if not self.enabled:
+            return _DISABLED_TIMER
+        return _Timer(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        """All metrics as a JSON-ready dict"""
+        with self.lock:
+            return {
+                'uptime_seconds': round(time.time() - self.started, 3),
+                'latency': {name: h.summary() for name, h in sorted(self.histograms.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'gauges': dict(sorted(self.gauges.items())),
+            }
+
+    def prometheus_text(self):
+        """Metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        lines = [f"# TYPE {p}_stage_seconds histogram"]
+        with self.lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{p}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {h.sum:.6f}')
+                lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {h.count}')
+            for name, value in sorted(self.counters.items()):
+                name = _metric_name(name)
+                lines.append(f"# TYPE {p}_{name}_total counter")
+                lines.append(f"{p}_{name}_total {value}")
+            for name, value in sorted(self.gauges.items()):
+                name = _metric_name(name)
+                lines.append(f"# TYPE {p}_{name} gauge")
+                lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port, host='127.0.0.1'):
+        """Serve prometheus_text() at http://host:port/metrics from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.http_server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.http_server.serve_forever, name='metrics-http', daemon=True).start()
+        print(f"📈 Metrics at http://{host}:{port}/metrics")
+        return self.http_server
+
+    def write_json_lines(self, path, interval=10.0):
+        """Append a snapshot to a JSON-lines file every interval seconds until close()"""
+        self.json_stop = threading.Event()
+
+        def run():
+            while not self.json_stop.wait(interval):
+                self._append_json(path)
+            self._append_json(path)
+
+        self.json_thread = threading.Thread(target=run, name='metrics-json', daemon=True)
+        self.json_thread.start()
+
+    def _append_json(self, path):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': time.strftime('%Y-%m-%d %H:%M:%S'), **self.snapshot()}) + '\n')
+
+    def close(self):
+        if self.json_stop is not None:
+            self.json_stop.set()
+            self.json_thread.join()
+            self.json_stop = None
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+            self.http_server = None
+
+
+# Process-wide registry, disabled until a pipeline opts in
+metrics = MetricsRegistry()
+
+
+def add_metrics_arguments(parser):
+    """Add the metrics command-line options to an argparse parser"""
+    parser.add_argument('--metrics', action='store_true',
+                       help='Collect per-stage latency histograms, queue depths and drop counters')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                       help='Serve Prometheus metrics on this localhost port (implies --metrics)')
+    parser.add_argument('--metrics-json', type=str, default=None,
+                       help='Append a JSON metrics snapshot to this file periodically (implies --metrics)')
+    parser.add_argument('--metrics-interval', type=float, default=10.0,
+                       help='Seconds between JSON metrics snapshots')
+
+
+def configure_metrics(args):
+    """Enable and export the process-wide registry according to add_metrics_arguments options"""
+    if not (args.metrics or args.metrics_port or args.metrics_json):
+        return metrics
+    metrics.enable()
+    if args.metrics_port:
+        metrics.serve_prometheus(args.metrics_port)
+    if args.metrics_json:
+        metrics.write_json_lines(args.metrics_json, args.metrics_interval)
+    return metrics
@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+
+from .metrics import metrics
+
+# Marker pushed through the queues when the source is exhausted or the run is stopped
+END_OF_STREAM = object()
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy_time = 0.0      # seconds spent doing the stage's own work
+        self.wait_time = 0.0      # seconds blocked on an empty input / full output queue
+        self.start_time = None
+        self.end_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        self.end_time = time.perf_counter()
+
+    def add(self, busy, frames=1):
+        self.busy_time += busy
+        self.frames += frames
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return end - self.start_time
+
+    def summary(self):
+        """Return the stage counters as a plain dict"""
+        return {
+            'stage': self.name,
+            'frames': self.frames,
+            'busy_seconds': round(self.busy_time, 3),
+            'wait_seconds': round(self.wait_time, 3),
+            'throughput_fps': round(self.frames / self.elapsed, 2) if self.elapsed else 0.0,
+            'capacity_fps': round(self.frames / self.busy_time, 2) if self.busy_time else 0.0,
+        }
+
+
+class FramePipeline:
+    """
+    Run decode, inference and encode as three stages connected by bounded queues.
+
+    The decoder and the sink each get their own thread; the processing stage runs
+    on the calling thread so models and HighGUI stay on the main thread. A full
+    queue blocks the upstream stage, so memory is bounded by the queue depths.
+
+    Args:
+        source (callable): Returns the next frame, or None when the stream is over.
+        process (callable): Takes a frame and returns the frame to hand to the sink,
+            or None to stop the whole pipeline (e.g. the user pressed 'q').
+        sink (callable): Consumes processed frames (video writer, snapshots, ...).
+        decode_queue_size (int): Max frames buffered between decoder and inference.
+        sink_queue_size (int): Max frames buffered between inference and sink.
+    """
+
+    def __init__(self, source, process, sink, decode_queue_size=4, sink_queue_size=4):
+        if decode_queue_size < 1 or sink_queue_size < 1:
+            raise ValueError("Queue sizes must be at least 1")
+
+        self.source = source
+        self.process = process
+        self.sink = sink
+        self.decode_queue = queue.Queue(maxsize=decode_queue_size)
+        self.sink_queue = queue.Queue(maxsize=sink_queue_size)
+        self.stop_event = threading.Event()
+        self.stats = {
+            'decode': StageStats('decode'),
+            'inference': StageStats('inference'),
+            'sink': StageStats('sink'),
+        }
+        self.errors = []
+
+    def _put(self, q, item, stats):
+        """Blocking put that still honours stop requests"""
+        wait_start = time.perf_counter()
+        while True:
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if self.stop_event.is_set() and item is not END_OF_STREAM:
+                    return False
+        stats.wait_time += time.perf_counter() - wait_start
+        return True
+
+    def _get(self, q, stats):
+        wait_start = time.perf_counter()
+        item = q.get()
+        stats.wait_time += time.perf_counter() - wait_start
+        return item
+
+    def _decode_loop(self):
+        stats = self.stats['decode']
+        stats.start()
+        try:
+            while not self.stop_event.is_set():
+                t0 = time.perf_counter()
+                frame = self.source()
+                if frame is None:
+                    break
+                stats.add(time.perf_counter() - t0)
+                if not self._put(self.decode_queue, frame, stats):
+                    break
+        except Exception as e:
+            self.errors.append(e)
+            self.stop_event.set()
+        finally:
+            stats.stop()
+            self._drain_and_close(self.decode_queue)
+
+    def _sink_loop(self):
+        stats = self.stats['sink']
+        stats.start()
+        try:
+            while True:
+                frame = self._get(self.sink_queue, stats)
+                metrics.set_gauge('sink_queue_depth', self.sink_queue.qsize())
+                if frame is END_OF_STREAM:
+                    break
+                t0 = time.perf_counter()
+                self.sink(frame)
+                stats.add(time.perf_counter() - t0)
+        except Exception as e:
+            self.errors.append(e)
+            self.stop_event.set()
+            # Keep consuming so the inference stage never blocks on a dead sink
+            while self.sink_queue.get() is not END_OF_STREAM:
+                pass
+        finally:
+            stats.stop()
+
+    def _drain_and_close(self, q):
+        """Push END_OF_STREAM, dropping queued frames if the pipeline was stopped"""
+        if self.stop_event.is_set():
+            while True:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+                metrics.inc('frames_dropped')
+        q.put(END_OF_STREAM)
+
+    def run(self):
+        """Run until the source is exhausted or process() asks to stop"""
+        decoder = threading.Thread(target=self._decode_loop, name='pipeline-decode', daemon=True)
+        sink = threading.Thread(target=self._sink_loop, name='pipeline-sink', daemon=True)
+        decoder.start()
+        sink.start()
+
+        stats = self.stats['inference']
+        stats.start()
+        try:
+            while True:
+                frame = self._get(self.decode_queue, stats)
+                metrics.set_gauge('decode_queue_depth', self.decode_queue.qsize())
+                if frame is END_OF_STREAM:
+                    break
+                t0 = time.perf_counter()
+                result = self.process(frame)
+                stats.add(time.perf_counter() - t0)
+                if result is None:
+                    self.stop_event.set()
+                    break
+                if not self._put(self.sink_queue, result, stats):
+                    break
+        finally:
+            stats.stop()
+            # The sink still flushes everything already queued before it sees END_OF_STREAM
+            self.stop_event.set()
+            self.sink_queue.put(END_OF_STREAM)
+            # Unblock the decoder if it is waiting on a full queue
+            while decoder.is_alive():
+                try:
+                    self.decode_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            decoder.join()
+            sink.join()
+
+        if self.errors:
+            raise self.errors[0]
+        return self.report()
+
+    def report(self):
+        """Return per-stage throughput as a list of dicts"""
+        return [s.summary() for s in self.stats.values()]
+
+    def print_report(self):
+        """Print per-stage throughput in a small table"""
+        print("\n📊 Pipeline stage throughput:")
+        print(f"{'stage':<10} {'frames':>7} {'fps':>8} {'capacity':>9} {'busy s':>8} {'wait s':>8}")
+        for s in self.report():
+            print(f"{s['stage']:<10} {s['frames']:>7} {s['throughput_fps']:>8} "
+                  f"{s['capacity_fps']:>9} {s['busy_seconds']:>8} {s['wait_seconds']:>8}")